@@ -1,6 +1,3 @@
-from dataclass import 
-
-
 class BaseError(Exception):
     """ Base error """
 
@@ -10,30 +7,30 @@ class BaseError(Exception):
         self.status_code = status_code
 
 
-class RetryableAPIError(Exception):
+class RequestError(BaseError):
+    """ API rquest error """
+    def __init__(self, message, provider=None, status_code=None):
+        super().__init__(message, provider, status_code)
+
+
+class RetryableAPIError(RequestError):
     """Exception that should trigger retry"""
     pass
 
 
-class NonRetryableAPIError(Exception):
+class NonRetryableAPIError(RequestError):
     """Exception that should NOT trigger retry"""
     pass
 
 
-class RequestError(BaseError):
-    """ API rquest error """
-    def __init__(self, message, provider):
-        super().__init__(message, provider)
-
-
-class RateLimitError(GolfAPIError):
+class RateLimitError(RetryableAPIError):
     """ Exception raised when API rate limit is exceeded """
-    def __init__(self, message="Rate limit exceeded", retry_after=None):
-        super().__init__(message)
+    def __init__(self, message="Rate limit exceeded", retry_after=None, provider=None, status_code=429):
+        super().__init__(message, provider, status_code)
         self.retry_after = retry_after
 
 
-class CourseNotFoundError(GolfAPIError):
+class CourseNotFoundError(BaseError):
     """ Exception raised when a golf course isn't found """
     def __init__(self, course_id, provider=None):
         message = f"Course not found: {course_id}"
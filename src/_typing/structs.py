@@ -35,6 +35,7 @@ class TeeTime(BaseModel):
     date: str
     start_time_unf: str # cron time, UTC time unformatted
     course_name: str
+    course_side: Optional[str] = None  # sub-course / tee sheet side within the course
     # available_spots: int
     holes: List[int]  # number of holes 9, 18, or both
     booking_url: str
@@ -83,6 +84,13 @@ class TeeTimeParameter(BaseModel):
     # headers: dict = Field(default_factory=dict)
 
 
+class FetchResult(BaseModel):
+    """One adapter fetch for a (course, date)"""
+    tee_times: List[TeeTime] = Field(default_factory=list)
+    content_hash: Optional[str] = None  # stable hash of the raw provider response
+    unchanged: bool = False  # hash matched the previous scrape, parsing skipped
+
+
 class TeeTimeRequestLog(BaseModel):
     request: dict
     is_success: bool
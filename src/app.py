@@ -3,16 +3,18 @@ from flask_cors import CORS
 from datetime import datetime, timedelta, date as dt_date
 from apscheduler.schedulers.background import BackgroundScheduler
 import atexit
-import time 
 
 from src.config import courses
 from src.scraper import scraper
 from src import test
-from src.models import db, init_db, CourseRequest, BugReport, RequestLog
-from src.cache_service import TeeTimeCacheService
+from src.models import db, init_db, CourseRequest, BugReport, RequestLog, resolve_tee_time_fields
+from src.request_logger import RequestLogger
+from src.cache_service import TeeTimeCacheService, tee_time_snapshots, SEARCH_SORTS
+from src.demand import demand
 from src.util import (
     sched,
     traffic,
+    pagination,
 )
 
 app = Flask(__name__)
@@ -22,18 +24,12 @@ app.config['DEBUG'] = True
 # Initialize database
 init_db(app)
 
+# Provider request logs are written in batches off the scrape path
+RequestLogger.start_sink(app)
 
- # Initialize vars for caching
-cached_tee_time_data = None
-cached_tee_time_time = 0
-CACHE_TTL = 30 * 60  # 30 minutes in seconds
 
-
-def fetch_tee_times_from_db():
-    # Replace with your actual DB query
-    return TeeTimeCacheService.get_cached_tee_times(
-        available_only=True
-    )
+# Largest page /api/search will return
+MAX_SEARCH_LIMIT = 500
 
 
 # Initialize scheduler (only in main process)
@@ -74,6 +70,8 @@ def index():
             "/api/cached_teetimes": "Get all cached tee times",
             "/api/cached_teetimes/<course_name>": "Get cached tee times for specific course",
             "/api/available_dates": "Get distinct available dates from cached tee times",
+            "/api/search": "Search cached tee times with server-side filters",
+            "/api/tee_times/<id>/raw": "Get the raw provider payload for one tee time",
             "/api/course_requests": "Submit (POST) or get (GET) course requests",
             "/api/course_requests/<id>/mark_added": "Mark course request as added (PATCH)",
             "/api/file_a_bug": "Submit bug reports (POST)",
@@ -177,14 +175,22 @@ def get_all_cached_tee_times():
     
     # available_only = request.args.get('available_only', 'true').lower() == 'true'
 
-    global cached_tee_time_data, cached_tee_time_time
-    now = time.time()
-
-    if cached_tee_time_data is None or (now - cached_tee_time_time) > CACHE_TTL:
-        cached_tee_time_data = fetch_tee_times_from_db()
-        cached_tee_time_time = now
-
-    return jsonify(cached_tee_time_data)
+    # ?limit= / ?cursor= ask for keyset pages straight from the DB
+    # (?offset= is deprecated and goes away in the next release)
+    if any(arg in request.args for arg in ('limit', 'cursor', 'offset')):
+        try:
+            page = TeeTimeCacheService.get_cached_tee_times_page(
+                limit=max(1, min(request.args.get('limit', 100, type=int), MAX_SEARCH_LIMIT)),
+                cursor=request.args.get('cursor'),
+                include_total=request.args.get('include_total', 'false').lower() == 'true',
+                offset=request.args.get('offset', 0, type=int) if 'offset' in request.args else None
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(page)
+
+    # Serialized and compressed once per snapshot; 304 when the client is current
+    return tee_time_snapshots.get().data.payload.response()
     # return jsonify({
     #     'count': len(cached_tee_times),
     #     'tee_times': cached_tee_times
@@ -195,18 +201,93 @@ def get_all_cached_tee_times():
 @traffic.rate_limit()
 def get_cached_tee_times_by_course(course_name):
     """Get cached tee times for a specific course"""
-    date = request.args.get('date')
-    available_only = request.args.get('available_only', 'true').lower() == 'true'
+    # ?date= only weights scrape demand; the response covers every upcoming date
+    if course_name in courses:
+        demand.record(course_name, request.args.get('date'))
 
-    cached_tee_times = TeeTimeCacheService.get_cached_tee_times(
-        course_name=course_name,
-        available_only=available_only
-    )
+    # Same rows get_cached_tee_times(course_name=...) returns for a configured
+    # course, cut from the snapshot
+    return tee_time_snapshots.get().data.course_payload(course_name).response()
+
+
+@app.route('/api/search', methods=['GET'])
+@traffic.rate_limit()
+def search_tee_times():
+    """
+    Search cached tee times. Every filter is optional:
+        date_from, date_to (YYYY-MM-DD), time_from, time_to (HH:MM),
+        max_price, holes (9|18), min_spots, party_size (1-4),
+        courses, providers (comma separated),
+        special_offer, available_only, sort (time|price|course, '-' for desc), limit,
+        fields ("list", "detail" or comma separated keys)
+    """
+    def csv_arg(name):
+        value = request.args.get(name)
+        return [v.strip() for v in value.split(',') if v.strip()] if value else None
+
+    def bool_arg(name, default=None):
+        value = request.args.get(name)
+        return default if value is None else value.lower() == 'true'
+
+    sort = request.args.get('sort', 'time')
+    holes = request.args.get('holes', type=int)
+    party_size = request.args.get('party_size', type=int)
+    limit = request.args.get('limit', 100, type=int)
+
+    if sort.lstrip('-') not in SEARCH_SORTS:
+        return jsonify({
+            'error': f"Invalid sort: {sort}. Use one of {', '.join(SEARCH_SORTS)}"
+        }), 400
+    if holes is not None and holes not in (9, 18):
+        return jsonify({'error': 'holes must be 9 or 18'}), 400
+    if party_size is not None and not 1 <= party_size <= 4:
+        return jsonify({'error': 'party_size must be between 1 and 4'}), 400
+    try:
+        fields = resolve_tee_time_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    filters = {
+        'date_from': request.args.get('date_from'),
+        'date_to': request.args.get('date_to'),
+        'time_from': request.args.get('time_from'),
+        'time_to': request.args.get('time_to'),
+        'max_price': request.args.get('max_price', type=float),
+        'holes': holes,
+        'min_spots': request.args.get('min_spots', type=int),
+        'party_size': party_size,
+        'courses': csv_arg('courses'),
+        'providers': csv_arg('providers'),
+        'special_offer': bool_arg('special_offer'),
+        'available_only': bool_arg('available_only', True),
+        'sort': sort,
+        'limit': max(1, min(limit, MAX_SEARCH_LIMIT)),
+    }
+
+    try:
+        tee_times = TeeTimeCacheService.search_tee_times(**filters, fields=fields)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    demand.record_search(filters['courses'], filters['date_from'], filters['date_to'])
+
+    return jsonify({
+        'count': len(tee_times),
+        'filters': filters,
+        'tee_times': tee_times
+    })
+
+
+@app.route('/api/tee_times/<int:tee_time_id>/raw', methods=['GET'])
+@traffic.rate_limit()
+def get_tee_time_raw(tee_time_id):
+    """Raw provider payload for one cached tee time (kept out of list responses)"""
+    found, raw_json_response = TeeTimeCacheService.get_raw_response(tee_time_id)
+    if not found:
+        return jsonify({'error': f'Tee time {tee_time_id} not found'}), 404
 
     return jsonify({
-        'course_name': course_name,
-        'count': len(cached_tee_times),
-        'tee_times': cached_tee_times
+        'id': tee_time_id,
+        'raw_json_response': raw_json_response
     })
 
 
@@ -340,8 +421,10 @@ def get_request_logs():
     """Get external API request logs"""
     try:
         # Get query parameters
-        limit = request.args.get('limit', 100, type=int)
-        offset = request.args.get('offset', 0, type=int)
+        limit = max(1, min(request.args.get('limit', 100, type=int), MAX_SEARCH_LIMIT))
+        cursor = request.args.get('cursor')  # next_cursor from the previous page
+        offset = request.args.get('offset', 0, type=int)  # deprecated, use cursor
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
         provider = request.args.get('provider')  # Filter by provider
         course = request.args.get('course')  # Filter by course
         is_error = request.args.get('is_error')  # Filter by error status
@@ -357,11 +440,15 @@ def get_request_logs():
         if is_error is not None:
             query = query.filter(RequestLog.is_error == (is_error.lower() == 'true'))
         
-        # Get total count for pagination
-        total_count = query.count()
-        
-        # Apply pagination and ordering
-        logs = query.order_by(RequestLog.datetime.desc()).offset(offset).limit(limit).all()
+        # Newest first, keyed on (datetime, id) so pages never shift under inserts
+        columns = [RequestLog.datetime, RequestLog.id]
+        try:
+            cursor_values, offset = pagination.page_start(cursor, offset, [datetime.fromisoformat, int])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        logs, has_more = pagination.paginate(query, columns, cursor_values, limit,
+                                             descending=True, offset=offset)
         
         # Convert to dictionaries
         logs_data = [log.to_dict() for log in logs]
@@ -369,10 +456,16 @@ def get_request_logs():
         return jsonify({
             'logs': logs_data,
             'pagination': {
-                'total': total_count,
+                # Kept for offset-page clients until the next release; total is
+                # an exact COUNT(*), so every other page skips it
+                'total': query.count() if 'offset' in request.args else None,
                 'limit': limit,
                 'offset': offset,
-                'has_more': (offset + limit) < total_count
+                'has_more': has_more,
+                'next_cursor': pagination.encode_cursor(
+                    [logs[-1].datetime.isoformat(), logs[-1].id]) if has_more else None,
+                # Planner estimate, only on request; never a COUNT(*)
+                'total_estimate': pagination.estimated_count(query) if include_total else None
             },
             'filters': {
                 'provider': provider,
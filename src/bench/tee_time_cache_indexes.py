@@ -0,0 +1,132 @@
+"""
+Benchmark: tee_time_cache read-path plans with and without the managed indexes.
+
+Seeds a scratch database with a large tee_time_cache, then EXPLAINs the
+exact queries behind get_cached_tee_times and get_available_dates twice:
+once with only the unique constraint, once with the TeeTimeCache indexes.
+
+    BENCH_DATABASE_URL=postgresql://localhost/bench \\
+        python -m src.bench.tee_time_cache_indexes --rows 500000
+
+Never point this at the app's DATABASE_URL; it drops and reseeds the table.
+"""
+import argparse
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import text
+
+from src.models import db, TeeTimeCache
+from src.cache_service import TeeTimeCacheService
+from src.util import misc
+
+
+COURSES = 12
+SLOTS_PER_DAY = 84  # 06:00 - 20:00 every 10 minutes
+
+
+def seed(rows: int, batch_size: int = 5000):
+    """Fill tee_time_cache with mostly-historical rows, as an un-pruned table looks"""
+    now = datetime.utcnow()
+    first_day = date.today() - timedelta(days=(rows // COURSES // SLOTS_PER_DAY) - 14)
+
+    batch = []
+    for i in range(rows):
+        slot = i // COURSES
+        day = first_day + timedelta(days=slot // SLOTS_PER_DAY)
+        minutes = 6 * 60 + (slot % SLOTS_PER_DAY) * 10
+        batch.append({
+            'course_name': f'Course {i % COURSES}',
+            'date': day.strftime('%Y-%m-%d'),
+            'start_time': f'{minutes // 60:02d}:{minutes % 60:02d}',
+            'tee_date': day,
+            'start_minute': minutes,
+            'starts_at': misc.tee_time_epoch(day, minutes),
+            'players_available': 4,
+            'holes': [18],
+            'provider': 'chronogolf',
+            'price': 40.0,
+            'green_fee': 40.0,
+            'subtotal': 40.0,
+            'is_available': random.random() < 0.7,
+            'created_at': now,
+            'updated_at': now,
+            'last_seen_at': now,
+        })
+        if len(batch) == batch_size:
+            db.session.execute(TeeTimeCache.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(TeeTimeCache.__table__.insert(), batch)
+    db.session.commit()
+
+
+def explain(query) -> list:
+    """Plan lines for a query, compiled exactly as the service runs it"""
+    sql = str(query.statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    if db.engine.dialect.name == 'sqlite':
+        rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        return [row[-1] for row in rows]
+    rows = db.session.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")).all()
+    return [row[0] for row in rows]
+
+
+def analyze():
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(text("ANALYZE"))
+    else:
+        db.session.execute(text("ANALYZE tee_time_cache"))
+    db.session.commit()
+
+
+def report(label: str):
+    queries = {
+        'get_cached_tee_times': TeeTimeCacheService._upcoming_query(),
+        'get_cached_tee_times(course)': TeeTimeCacheService._upcoming_query('Course 3'),
+        'get_available_dates': TeeTimeCacheService._available_dates_query(),
+    }
+    print(f"\n===== {label} =====")
+    for name, query in queries.items():
+        start = time.perf_counter()
+        query.all()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"\n--- {name} ({elapsed_ms:.1f} ms)")
+        for line in explain(query):
+            print(f"  {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+
+    database_url = os.environ.get('BENCH_DATABASE_URL')
+    if not database_url or database_url == os.environ.get('DATABASE_URL'):
+        raise SystemExit("Set BENCH_DATABASE_URL to a scratch database (not DATABASE_URL)")
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    db.init_app(app)
+
+    with app.app_context():
+        TeeTimeCache.__table__.drop(db.engine, checkfirst=True)
+        TeeTimeCache.__table__.create(db.engine)
+        for index in TeeTimeCache.__table__.indexes:
+            index.drop(db.engine)
+
+        print(f"Seeding {args.rows} rows...")
+        seed(args.rows)
+        analyze()
+        report("unique constraint only")
+
+        for index in TeeTimeCache.__table__.indexes:
+            index.create(db.engine)
+        analyze()
+        report("with managed indexes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,101 +1,297 @@
-from datetime import datetime, timedelta
-from typing import List
-from src.models import db, TeeTimeCache
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date as dt_date, datetime, timedelta
+from typing import List, Iterable, Dict, Tuple
+from src.models import db, TeeTimeCache, ScrapeFingerprint, CacheVersion, TEE_TIME_FIELD_PROFILES
 from src._typing.structs import TeeTime
-from sqlalchemy import func, Integer, or_, and_
+from sqlalchemy import func, Integer, or_, tuple_, exists
 from sqlalchemy.sql.expression import cast
-import pytz
-from src.util import misc
+from sqlalchemy.dialects import postgresql, sqlite
+from src.util import misc, pagination
+from src import partitions
+from src.config import courses
+from src.snapshot_cache import SnapshotCache
+from src.util.http_cache import EncodedPayload
+
+logger = logging.getLogger(__name__)
+
+
+# Columns of the unique_tee_time_slot constraint (the ON CONFLICT target).
+# Open spots are a mutable attribute of a slot, not part of its identity
+SLOT_COLUMNS = ['course_name', 'course_side', 'date', 'start_time']
+
+# Refreshed on conflict; provider/holes/booking_url/created_at keep their first-seen values
+UPSERT_UPDATE_COLUMNS = [
+    'players_available', 'min_players', 'is_available', 'green_fee', 'price', 'half_cart', 'subtotal',
+    'restrictions', 'special_offer', 'raw_json_response', 'is_stale', 'last_seen_at',
+    'updated_at'
+]
+
+# Compared against the stored row to decide whether a seen slot needs a write.
+# raw_json_response is only rewritten alongside a real change, and
+# last_seen_at only moves when the row is written (see ScrapeFingerprint
+# for when a (course, date) was last scraped)
+DIFF_COLUMNS = [
+    'players_available', 'min_players', 'is_available', 'holes', 'booking_url', 'provider', 'green_fee', 'half_cart',
+    'price', 'subtotal', 'restrictions', 'special_offer'
+]
+
+
+@dataclass
+class IngestStats:
+    """Row writes made by one cache_tee_times call"""
+    inserted: int = 0
+    updated: int = 0
+    closed: int = 0  # flipped to is_available=False
+    unchanged: int = 0  # seen again with identical fields, not written
+    skipped: int = 0  # malformed tee times left out of the batch
+    # inserted + updated + closed per (course_name, date)
+    by_scope: Dict[Tuple[str, str], int] = field(default_factory=dict)
+
+    @property
+    def changed(self) -> int:
+        return self.inserted + self.updated + self.closed
+
+    def __add__(self, other: 'IngestStats') -> 'IngestStats':
+        return IngestStats(self.inserted + other.inserted,
+                           self.updated + other.updated,
+                           self.closed + other.closed,
+                           self.unchanged + other.unchanged,
+                           self.skipped + other.skipped,
+                           dict(Counter(self.by_scope) + Counter(other.by_scope)))
+
+    def __str__(self):
+        return (f"{self.inserted} inserted, {self.updated} updated, "
+                f"{self.closed} closed, {self.unchanged} unchanged, {self.skipped} skipped")
+
+
+# Sort keys accepted by search_tee_times; time order breaks every tie
+SEARCH_SORTS = {
+    'time': [TeeTimeCache.starts_at, TeeTimeCache.id],
+    'price': [TeeTimeCache.price, TeeTimeCache.starts_at, TeeTimeCache.id],
+    'course': [TeeTimeCache.course_name, TeeTimeCache.starts_at, TeeTimeCache.id],
+}
+
+
+def _holes_contains(holes: int):
+    """SQL predicate: the holes JSON array contains this hole count"""
+    if db.engine.dialect.name == 'sqlite':
+        options = func.json_each(TeeTimeCache.holes).table_valued('value')
+        return exists().select_from(options).where(options.c.value == holes)
+    return cast(TeeTimeCache.holes, postgresql.JSONB).contains([holes])
+
+
+def _partition_key_range(date_from: dt_date = None, date_to: dt_date = None) -> list:
+    """
+    A tee date range as filters on the varchar date column. tee_time_cache is
+    partitioned by it on Postgres, and filters on tee_date / starts_at alone
+    can't prune partitions, so every read bounds it too
+    """
+    filters = []
+    if date_from is not None:
+        filters.append(TeeTimeCache.date >= date_from.strftime('%Y-%m-%d'))
+    if date_to is not None:
+        filters.append(TeeTimeCache.date <= date_to.strftime('%Y-%m-%d'))
+    return filters
+
+
+def _dialect_insert():
+    """INSERT construct with ON CONFLICT support for the bound database"""
+    if db.engine.dialect.name == 'sqlite':
+        return sqlite.insert
+    return postgresql.insert
 
 
 class TeeTimeCacheService:
     """Service class for managing tee time cache operations"""
 
     @staticmethod
-    def cache_tee_times(tee_times: List[TeeTime], provider: str = None):
+    def cache_tee_times(tee_times: List[TeeTime],
+                        provider: str = None,
+                        scopes: Iterable[tuple] = None) -> IngestStats:
         """
         Cache a list of tee times and update availability flags.
-        
+
+        The current slots of every scraped (course, date) are loaded once and
+        diffed in memory, so only new slots, slots that disappeared and slots
+        whose fields changed are written.
+
         Args:
             tee_times: List of TeeTime objects to cache
             provider: Optional provider name to override individual tee time provider
-        """
-        if not tee_times:
-            return
+            scopes: (course_name, date) pairs that were scraped, in addition to
+                those of tee_times; pass them so a scrape that came back
+                empty closes that day's slots
 
+        Returns:
+            IngestStats with the number of rows inserted, updated and closed
+        """
+        stats = IngestStats()
         current_time = datetime.utcnow()
 
-        # Step 1: Mark all existing entries as potentially unavailable
-        # We'll mark them back as available if they appear in the new data
+        # Dedupe on the slot key so one slot is never written twice
+        rows = {}
         for tee_time in tee_times:
-            course_name = tee_time.course_name
-            date = tee_time.date
+            try:
+                row = TeeTimeCacheService._slot_row(tee_time, provider, current_time)
+            except ValueError as e:
+                # One unparseable date or start_time must not sink the whole batch
+                logger.warning(f"Skipping tee time of {tee_time.course_name} with "
+                               f"date={tee_time.date!r} start_time={tee_time.start_time_unf!r}: {e}")
+                stats.skipped += 1
+                continue
+            rows[tuple(row[c] for c in SLOT_COLUMNS)] = row
 
-            # Mark all existing entries for this course and date as unavailable initially
-            existing_entries = TeeTimeCache.query.filter_by(
-                course_name=course_name, date=date).all()
+        scopes = {(row['course_name'], row['date']) for row in rows.values()} | set(scopes or ())
+        if not scopes:
+            return stats
 
-            for entry in existing_entries:
-                entry.is_available = False
-                entry.updated_at = current_time
+        # Current state of the scraped (course, date) pairs, one query
+        slot_columns = [getattr(TeeTimeCache, c) for c in SLOT_COLUMNS]
+        existing = {
+            tuple(getattr(r, c) for c in SLOT_COLUMNS): r
+            for r in db.session.query(
+                TeeTimeCache.id, TeeTimeCache.is_stale, *slot_columns,
+                *[getattr(TeeTimeCache, c) for c in DIFF_COLUMNS]
+            ).filter(
+                tuple_(TeeTimeCache.course_name, TeeTimeCache.date).in_(list(scopes))
+            )
+        }
 
-        # Step 2: Process new tee times
-        for tee_time in tee_times:
-            # Extract players_available - this might need to be calculated
-            # For now, we'll use a default or extract from restrictions/other fields
-            players_available = getattr(tee_time, 'max_num_players', None) or \
-                               getattr(tee_time, 'available_spots', None) or \
-                               4  # Default to 4 players if not specified
+        inserts, updates = [], []
+        adopted = set()
+        by_scope = Counter()
+        for key, row in rows.items():
+            current = existing.get(key)
+            if current is None and row['course_side']:
+                # Rows from before course_side (migration 0003) have side '';
+                # the first sided slot at that time takes the row over
+                # instead of inserting a duplicate next to it
+                legacy_key = (row['course_name'], '', row['date'], row['start_time'])
+                if legacy_key in existing and legacy_key not in rows and legacy_key not in adopted:
+                    current = existing[legacy_key]
+                    adopted.add(legacy_key)
+            if current is None:
+                inserts.append(row)
+                by_scope[(row['course_name'], row['date'])] += 1
+                continue
+            changed = {c: row[c] for c in DIFF_COLUMNS if getattr(current, c) != row[c]}
+            if current.course_side != row['course_side']:
+                changed['course_side'] = row['course_side']
+            if changed:
+                changed.update(id=current.id,
+                               raw_json_response=row['raw_json_response'],
+                               updated_at=current_time,
+                               last_seen_at=current_time)
+                updates.append(changed)
+                by_scope[(row['course_name'], row['date'])] += 1
+            else:
+                stats.unchanged += 1
 
-            # Check if this exact tee time already exists
-            existing_entry = TeeTimeCache.query.filter_by(
-                course_name=tee_time.course_name,
-                date=tee_time.date,
-                start_time=tee_time.start_time_unf,
-                players_available=players_available).first()
-
-            if existing_entry:
-                # Update existing entry - mark as available and update info
-                existing_entry.is_available = tee_time.is_available
-                existing_entry.green_fee = tee_time.green_fee
-                existing_entry.price = tee_time.price
-                existing_entry.half_cart = getattr(tee_time, 'half_cart', None)
-                existing_entry.subtotal = tee_time.subtotal
-                existing_entry.restrictions = tee_time.restrictions
-                existing_entry.special_offer = getattr(tee_time,
-                                                       'special_offer', False)
-                existing_entry.raw_json_response = getattr(tee_time, 'raw_json_response', None)
-                existing_entry.last_seen_at = current_time
-                existing_entry.updated_at = current_time
+        # Slots no longer offered for a scraped (course, date) are closed
+        closed = []
+        for key, r in existing.items():
+            if key not in rows and key not in adopted and r.is_available:
+                closed.append(r.id)
+                by_scope[(r.course_name, r.date)] += 1
 
-            else:
-                # Create new entry
-                new_entry = TeeTimeCache(
-                    course_name=tee_time.course_name,
-                    date=tee_time.date,
-                    start_time=tee_time.start_time_unf,
-                    players_available=players_available,
-                    holes=tee_time.holes,
-                    booking_url=tee_time.booking_url,
-                    provider=provider or tee_time.provider,
-                    green_fee=tee_time.green_fee,
-                    half_cart=getattr(tee_time, 'half_cart', None),
-                    price=tee_time.price,
-                    subtotal=tee_time.subtotal,
-                    restrictions=tee_time.restrictions,
-                    special_offer=getattr(tee_time, 'special_offer', False),
-                    is_available=tee_time.is_available,
-                    raw_json_response=getattr(tee_time, 'raw_json_response', None),
-                    last_seen_at=current_time)
-                db.session.add(new_entry)
-
-        # Commit all changes
+        # A fresh scrape makes every slot of its scope current again; not a change
+        refreshed = [r.id for r in existing.values() if r.is_stale]
+
+        if inserts:
+            partitions.ensure_partitions({row['date'] for row in inserts})
+            # ON CONFLICT keeps a concurrent writer's insert from failing the batch;
+            # executemany, which SQLAlchemy batches into multi-row INSERTs
+            stmt = _dialect_insert()(TeeTimeCache)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=SLOT_COLUMNS,
+                set_={column: stmt.excluded[column] for column in UPSERT_UPDATE_COLUMNS}
+            )
+            db.session.execute(stmt, inserts)
+        if updates:
+            db.session.bulk_update_mappings(TeeTimeCache, updates)
+        if closed:
+            TeeTimeCache.query.filter(TeeTimeCache.id.in_(closed)).update({
+                TeeTimeCache.is_available: False,
+                TeeTimeCache.updated_at: current_time
+            }, synchronize_session=False)
+        if refreshed:
+            TeeTimeCache.query.filter(TeeTimeCache.id.in_(refreshed)).update({
+                TeeTimeCache.is_stale: False
+            }, synchronize_session=False)
+
+        stats.inserted, stats.updated, stats.closed = len(inserts), len(updates), len(closed)
+        stats.by_scope = dict(by_scope)
         db.session.commit()
-        print(f"Cached {len(tee_times)} tee times successfully")
+        if stats.changed or refreshed:
+            _invalidate_snapshots()
+        print(f"Cached {len(tee_times)} tee times: {stats}")
+        return stats
+
+    @staticmethod
+    def mark_stale(scopes: Iterable[tuple], stale: bool = True) -> int:
+        """
+        Flag (or clear) the cached slots of (course_name, date) pairs whose
+        latest scrape didn't complete. They keep their last known
+        availability instead of being closed.
+
+        Returns:
+            Number of rows whose flag changed
+        """
+        scopes = list(set(scopes))
+        if not scopes:
+            return 0
+        count = TeeTimeCache.query.filter(
+            tuple_(TeeTimeCache.course_name, TeeTimeCache.date).in_(scopes),
+            TeeTimeCache.is_stale != stale
+        ).update({TeeTimeCache.is_stale: stale}, synchronize_session=False)
+        db.session.commit()
+        if count:
+            _invalidate_snapshots()
+        return count
+
+    @staticmethod
+    def _slot_row(tee_time: TeeTime, provider: str, current_time: datetime) -> dict:
+        """Column values for one tee time, as inserted into tee_time_cache"""
+        # Open spots and the smallest bookable party, as the provider reports
+        # them; together they answer every party size from one scrape.
+        # A slot with 0 open spots keeps 0
+        players_available = tee_time.max_num_players
+        if players_available is None:
+            players_available = getattr(tee_time, 'available_spots', None) or \
+                               4  # Default to 4 players if not specified
+
+        return {
+            'course_name': tee_time.course_name,
+            'course_side': tee_time.course_side or '',
+            'date': tee_time.date,
+            'start_time': tee_time.start_time_unf,
+            **misc.temporal_columns(tee_time.date, tee_time.start_time_unf),
+            'players_available': players_available,
+            'min_players': tee_time.min_num_players,
+            'holes': tee_time.holes,
+            'booking_url': tee_time.booking_url,
+            'provider': provider or tee_time.provider,
+            'green_fee': tee_time.green_fee,
+            'half_cart': getattr(tee_time, 'half_cart', None),
+            'price': tee_time.price,
+            'subtotal': tee_time.subtotal,
+            'restrictions': tee_time.restrictions,
+            'special_offer': getattr(tee_time, 'special_offer', False),
+            'is_available': tee_time.is_available,
+            'is_stale': False,
+            'raw_json_response': getattr(tee_time, 'raw_json_response', None),
+            'created_at': current_time,
+            'updated_at': current_time,
+            'last_seen_at': current_time,
+        }
 
     @staticmethod
     def get_cached_tee_times(course_name: str = None,
-                             available_only: bool = True) -> List[dict]:
+                             available_only: bool = True,
+                             fields: List[str] = None) -> List[dict]:
         """
         Retrieve cached tee times with optional filters.
         
@@ -103,45 +299,189 @@ class TeeTimeCacheService:
             course_name: Filter by course name
             date: Filter by date (YYYY-MM-DD format)
             available_only: Only return available tee times
+            fields: to_dict keys to load and return (defaults to the "list" profile)
             
         Returns:
             List of tee time dictionaries
         """
-        query = TeeTimeCache.query
+        fields = fields or TEE_TIME_FIELD_PROFILES['list']
+        query = TeeTimeCacheService._upcoming_query(course_name)\
+            .options(TeeTimeCache.load_only_options(fields))
 
-        if course_name:
-            query = query.filter_by(course_name=course_name)
-        # if current_date:
-        #     query = query.filter(TeeTimeCache.date >= current_date)
-        # if current_time:
-        # mountain time
-        # if available_only:
-        #     query = query.filter_by(is_available=True)
-
-        current_date = misc.current_date()
-
-        cur_time = datetime.now(pytz.timezone('America/Denver'))
-        # For tee times on today's date, filter by current time
-        # For future dates, include all times
-        query = query.filter(
-            or_(
-                TeeTimeCache.date
-                > current_date,  # Future dates - include all times
-                and_(
-                    TeeTimeCache.date == current_date,  # Today's date
-                    TeeTimeCache.start_time
-                    >= cur_time.strftime("%H:%M"),  # Time >= current time
-                    TeeTimeCache.is_available)))
-
-        results = query.order_by(TeeTimeCache.date.asc(),
-                                 TeeTimeCache.start_time.asc()).all()
+        results = query.all()
 
         if results:
             print(f"Found {len(results)} cached tee times")
         else:
             print("No cached tee times found")
 
-        return [result.to_dict() for result in results]
+        return [result.to_dict(fields) for result in results]
+
+    @staticmethod
+    def get_cached_tee_times_page(limit: int,
+                                  cursor: str = None,
+                                  course_name: str = None,
+                                  fields: List[str] = None,
+                                  include_total: bool = False,
+                                  offset: int = None) -> dict:
+        """
+        One keyset page of upcoming cached tee times, ordered by (starts_at, id).
+
+        Args:
+            limit: Page size
+            cursor: next_cursor from the previous page
+            course_name: Filter by course name
+            fields: to_dict keys to load and return (defaults to the "list" profile)
+            include_total: Add the planner's row estimate for the whole result
+            offset: Rows to skip instead of a cursor (deprecated). Only
+                pages that pass one carry the exact total
+
+        Raises:
+            ValueError: If the cursor is malformed, or given with an offset
+        """
+        fields = fields or TEE_TIME_FIELD_PROFILES['list']
+        columns = [TeeTimeCache.starts_at, TeeTimeCache.id]
+        offset_page = offset is not None
+        cursor_values, offset = pagination.page_start(cursor, offset or 0, [int, int])
+
+        query = TeeTimeCacheService._upcoming_query(course_name)\
+            .options(TeeTimeCache.load_only_options(fields))
+        results, has_more = pagination.paginate(query, columns, cursor_values, limit, offset=offset)
+
+        last = results[-1] if results else None
+        return {
+            'tee_times': [result.to_dict(fields) for result in results],
+            'pagination': {
+                # Kept for offset-page clients until the next release; total is
+                # an exact COUNT(*), so every other page skips it
+                'total': query.order_by(None).count() if offset_page else None,
+                'limit': limit,
+                'offset': offset,
+                'has_more': has_more,
+                'next_cursor': pagination.encode_cursor(
+                    [last.starts_at, last.id]) if has_more else None,
+                'total_estimate': pagination.estimated_count(query) if include_total else None
+            }
+        }
+
+    @staticmethod
+    def _upcoming_query(course_name: str = None):
+        """Upcoming tee times, ordered by (starts_at, id)"""
+        query = TeeTimeCache.query
+
+        if course_name:
+            query = query.filter_by(course_name=course_name)
+
+        # Tee times that haven't started yet; on today's date only the ones
+        # still available, on future dates all of them. starts_at >= now is
+        # the one range predicate the (starts_at, id) indexes scan
+        today = misc.course_today()
+        query = query.filter(
+            TeeTimeCache.starts_at >= int(time.time()),
+            or_(TeeTimeCache.tee_date > today,
+                TeeTimeCache.is_available),
+            *_partition_key_range(today))
+
+        return query.order_by(TeeTimeCache.starts_at.asc(),
+                              TeeTimeCache.id.asc())
+
+    @staticmethod
+    def search_tee_times(date_from: str = None,
+                         date_to: str = None,
+                         time_from: str = None,
+                         time_to: str = None,
+                         max_price: float = None,
+                         holes: int = None,
+                         min_spots: int = None,
+                         party_size: int = None,
+                         courses: List[str] = None,
+                         providers: List[str] = None,
+                         special_offer: bool = None,
+                         available_only: bool = True,
+                         sort: str = 'time',
+                         limit: int = 100,
+                         fields: List[str] = None) -> List[dict]:
+        """
+        Search upcoming cached tee times with every filter applied in SQL.
+
+        Args:
+            date_from: Earliest date (YYYY-MM-DD)
+            date_to: Latest date (YYYY-MM-DD)
+            time_from: Earliest start time of day (HH:MM)
+            time_to: Latest start time of day (HH:MM)
+            max_price: Maximum price
+            holes: 9 or 18
+            min_spots: Minimum open spots (players_available)
+            party_size: Only slots a party of this size can book (enough open
+                spots and at least the slot's minimum party)
+            courses: Course names to include
+            providers: Providers to include
+            special_offer: Only (or never) special offers
+            available_only: Only return available tee times
+            sort: One of SEARCH_SORTS, prefix with '-' for descending
+            limit: Maximum number of results
+            fields: to_dict keys to load and return (defaults to the "list" profile)
+
+        Returns:
+            List of tee time dictionaries
+
+        Raises:
+            ValueError: If a date or time filter is malformed
+        """
+        fields = fields or TEE_TIME_FIELD_PROFILES['list']
+        query = TeeTimeCacheService._upcoming_query().order_by(None)\
+            .options(TeeTimeCache.load_only_options(fields))
+
+        if date_from:
+            day = misc.parse_date(date_from)
+            query = query.filter(TeeTimeCache.tee_date >= day, *_partition_key_range(date_from=day))
+        if date_to:
+            day = misc.parse_date(date_to)
+            query = query.filter(TeeTimeCache.tee_date <= day, *_partition_key_range(date_to=day))
+        if time_from:
+            query = query.filter(TeeTimeCache.start_minute >= misc.minute_of_day(time_from))
+        if time_to:
+            query = query.filter(TeeTimeCache.start_minute <= misc.minute_of_day(time_to))
+        if max_price is not None:
+            query = query.filter(TeeTimeCache.price <= max_price)
+        if holes is not None:
+            query = query.filter(_holes_contains(holes))
+        if min_spots is not None:
+            query = query.filter(TeeTimeCache.players_available >= min_spots)
+        if party_size is not None:
+            query = query.filter(
+                TeeTimeCache.players_available >= party_size,
+                func.coalesce(TeeTimeCache.min_players, 1) <= party_size)
+        if courses:
+            query = query.filter(TeeTimeCache.course_name.in_(courses))
+        if providers:
+            query = query.filter(TeeTimeCache.provider.in_(providers))
+        if special_offer is not None:
+            query = query.filter(TeeTimeCache.special_offer == special_offer)
+        if available_only:
+            query = query.filter(TeeTimeCache.is_available == True)
+
+        descending = sort.startswith('-')
+        columns = SEARCH_SORTS[sort.lstrip('-')]
+        query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+
+        results = query.limit(limit).all()
+        return [result.to_dict(fields) for result in results]
+
+    @staticmethod
+    def get_raw_response(tee_time_id: int):
+        """
+        Raw provider payload for one cached tee time.
+
+        Returns:
+            (found, raw_json_response)
+        """
+        row = db.session.query(TeeTimeCache.raw_json_response)\
+            .filter(TeeTimeCache.id == tee_time_id)\
+            .first()
+        if row is None:
+            return False, None
+        return True, row[0]
 
     @staticmethod
     def get_all_cached_tee_times(available_only: bool = True) -> List[dict]:
@@ -157,33 +497,160 @@ class TeeTimeCacheService:
         Returns:
             List of date strings in YYYY-MM-DD format
         """
-        from datetime import date
-        today = date.today().strftime('%Y-%m-%d')
+        distinct_dates = TeeTimeCacheService._available_dates_query().all()
 
+        # Extract date strings from the query result tuples
+        date_list = [date_tuple[0].strftime('%Y-%m-%d') for date_tuple in distinct_dates]
+
+        print(f"Found {len(date_list)} available dates: {date_list}")
+        return date_list
+
+    @staticmethod
+    def _available_dates_query():
+        """Distinct dates (today or later) that still have an available tee time"""
         # Query for distinct dates where tee times are available and date is today or later
-        distinct_dates = db.session.query(TeeTimeCache.date)\
+        today = misc.course_today()
+        return db.session.query(TeeTimeCache.tee_date)\
             .filter(TeeTimeCache.is_available == True)\
-            .filter(TeeTimeCache.date >= today)\
+            .filter(TeeTimeCache.tee_date >= today, *_partition_key_range(today))\
             .distinct()\
-            .order_by(TeeTimeCache.date)\
-            .all()
+            .order_by(TeeTimeCache.tee_date)
 
-        # Extract date strings from the query result tuples
-        date_list = [date_tuple[0] for date_tuple in distinct_dates]
+    @staticmethod
+    def get_fingerprints(keys: List[tuple]) -> dict:
+        """
+        Last ingested response hash for each (provider, course_name, date).
 
-        print(f"Found {len(date_list)} available dates: {date_list}")
-        return date_list
+        Returns:
+            {(provider, course_name, date): content_hash} for the keys that have one
+        """
+        if not keys:
+            return {}
+        rows = ScrapeFingerprint.query.filter(
+            tuple_(ScrapeFingerprint.provider,
+                   ScrapeFingerprint.course_name,
+                   ScrapeFingerprint.date).in_(list(set(keys)))
+        ).all()
+        return {(r.provider, r.course_name, r.date): r.content_hash for r in rows}
+
+    @staticmethod
+    def save_fingerprints(fingerprints: dict):
+        """
+        Record response hashes after their tee times were ingested.
+
+        Args:
+            fingerprints: {(provider, course_name, date): content_hash}
+        """
+        if not fingerprints:
+            return
+        current_time = datetime.utcnow()
+        stmt = _dialect_insert()(ScrapeFingerprint)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['provider', 'course_name', 'date'],
+            set_={'content_hash': stmt.excluded.content_hash,
+                  'updated_at': stmt.excluded.updated_at}
+        )
+        db.session.execute(stmt, [
+            {'provider': provider, 'course_name': course_name, 'date': date,
+             'content_hash': content_hash, 'updated_at': current_time}
+            for (provider, course_name, date), content_hash in fingerprints.items()
+        ])
+        db.session.commit()
 
     @staticmethod
     def cleanup_old_entries(days_old: int = 1):
-        """Remove tee times older than specified days"""
-        cutoff_date = datetime.utcnow().date()
+        """
+        Remove tee times dated before today at the courses.
 
-        old_entries = TeeTimeCache.query.filter(
-            TeeTimeCache.date < cutoff_date.strftime('%Y-%m-%d')).all()
+        On Postgres this drops whole date partitions (and creates the ones
+        coming up); elsewhere it is a single DELETE.
+        """
+        # Course-local: from 18:00 Mountain on, UTC is already on tomorrow
+        # and would drop today's partition with its evening tee times
+        cutoff_date = misc.course_today()
 
-        for entry in old_entries:
-            db.session.delete(entry)
+        if partitions.is_partitioned():
+            # Detaching concurrently waits out open transactions, this session's included
+            db.session.commit()
+            dropped = partitions.drop_partitions_before(cutoff_date)
+            partitions.ensure_partitions()
+            db.session.commit()
+            print(f"Dropped {len(dropped)} old tee time partitions")
+        else:
+            deleted = TeeTimeCache.query.filter(
+                TeeTimeCache.date < cutoff_date.strftime('%Y-%m-%d')
+            ).delete(synchronize_session=False)
+            db.session.commit()
+            print(f"Cleaned up {deleted} old tee time entries")
+
+        _invalidate_snapshots()
+
+
+class TeeTimeSnapshot:
+    """Upcoming cached tee times plus their encoded response bodies"""
+
+    def __init__(self, tee_times: List[dict]):
+        self.tee_times = tee_times
+        self.payload = EncodedPayload.from_data(tee_times)
+        self._course_payloads = {}
+
+    def course_payload(self, course_name: str) -> EncodedPayload:
+        """
+        Encoded body for /api/cached_teetimes/<course_name>, built once per
+        snapshot for configured courses. Any other name in the URL gets an
+        empty body that isn't kept, so made-up paths can't grow the snapshot
+        """
+        payload = self._course_payloads.get(course_name)
+        if payload is None:
+            tee_times = [t for t in self.tee_times if t['course_name'] == course_name] \
+                if course_name in courses else []
+            payload = EncodedPayload.from_data({
+                'course_name': course_name,
+                'count': len(tee_times),
+                'tee_times': tee_times
+            })
+            if course_name in courses:
+                self._course_payloads[course_name] = payload
+        return payload
 
+
+# cache_versions row bumped by every tee_time_cache write
+SNAPSHOT_VERSION_NAME = 'tee_time_cache'
+
+
+def _snapshot_version() -> int:
+    """Shared tee_time_cache write count, as the API processes poll it"""
+    return db.session.query(CacheVersion.version).filter_by(name=SNAPSHOT_VERSION_NAME).scalar() or 0
+
+
+def _invalidate_snapshots():
+    """
+    Drop this process's snapshot and bump the shared version, so processes
+    that didn't make the write (the API, when the scheduler runs elsewhere)
+    drop theirs within SnapshotCache.check_interval. Call after committing
+    """
+    tee_time_snapshots.invalidate()
+    try:
+        stmt = _dialect_insert()(CacheVersion).values(
+            name=SNAPSHOT_VERSION_NAME, version=1, updated_at=datetime.utcnow())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['name'],
+            set_={'version': CacheVersion.version + 1, 'updated_at': stmt.excluded.updated_at})
+        db.session.execute(stmt)
         db.session.commit()
-        print(f"Cleaned up {len(old_entries)} old tee time entries")
+    except Exception:
+        # Other processes still expire their snapshot after max_age
+        logger.exception("Bumping the tee time snapshot version failed")
+        db.session.rollback()
+
+
+# Snapshot behind the cached tee time endpoints; invalidated by every cache
+# write, in this process directly and in the others through the shared
+# version. The 30 minute max age only covers today's tee times aging out.
+tee_time_snapshots = SnapshotCache(
+    lambda: TeeTimeSnapshot(
+        TeeTimeCacheService.get_cached_tee_times(available_only=True)),
+    max_age=30 * 60,
+    shared_version=_snapshot_version,
+    check_interval=5
+)
@@ -1,7 +1,14 @@
+# Outbound request budgets (requests/second, bucket size), see
+# src/scraper/ratelimit.py. Courses on one host share a bucket, so every
+# course of a provider carries the same limit
+CHRONOGOLF_RATE_LIMIT = {"rate": 2, "burst": 4}  # shared by ten courses
+FOREUP_RATE_LIMIT = {"rate": 1, "burst": 2}
+EAGLEWOOD_RATE_LIMIT = {"rate": 1, "burst": 2}
 
 courses = {
     "Bonneville Golf Course": {
         "provider": "chronogolf",
+        "rate_limit": CHRONOGOLF_RATE_LIMIT,
         "config": {
             "version": "marketplaceV2",
             "course_ids": [
@@ -14,6 +21,7 @@ courses = {
     },
     "Glendale Golf Course": {
         "provider": "chronogolf",
+        "rate_limit": CHRONOGOLF_RATE_LIMIT,
         "config": {
             "version": "marketplaceV2",
             "course_ids": [
@@ -26,6 +34,7 @@ courses = {
     },
     "Rose Park Golf Course": {
         "provider": "chronogolf",
+        "rate_limit": CHRONOGOLF_RATE_LIMIT,
         "config": {
             "version": "marketplaceV2",
             "course_ids": [
@@ -38,6 +47,7 @@ courses = {
     },
     "Forest Dale Golf Course": {
         "provider": "chronogolf",
+        "rate_limit": CHRONOGOLF_RATE_LIMIT,
         "config": {
             "version": "marketplaceV2",
             "course_ids": [
@@ -49,6 +59,7 @@ courses = {
     },
     "Nibley Park Golf Course": {
         "provider": "chronogolf",
+        "rate_limit": CHRONOGOLF_RATE_LIMIT,
         "config": {
             "version": "marketplaceV2",
             "course_ids": [
@@ -60,6 +71,7 @@ courses = {
     },
     "River Oaks Golf Course": {
         "provider": "chronogolf",
+        "rate_limit": CHRONOGOLF_RATE_LIMIT,
         "config": {
             "version": "marketplaceV2",
             "course_ids": [
@@ -72,6 +84,7 @@ courses = {
     },
     "Mountain Dell Golf Course": {
         "provider": "chronogolf",
+        "rate_limit": CHRONOGOLF_RATE_LIMIT,
         "config": {
             "version": "marketplaceV2",
             "course_ids": [
@@ -85,6 +98,7 @@ courses = {
     },
     "Old Mill Golf Course": {
         "provider": "chronogolf",
+        "rate_limit": CHRONOGOLF_RATE_LIMIT,
         "config": {
             "version": "marketplaceV1",
             "club_id": "14210",
@@ -95,6 +109,7 @@ courses = {
     },
     "Riverbend Golf Course": {
         "provider": "chronogolf",
+        "rate_limit": CHRONOGOLF_RATE_LIMIT,
         "config": {
             "version": "marketplaceV2",
             "course_ids": [
@@ -107,6 +122,7 @@ courses = {
     },
     "South Mountain Golf Course": {
         "provider": "chronogolf",
+        "rate_limit": CHRONOGOLF_RATE_LIMIT,
         "config": {
             "version": "marketplaceV2",
             "course_ids": [
@@ -119,6 +135,7 @@ courses = {
     },
     "Bountiful Ridge Golf Course": {
         "provider": "foreup",
+        "rate_limit": FOREUP_RATE_LIMIT,
         "config": {
             "version": "v1",
             "access": "public",
@@ -143,6 +160,7 @@ courses = {
     # },
     "Eaglewood Golf Course": {
         "provider": "custom",
+        "rate_limit": EAGLEWOOD_RATE_LIMIT,
         "config": {
             "endpoint_env_var": "EAGLEWOOD_ENDPOINT",
             "booking_url": "https://app.membersports.com/tee-times/15391/18901/0"
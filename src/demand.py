@@ -0,0 +1,110 @@
+"""
+Decaying counters of which (course, date) pairs API clients ask for.
+
+Every hit adds weight to a key; weights halve every HALF_LIFE seconds and
+the tracker keeps at most MAX_KEYS keys, evicting the coldest, so memory
+stays bounded however varied the traffic. A key's course or date may be
+None for "any course" / "any date" (a search across courses, a course page
+with no date). The scrape planner reads weights() as priority multipliers.
+"""
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.util import misc
+
+
+HALF_LIFE = float(os.environ.get("DEMAND_HALF_LIFE_HOURS", 6)) * 3600
+MAX_KEYS = int(os.environ.get("DEMAND_MAX_KEYS", 5000))
+
+# Longest date range a single search spreads its weight over
+MAX_SEARCH_DAYS = 14
+
+Key = Tuple[Optional[str], Optional[str]]  # (course_name, date)
+
+
+class DemandTracker:
+
+    def __init__(self, half_life: float = HALF_LIFE, max_keys: int = MAX_KEYS):
+        self.half_life = half_life
+        self.max_keys = max_keys
+        self._scores: Dict[Key, Tuple[float, float]] = {}  # key -> (score, as of)
+        self._lock = threading.Lock()
+
+    def _decayed(self, score: float, since: float, now: float) -> float:
+        return score * 0.5 ** ((now - since) / self.half_life)
+
+    def record(self, course_name: str = None, date: str = None, weight: float = 1.0):
+        """Count one request for a course and/or date"""
+        self.record_many([(course_name, date)], weight)
+
+    def record_many(self, keys: Iterable[Key], weight: float = 1.0):
+        """Count one request spread evenly over several (course, date) keys"""
+        keys = [key for key in keys if key != (None, None)]
+        if not keys:
+            return
+        now = time.time()
+        share = weight / len(keys)
+        with self._lock:
+            for key in keys:
+                score, since = self._scores.get(key, (0.0, now))
+                self._scores[key] = (self._decayed(score, since, now) + share, now)
+            if len(self._scores) > self.max_keys:
+                self._evict(now)
+
+    def record_search(self, courses: List[str] = None, date_from: str = None, date_to: str = None):
+        """Count one search, spread over its courses x dates (either may be "any")"""
+        if date_from and date_to:
+            start, end = misc.parse_date(date_from), misc.parse_date(date_to)
+            days = min((end - start).days + 1, MAX_SEARCH_DAYS)
+            dates = [(start + timedelta(days=n)).strftime('%Y-%m-%d') for n in range(days)]
+        else:
+            dates = [date_from or date_to]
+        self.record_many([(course, date) for course in (courses or [None]) for date in dates])
+
+    def _evict(self, now: float):
+        # Drop down to 90% of the cap in one pass rather than on every insert
+        keep = int(self.max_keys * 0.9)
+        ranked = sorted(self._scores.items(),
+                        key=lambda item: self._decayed(item[1][0], item[1][1], now),
+                        reverse=True)
+        self._scores = dict(ranked[:keep])
+
+    def score(self, course_name: str = None, date: str = None, now: float = None) -> float:
+        now = now or time.time()
+        entry = self._scores.get((course_name, date))
+        return self._decayed(*entry, now) if entry else 0.0
+
+    def weights(self, pairs: Iterable[Tuple[str, str]], now: float = None) -> Dict[Tuple[str, str], float]:
+        """
+        Demand for each (course, date) relative to the most demanded of them, in [0, 1].
+        Counts exact hits plus hits on the course (any date) and date (any course).
+        """
+        now = now or time.time()
+        with self._lock:
+            scores = {key: self._decayed(score, since, now) for key, (score, since) in self._scores.items()}
+
+        demands = {
+            (course_name, date): scores.get((course_name, date), 0.0) +
+            scores.get((course_name, None), 0.0) +
+            scores.get((None, date), 0.0)
+            for course_name, date in pairs
+        }
+        top = max(demands.values(), default=0.0)
+        return {pair: (value / top if top > 0 else 0.0) for pair, value in demands.items()}
+
+    def top(self, n: int = 20) -> list:
+        """Hottest keys, for inspection"""
+        now = time.time()
+        with self._lock:
+            ranked = sorted(((self._decayed(score, since, now), key)
+                             for key, (score, since) in self._scores.items()),
+                            key=lambda item: item[0], reverse=True)
+        return [{'course_name': key[0], 'date': key[1], 'score': round(score, 3)}
+                for score, key in ranked[:n]]
+
+
+# Shared by the API (writes) and the in-process scrape scheduler (reads)
+demand = DemandTracker()
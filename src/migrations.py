@@ -0,0 +1,288 @@
+"""
+Schema migrations for existing databases.
+
+db.create_all() only creates missing tables, so anything added to a table
+that already exists (indexes, columns, constraint changes) lands here as a
+named migration. Migrations run once, in order, at startup and are recorded
+in schema_migrations. On Postgres an advisory lock serialises workers that
+start together, so each migration runs in one of them only.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from src.util import misc
+
+from src.models import db, TeeTimeCache, RequestLog, SchemaMigration, ScrapeFingerprint
+from src import partitions
+
+
+def _create_indexes(model, names):
+    """Create the named indexes declared on a model, skipping existing ones"""
+    for index in model.__table__.indexes:
+        if index.name in names:
+            index.create(db.engine, checkfirst=True)
+
+
+def _0001_tee_time_cache_read_indexes():
+    """Create the read-path indexes declared on TeeTimeCache"""
+    _create_indexes(TeeTimeCache, {
+        'ix_tee_time_cache_date_start_time',
+        'ix_tee_time_cache_course_date_start_time',
+        'ix_tee_time_cache_available_date_start_time',
+    })
+
+
+def _0002_request_logs_keyset_index():
+    """Index behind keyset pagination of /api/request_logs"""
+    _create_indexes(RequestLog, {'ix_request_logs_datetime_id'})
+
+
+def _column_names(table_name):
+    # Inspect through the session so DDL earlier in the migration is visible
+    return {c['name'] for c in inspect(db.session.connection()).get_columns(table_name)}
+
+
+# Copies of a slot beyond the one to keep: available first, then most recently updated
+_DUPLICATE_SLOT_IDS = """
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY course_name, course_side, date, start_time
+            ORDER BY is_available DESC, updated_at DESC, id DESC
+        ) AS copy
+        FROM {table}
+    ) copies
+    WHERE copy > 1
+"""
+
+# Columns of tee_time_cache before course_side was added
+_TEE_TIME_CACHE_0003_COLUMNS = (
+    'id, course_name, date, start_time, players_available, holes, booking_url, '
+    'provider, green_fee, half_cart, price, subtotal, restrictions, special_offer, '
+    'is_available, raw_json_response, created_at, updated_at, last_seen_at'
+)
+
+
+def _0003_tee_time_cache_stable_slot_identity():
+    """
+    Key slots on (course_name, course_side, date, start_time) instead of
+    players_available, collapsing the rows every booking event left behind
+    """
+    if db.engine.dialect.name == 'sqlite':
+        # SQLite cannot drop a table constraint: rebuild the table. pysqlite
+        # runs DDL outside any transaction, so each step has to be safe to
+        # repeat after a run that stopped part way
+        if 'tee_time_cache_0003' not in inspect(db.session.connection()).get_table_names():
+            if 'course_side' in _column_names('tee_time_cache'):
+                return
+            for index in TeeTimeCache.__table__.indexes:
+                db.session.execute(text(f'DROP INDEX IF EXISTS {index.name}'))
+            db.session.execute(text('ALTER TABLE tee_time_cache RENAME TO tee_time_cache_0003'))
+        # The legacy rows are still all in tee_time_cache_0003; start the copy over
+        db.session.execute(text('DROP TABLE IF EXISTS tee_time_cache'))
+        TeeTimeCache.__table__.create(db.session.connection())
+        legacy = "(SELECT *, '' AS course_side FROM tee_time_cache_0003)"
+        db.session.execute(text(
+            f"INSERT INTO tee_time_cache ({_TEE_TIME_CACHE_0003_COLUMNS}, course_side) "
+            f"SELECT {_TEE_TIME_CACHE_0003_COLUMNS}, '' FROM tee_time_cache_0003 "
+            f"WHERE id NOT IN ({_DUPLICATE_SLOT_IDS.format(table=legacy)})"
+        ))
+        db.session.execute(text('DROP TABLE tee_time_cache_0003'))
+    else:
+        db.session.execute(text(
+            "ALTER TABLE tee_time_cache "
+            "ADD COLUMN IF NOT EXISTS course_side VARCHAR(100) NOT NULL DEFAULT ''"
+        ))
+        db.session.execute(text(
+            f'DELETE FROM tee_time_cache WHERE id IN ({_DUPLICATE_SLOT_IDS.format(table="tee_time_cache")})'
+        ))
+        db.session.execute(text('ALTER TABLE tee_time_cache DROP CONSTRAINT IF EXISTS unique_tee_time_slot'))
+        db.session.execute(text(
+            'ALTER TABLE tee_time_cache ADD CONSTRAINT unique_tee_time_slot '
+            'UNIQUE (course_name, course_side, date, start_time)'
+        ))
+
+    # Re-ingest every (course, date) so slots pick up their course_side
+    ScrapeFingerprint.query.delete()
+
+
+def _0004_tee_time_cache_date_partitions():
+    """
+    Rebuild tee_time_cache on Postgres as a table partitioned by RANGE (date),
+    one partition per tee date, so retention can drop partitions
+    """
+    if db.engine.dialect.name != 'postgresql' or partitions.is_partitioned():
+        return
+
+    def execute(sql):
+        return db.session.execute(text(sql))
+
+    sequence = execute("SELECT pg_get_serial_sequence('tee_time_cache', 'id')").scalar()
+
+    # Move the old table and its constraint/index names out of the way
+    execute('ALTER TABLE tee_time_cache RENAME TO tee_time_cache_0004')
+    execute('ALTER TABLE tee_time_cache_0004 DROP CONSTRAINT IF EXISTS unique_tee_time_slot')
+    execute('ALTER TABLE tee_time_cache_0004 RENAME CONSTRAINT tee_time_cache_pkey TO tee_time_cache_0004_pkey')
+    for index in TeeTimeCache.__table__.indexes:
+        execute(f'DROP INDEX IF EXISTS {index.name}')
+    execute(f'ALTER SEQUENCE {sequence} OWNED BY NONE')
+
+    # Unique constraints on a partitioned table must include the partition key
+    execute('CREATE TABLE tee_time_cache (LIKE tee_time_cache_0004 INCLUDING DEFAULTS) PARTITION BY RANGE (date)')
+    execute('ALTER TABLE tee_time_cache ADD CONSTRAINT tee_time_cache_pkey PRIMARY KEY (id, date)')
+    execute('ALTER TABLE tee_time_cache ADD CONSTRAINT unique_tee_time_slot '
+            'UNIQUE (course_name, course_side, date, start_time)')
+    execute(f'ALTER SEQUENCE {sequence} OWNED BY tee_time_cache.id')
+    columns = _column_names('tee_time_cache')
+    for index in TeeTimeCache.__table__.indexes:
+        # Indexes on columns added by later migrations are created by those
+        if {c.name for c in index.columns} <= columns:
+            index.create(db.session.connection())
+
+    days = execute('SELECT DISTINCT date FROM tee_time_cache_0004').scalars().all()
+    partitions.create_partitions(days)
+    partitions.ensure_partitions()
+
+    execute('INSERT INTO tee_time_cache SELECT * FROM tee_time_cache_0004')
+    execute('DROP TABLE tee_time_cache_0004')
+
+
+def _0005_tee_time_cache_temporal_columns(batch_size=5000):
+    """
+    Add typed tee_date / start_minute / starts_at columns, backfill them
+    from date / start_time, and swap the string-keyed read indexes for ones
+    on starts_at
+    """
+    columns = _column_names('tee_time_cache')
+    for name, sql_type in (('tee_date', 'DATE'), ('start_minute', 'INTEGER'), ('starts_at', 'BIGINT')):
+        if name not in columns:
+            db.session.execute(text(f'ALTER TABLE tee_time_cache ADD COLUMN {name} {sql_type}'))
+
+    last_id = 0
+    while True:
+        rows = db.session.query(TeeTimeCache.id, TeeTimeCache.date, TeeTimeCache.start_time)\
+            .filter(TeeTimeCache.starts_at.is_(None), TeeTimeCache.id > last_id)\
+            .order_by(TeeTimeCache.id)\
+            .limit(batch_size)\
+            .all()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            try:
+                updates.append({'id': row.id, **misc.temporal_columns(row.date, row.start_time)})
+            except ValueError:
+                print(f"Skipping tee time {row.id} with unparseable date/time {row.date} {row.start_time}")
+        db.session.bulk_update_mappings(TeeTimeCache, updates)
+        last_id = rows[-1].id
+
+    for name in ('ix_tee_time_cache_date_start_time', 'ix_tee_time_cache_available_date_start_time'):
+        db.session.execute(text(f'DROP INDEX IF EXISTS {name}'))
+    for index in TeeTimeCache.__table__.indexes:
+        if index.name in {'ix_tee_time_cache_starts_at_id',
+                          'ix_tee_time_cache_course_starts_at_id',
+                          'ix_tee_time_cache_available_tee_date'}:
+            index.create(db.session.connection(), checkfirst=True)
+
+
+def _0006_tee_time_cache_min_players():
+    """Smallest bookable party per slot, for party-size queries"""
+    if 'min_players' not in _column_names('tee_time_cache'):
+        db.session.execute(text('ALTER TABLE tee_time_cache ADD COLUMN min_players INTEGER'))
+    # Re-ingest so existing slots pick up their minimum party
+    ScrapeFingerprint.query.delete()
+
+
+def _0007_request_logs_circuit_state():
+    """Circuit breaker state each provider request was made under"""
+    if 'circuit_state' not in _column_names('request_logs'):
+        db.session.execute(text('ALTER TABLE request_logs ADD COLUMN circuit_state VARCHAR(20)'))
+
+
+def _0008_tee_time_cache_is_stale():
+    """Flag for slots whose latest scrape was cut off or failed"""
+    if 'is_stale' not in _column_names('tee_time_cache'):
+        db.session.execute(text(
+            'ALTER TABLE tee_time_cache ADD COLUMN is_stale BOOLEAN NOT NULL DEFAULT FALSE'))
+
+
+def _0009_tee_time_cache_recheck_start_minutes(batch_size=5000):
+    """
+    Clear the typed columns of slots whose start_time only parsed under
+    0005's lenient parser ("4:30 PM" was stored as 04:30), leaving them
+    NULL like any other unparseable row
+    """
+    last_id = 0
+    while True:
+        rows = db.session.query(TeeTimeCache.id, TeeTimeCache.date, TeeTimeCache.start_time)\
+            .filter(TeeTimeCache.starts_at.isnot(None), TeeTimeCache.id > last_id)\
+            .order_by(TeeTimeCache.id)\
+            .limit(batch_size)\
+            .all()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            try:
+                misc.temporal_columns(row.date, row.start_time)
+            except ValueError:
+                print(f"Clearing tee time {row.id} with unparseable date/time {row.date} {row.start_time}")
+                updates.append({'id': row.id, 'tee_date': None, 'start_minute': None, 'starts_at': None})
+        db.session.bulk_update_mappings(TeeTimeCache, updates)
+        last_id = rows[-1].id
+
+
+# Ordered; never rename or reorder an entry once it has shipped
+MIGRATIONS = [
+    ('0001_tee_time_cache_read_indexes', _0001_tee_time_cache_read_indexes),
+    ('0002_request_logs_keyset_index', _0002_request_logs_keyset_index),
+    ('0003_tee_time_cache_stable_slot_identity', _0003_tee_time_cache_stable_slot_identity),
+    ('0004_tee_time_cache_date_partitions', _0004_tee_time_cache_date_partitions),
+    ('0005_tee_time_cache_temporal_columns', _0005_tee_time_cache_temporal_columns),
+    ('0006_tee_time_cache_min_players', _0006_tee_time_cache_min_players),
+    ('0007_request_logs_circuit_state', _0007_request_logs_circuit_state),
+    ('0008_tee_time_cache_is_stale', _0008_tee_time_cache_is_stale),
+    ('0009_tee_time_cache_recheck_start_minutes', _0009_tee_time_cache_recheck_start_minutes),
+]
+
+
+# pg_advisory_lock key held while migrating; arbitrary, but unique to this app
+MIGRATION_LOCK_ID = 8_245_301
+
+
+@contextmanager
+def _migration_lock():
+    """
+    Hold a Postgres session advisory lock on its own connection, so the
+    lock survives the commits between migrations; a no-op elsewhere
+    """
+    if db.engine.dialect.name != 'postgresql':
+        yield
+        return
+    with db.engine.connect() as connection:
+        connection.execute(text('SELECT pg_advisory_lock(:id)'), {'id': MIGRATION_LOCK_ID})
+        try:
+            yield
+        finally:
+            connection.execute(text('SELECT pg_advisory_unlock(:id)'), {'id': MIGRATION_LOCK_ID})
+
+
+def run_migrations():
+    """Apply every migration not yet recorded in schema_migrations"""
+    with _migration_lock():
+        # Read under the lock: a worker that waited sees what the other applied
+        applied = {m.name for m in SchemaMigration.query.all()}
+
+        for name, migration in MIGRATIONS:
+            if name in applied:
+                continue
+            try:
+                migration()
+                db.session.add(SchemaMigration(name=name, applied_at=datetime.utcnow()))
+                db.session.commit()
+                print(f"Applied migration {name}")
+            except Exception as e:
+                db.session.rollback()
+                print(f"Migration {name} failed: {e}")
+                raise
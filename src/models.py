@@ -1,6 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import UniqueConstraint, Index, false
+from sqlalchemy.orm import load_only, deferred
+from typing import List
 import os
 
 # Initialize SQLAlchemy
@@ -12,11 +14,20 @@ class TeeTimeCache(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     course_name = db.Column(db.String(255), nullable=False)
+    # Sub-course / tee sheet side; '' rather than NULL so it can sit in the
+    # unique slot key
+    course_side = db.Column(db.String(100), nullable=False, default='', server_default='')
     date = db.Column(db.String(10), nullable=False)  # YYYY-MM-DD format
     start_time = db.Column(db.String(25),
                            nullable=False)  # ISO format with timezone
     players_available = db.Column(
         db.Integer, nullable=True)  # Can be null if not specified
+    min_players = db.Column(db.Integer)  # smallest bookable party, null if any
+
+    # Typed copies of date/start_time for range filters, set at ingest
+    tee_date = db.Column(db.Date)
+    start_minute = db.Column(db.Integer)  # minutes since course-local midnight
+    starts_at = db.Column(db.BigInteger)  # UTC epoch seconds
 
     # Additional tee time information
     holes = db.Column(db.JSON)  # Store as JSON array [9, 18]
@@ -31,9 +42,12 @@ class TeeTimeCache(db.Model):
 
     # Availability tracking
     is_available = db.Column(db.Boolean, default=True)
+    # The last scrape of this (course, date) didn't complete; values are from an earlier one
+    is_stale = db.Column(db.Boolean, nullable=False, default=False, server_default=false())
     
     # Raw data storage
-    raw_json_response = db.Column(db.JSON)  # Store the full raw JSON response
+    # Store the full raw JSON response; deferred so only detail reads load it
+    raw_json_response = deferred(db.Column(db.JSON))
 
     # Metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -42,61 +56,152 @@ class TeeTimeCache(db.Model):
                            onupdate=datetime.utcnow)
     last_seen_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    # Compound unique constraint as requested
-    __table_args__ = (UniqueConstraint('course_name',
-                                       'date',
-                                       'start_time',
-                                       'players_available',
-                                       name='unique_tee_time_slot'), )
+    # One row per physical slot, plus the read-path indexes
+    # (created on existing databases by src.migrations)
+    __table_args__ = (
+        UniqueConstraint('course_name',
+                         'course_side',
+                         'date',
+                         'start_time',
+                         name='unique_tee_time_slot'),
+        # get_cached_tee_times / search: range on starts_at, ordered by (starts_at, id)
+        Index('ix_tee_time_cache_starts_at_id', 'starts_at', 'id'),
+        # per-course reads, same ordering
+        Index('ix_tee_time_cache_course_starts_at_id', 'course_name', 'starts_at', 'id'),
+        # ingest: current slots of the scraped (course, date) pairs
+        Index('ix_tee_time_cache_course_date_start_time',
+              'course_name', 'date', 'start_time'),
+        # get_available_dates
+        Index('ix_tee_time_cache_available_tee_date',
+              'tee_date',
+              postgresql_where=(is_available == True),
+              sqlite_where=(is_available == True)),
+    )
 
     def __repr__(self):
         return f'<TeeTimeCache {self.course_name} on {self.date} at {self.start_time}>'
 
-    def to_dict(self):
-        """Convert to dictionary for JSON serialization"""
+    def to_dict(self, fields: List[str] = None):
+        """
+        Convert to dictionary for JSON serialization
+
+        Args:
+            fields: Keys to include (see TEE_TIME_FIELD_PROFILES); all when None.
+                Only the columns behind these keys are read, so rows loaded
+                with load_only(...) never lazy-load raw_json_response.
+        """
         return {
-            'id':
-            self.id,
-            'course_name':
-            self.course_name,
-            'date':
-            self.date,
-            'start_time_unf':
-            self.start_time,
-            'start_time':
-            self.start_time,  # For compatibility with frontend
-            'players_available':
-            self.players_available,
-            'holes':
-            self.holes,
-            'booking_url':
-            self.booking_url,
-            'provider':
-            self.provider,
-            'green_fee':
-            self.green_fee,
-            'half_cart':
-            self.half_cart,
-            'price':
-            self.price,
-            'subtotal':
-            self.subtotal,
-            'restrictions':
-            self.restrictions or [],
-            'special_offer':
-            self.special_offer or False,
-            'is_available':
-            self.is_available,
-            'raw_json_response':
-            self.raw_json_response,
-            'created_at':
-            self.created_at.isoformat() if self.created_at else None,
-            'updated_at':
-            self.updated_at.isoformat() if self.updated_at else None,
-            'last_seen_at':
-            self.last_seen_at.isoformat() if self.last_seen_at else None
+            field: TEE_TIME_SERIALIZERS[field](self)
+            for field in (fields or TEE_TIME_FIELD_PROFILES['detail'])
         }
 
+    @staticmethod
+    def load_only_options(fields: List[str]):
+        """load_only() for exactly the columns the given to_dict fields read"""
+        columns = {TEE_TIME_FIELD_COLUMNS.get(field, field) for field in fields}
+        return load_only(*[getattr(TeeTimeCache, column) for column in sorted(columns | {'id'})])
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+# to_dict key -> value, in response order
+TEE_TIME_SERIALIZERS = {
+    'id': lambda t: t.id,
+    'course_name': lambda t: t.course_name,
+    'course_side': lambda t: t.course_side or None,
+    'date': lambda t: t.date,
+    'start_time_unf': lambda t: t.start_time,
+    'start_time': lambda t: t.start_time,  # For compatibility with frontend
+    'starts_at': lambda t: t.starts_at,
+    'players_available': lambda t: t.players_available,
+    'min_players': lambda t: t.min_players,
+    'holes': lambda t: t.holes,
+    'booking_url': lambda t: t.booking_url,
+    'provider': lambda t: t.provider,
+    'green_fee': lambda t: t.green_fee,
+    'half_cart': lambda t: t.half_cart,
+    'price': lambda t: t.price,
+    'subtotal': lambda t: t.subtotal,
+    'restrictions': lambda t: t.restrictions or [],
+    'special_offer': lambda t: t.special_offer or False,
+    'is_available': lambda t: t.is_available,
+    'is_stale': lambda t: t.is_stale or False,
+    'raw_json_response': lambda t: t.raw_json_response,
+    'created_at': lambda t: _isoformat(t.created_at),
+    'updated_at': lambda t: _isoformat(t.updated_at),
+    'last_seen_at': lambda t: _isoformat(t.last_seen_at),
+}
+
+# to_dict keys whose column has a different name
+TEE_TIME_FIELD_COLUMNS = {
+    'start_time_unf': 'start_time',
+}
+
+# Named projections; "list" never touches the raw provider payload
+TEE_TIME_FIELD_PROFILES = {
+    'list': [f for f in TEE_TIME_SERIALIZERS if f != 'raw_json_response'],
+    'detail': list(TEE_TIME_SERIALIZERS),
+}
+
+
+def resolve_tee_time_fields(spec: str = None, default: str = 'list') -> List[str]:
+    """
+    Turn a ?fields= value into to_dict keys.
+
+    Args:
+        spec: A profile name ("list", "detail") or comma separated keys
+
+    Raises:
+        ValueError: On an unknown profile or key
+    """
+    spec = spec or default
+    if spec in TEE_TIME_FIELD_PROFILES:
+        return TEE_TIME_FIELD_PROFILES[spec]
+
+    fields = [f.strip() for f in spec.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in TEE_TIME_SERIALIZERS]
+    if unknown or not fields:
+        raise ValueError(f"Unknown fields: {', '.join(unknown) or spec}")
+    return fields
+
+
+class ScrapeFingerprint(db.Model):
+    """Hash of the last ingested provider response per (provider, course, date)"""
+    __tablename__ = 'scrape_fingerprints'
+
+    provider = db.Column(db.String(50), primary_key=True)
+    course_name = db.Column(db.String(255), primary_key=True)
+    date = db.Column(db.String(10), primary_key=True)  # YYYY-MM-DD format
+    content_hash = db.Column(db.String(64), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<ScrapeFingerprint {self.provider} {self.course_name} {self.date}>'
+
+
+class CacheVersion(db.Model):
+    """Write counter per cached read, polled by every process holding a snapshot of it"""
+    __tablename__ = 'cache_versions'
+
+    name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<CacheVersion {self.name} {self.version}>'
+
+
+class SchemaMigration(db.Model):
+    __tablename__ = 'schema_migrations'
+
+    name = db.Column(db.String(255), primary_key=True)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<SchemaMigration {self.name}>'
+
 
 class CourseRequest(db.Model):
     __tablename__ = 'course_requests'
@@ -177,6 +282,12 @@ class RequestLog(db.Model):
     is_error = db.Column(db.Boolean, default=False, nullable=False)  # Flag for failed requests
     status_code = db.Column(db.Integer, nullable=True)  # HTTP status code
     duration_ms = db.Column(db.Integer, nullable=True)  # Request duration in milliseconds
+    circuit_state = db.Column(db.String(20), nullable=True)  # Course's circuit breaker: closed, half_open, open
+
+    # Keyset pagination order for /api/request_logs
+    __table_args__ = (
+        Index('ix_request_logs_datetime_id', 'datetime', 'id'),
+    )
 
     def __repr__(self):
         return f'<RequestLog {self.id} {self.provider} {self.datetime}>'
@@ -193,7 +304,8 @@ class RequestLog(db.Model):
             'error': self.error,
             'is_error': self.is_error,
             'status_code': self.status_code,
-            'duration_ms': self.duration_ms
+            'duration_ms': self.duration_ms,
+            'circuit_state': self.circuit_state
         }
 
 
@@ -212,6 +324,13 @@ def init_db(app):
         db.create_all()
         print("Database tables created successfully!")
 
+        from src.migrations import run_migrations
+        run_migrations()
+
+        from src.partitions import ensure_partitions
+        ensure_partitions()
+        db.session.commit()
+
 
 if __name__ == "__main__":
     from flask import Flask
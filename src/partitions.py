@@ -0,0 +1,150 @@
+"""
+Daily range partitions of tee_time_cache on Postgres.
+
+Migration 0004 turns tee_time_cache into a table partitioned by RANGE (date),
+one partition per tee date named tee_time_cache_pYYYYMMDD. Partitions are
+created ahead of time (and on demand for any date being ingested), and
+retention detaches whole partitions (concurrently, so reads of the parent
+never queue behind it) and drops them instead of deleting rows. Reads only
+prune partitions when they bound the varchar date column itself (see
+TeeTimeCacheService). Other databases keep a single plain table; every
+function here is a no-op for them.
+"""
+import os
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Set
+
+from sqlalchemy import text
+
+from src.models import db
+from src.util import misc
+
+
+PARENT_TABLE = 'tee_time_cache'
+PARTITION_PREFIX = f'{PARENT_TABLE}_p'
+
+# Partitions created past today, comfortably beyond the scrape horizon
+PARTITION_DAYS_AHEAD = int(os.environ.get('TEE_TIME_PARTITION_DAYS_AHEAD', 21))
+
+# Partitions this process has seen exist, so ingest does not hit the catalog.
+# Retention in another process can drop the ones before today, so those are
+# always re-checked (see _known)
+_known_partitions: Set[str] = set()
+
+
+def _known(day: date) -> bool:
+    """Whether day's partition is known to exist without asking the catalog"""
+    return day >= misc.course_today() and partition_name(day) in _known_partitions
+
+
+def is_partitioned() -> bool:
+    """Whether tee_time_cache is a partitioned table on this database"""
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    return db.session.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :table AND c.relnamespace = current_schema()::regnamespace)"
+    ), {'table': PARENT_TABLE}).scalar()
+
+
+def partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day.strftime('%Y%m%d')}"
+
+
+def _as_date(value) -> date:
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+_PARTITIONS_SQL = text(
+    "SELECT c.relname, i.inhdetachpending FROM pg_inherits i "
+    "JOIN pg_class c ON c.oid = i.inhrelid "
+    "JOIN pg_class p ON p.oid = i.inhparent "
+    "WHERE p.relname = :table AND p.relnamespace = current_schema()::regnamespace "
+    "ORDER BY c.relname"
+)
+
+
+def list_partitions() -> List[str]:
+    """Names of the existing tee_time_cache partitions, oldest first"""
+    rows = db.session.execute(_PARTITIONS_SQL, {'table': PARENT_TABLE}).all()
+    return [row.relname for row in rows]
+
+
+def create_partitions(days: Iterable) -> List[str]:
+    """
+    Create the daily partitions for the given tee dates if they do not exist.
+    Runs in the caller's transaction; the caller commits.
+
+    Args:
+        days: dates or YYYY-MM-DD strings
+
+    Returns:
+        Names of the partitions created
+    """
+    created = []
+    for day in sorted({_as_date(d) for d in days}):
+        name = partition_name(day)
+        if _known(day):
+            continue
+        exists = db.session.execute(
+            text("SELECT to_regclass(:name) IS NOT NULL"), {'name': name}).scalar()
+        if not exists:
+            db.session.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+            ))
+            created.append(name)
+        _known_partitions.add(name)
+    return created
+
+
+def ensure_partitions(days: Iterable = None) -> List[str]:
+    """
+    Make sure partitions exist for the given tee dates, or for today (at the
+    courses) through PARTITION_DAYS_AHEAD when none are given.
+
+    Returns:
+        Names of the partitions created
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return []
+    if days is None:
+        today = misc.course_today()
+        days = [today + timedelta(days=n) for n in range(PARTITION_DAYS_AHEAD + 1)]
+    days = [d for d in days if not _known(_as_date(d))]
+    if not days or not is_partitioned():
+        return []
+    return create_partitions(days)
+
+
+def drop_partitions_before(cutoff) -> List[str]:
+    """
+    Drop every partition holding only tee dates before cutoff.
+
+    Each partition is first detached with DETACH PARTITION ... CONCURRENTLY,
+    which never takes an ACCESS EXCLUSIVE lock on tee_time_cache, so reads
+    keep flowing; only the detached table is then dropped. That can't run
+    inside a transaction block, so this uses its own autocommit connection:
+    the caller must not hold an open transaction that has read tee_time_cache
+    (the detach would wait for it). A detach interrupted on an earlier run is
+    finalized.
+
+    Returns:
+        Names of the partitions dropped
+    """
+    cutoff_name = partition_name(_as_date(cutoff))
+    dropped = []
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for name, detach_pending in conn.execute(_PARTITIONS_SQL, {'table': PARENT_TABLE}).all():
+            # pYYYYMMDD names sort chronologically
+            if not name.startswith(PARTITION_PREFIX) or name >= cutoff_name:
+                continue
+            mode = 'FINALIZE' if detach_pending else 'CONCURRENTLY'
+            conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name} {mode}"))
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            _known_partitions.discard(name)
+            dropped.append(name)
+    return dropped
@@ -1,14 +1,138 @@
 """
 Request logging service for tracking all external API calls to tee time providers.
 """
+import asyncio
+import atexit
+import os
+import queue
+import threading
 import time
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from src.models import RequestLog, db
 
 
+# Circuit breaker state of the course being fetched; set by the scrape engine
+# around each fetch so provider adapters' logs record it without passing it down
+current_circuit_state: ContextVar[Optional[str]] = ContextVar('current_circuit_state', default=None)
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+class RequestLogSink:
+    """
+    Background writer for RequestLog rows.
+
+    Entries go into a bounded queue and a daemon thread writes them in
+    multi-row INSERTs, flushing whenever batch_size entries are waiting or
+    flush_interval seconds have passed. When the queue is full, "drop"
+    discards the new entry and "block" waits up to block_timeout seconds
+    for room before discarding it. Callers on a running event loop (the
+    scrape engine's adapters) always drop, since waiting there would stall
+    every fetch in flight.
+    """
+
+    def __init__(self,
+                 app,
+                 max_queue: int = None,
+                 batch_size: int = None,
+                 flush_interval: float = None,
+                 overflow: str = None,
+                 block_timeout: float = 1.0):
+        self.app = app
+        self.batch_size = batch_size or int(os.environ.get('REQUEST_LOG_BATCH_SIZE', 200))
+        self.flush_interval = flush_interval or float(os.environ.get('REQUEST_LOG_FLUSH_SECONDS', 2))
+        self.overflow = overflow or os.environ.get('REQUEST_LOG_OVERFLOW', 'drop')
+        self.block_timeout = block_timeout
+        self.queue = queue.Queue(maxsize=max_queue or int(os.environ.get('REQUEST_LOG_QUEUE_SIZE', 10000)))
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> 'RequestLogSink':
+        self._thread = threading.Thread(target=self._run, name='request-log-sink', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        return self
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+    def put(self, entry: Dict[str, Any]) -> bool:
+        """Queue one RequestLog row; False if it was dropped"""
+        try:
+            if self.overflow == 'block' and not _on_event_loop():
+                self.queue.put(entry, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the writer and flush everything still queued"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (self._stop.is_set() and self.queue.empty()):
+                break
+            try:
+                batch.append(self.queue.get(timeout=min(remaining, 0.25)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        with self.app.app_context():
+            try:
+                db.session.execute(RequestLog.__table__.insert(), batch)
+                db.session.commit()
+                self.written += len(batch)
+            except Exception as e:
+                # Don't let logging errors break the main application
+                print(f"Error writing {len(batch)} request logs: {e}")
+                self.failed += len(batch)
+                db.session.rollback()
+
+    def _run(self) -> None:
+        while not (self._stop.is_set() and self.queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+
+
 class RequestLogger:
     """Service for logging all external API requests to tee time providers"""
+
+    # Set by start_sink(); without it every log is written synchronously
+    sink: Optional[RequestLogSink] = None
+
+    @staticmethod
+    def start_sink(app, **kwargs) -> RequestLogSink:
+        """Move request log writes off the provider call path"""
+        RequestLogger.sink = RequestLogSink(app, **kwargs).start()
+        return RequestLogger.sink
     
     @staticmethod
     def log_request(
@@ -19,7 +143,8 @@ class RequestLogger:
         error: Optional[str] = None,
         is_error: bool = False,
         status_code: Optional[int] = None,
-        duration_ms: Optional[int] = None
+        duration_ms: Optional[int] = None,
+        circuit_state: Optional[str] = None
     ) -> None:
         """
         Log an API request to the database
@@ -33,25 +158,36 @@ class RequestLogger:
             is_error: Boolean flag indicating if request failed
             status_code: HTTP status code (optional)
             duration_ms: Request duration in milliseconds (optional)
+            circuit_state: Course's circuit breaker state (defaults to the
+                state the engine set for the current fetch)
         """
         # Skip logging if running in standalone mode
         import os
         if os.environ.get('STANDALONE_MODE'):
             return
             
+        entry = {
+            'datetime': datetime.utcnow(),
+            'course': course,
+            'provider': provider,
+            'endpoint': endpoint,
+            'response': response,
+            'error': error,
+            'is_error': is_error,
+            'status_code': status_code,
+            'duration_ms': duration_ms,
+            'circuit_state': circuit_state or current_circuit_state.get()
+        }
+
+        # Hand off to the background writer when it's running
+        sink = RequestLogger.sink
+        if sink is not None and sink.running:
+            sink.put(entry)
+            return
+
         try:
             # Create the log entry
-            log_entry = RequestLog(
-                datetime=datetime.utcnow(),
-                course=course,
-                provider=provider,
-                endpoint=endpoint,
-                response=response,
-                error=error,
-                is_error=is_error,
-                status_code=status_code,
-                duration_ms=duration_ms
-            )
+            log_entry = RequestLog(**entry)
             
             # Save to database
             db.session.add(log_entry)
@@ -1,7 +1,6 @@
 import requests
 import os
 import json
-import subprocess
 from pydantic import ValidationError
 
 from src.config import courses as CONFIG
@@ -10,8 +9,10 @@ from src._typing.structs import (
     TeeTime, 
     TeeTimeParameter,
     Course,
+    FetchResult,
 )
 from src.misc import request_builder
+from src.scraper import transport
 from src.request_logger import RequestLogger, RequestTimer
 import traceback
 
@@ -28,18 +29,28 @@ class CourseAPI:
 
 class V1(CourseAPI):
 
-    def __init__(self, course: Course, log=True):
+    def __init__(self, course: Course, log=True, transport=None):
         super().__init__(course)
         self.LOG = log
+        self.transport = transport
 
     # def convert_start_time_to
 
 
-    def get_tee_time_from_response(self, r):
+    def get_tee_time_from_response(self, r, num_players: int = None):
         """
             r: response_tee_time
+            num_players: party size the sheet was requested for; every returned
+                slot has at least that many open spots
         """
 
+        # Open spots and minimum party when the slot reports them, otherwise
+        # the requested party size is the only guarantee we have
+        max_num_players = r.get('available_spots', r.get('max_player_size'))
+        if max_num_players is None:
+            max_num_players = num_players
+        min_num_players = r.get('min_player_size')
+
         # Extract pricing information
         is_available = False
         green_fees = r.get('green_fees', [])
@@ -52,6 +63,7 @@ class V1(CourseAPI):
             start_time_unf = r.get('start_time'),
             date = r.get('date'),
             course_name = self.course.name,
+            course_side = str(r['course_id']) if r.get('course_id') else None,
             holes = [18], # r.get('hole')
             restrictions = r.get('restrictions'),
             provider = self.course_config.get("provider", ""),
@@ -60,7 +72,9 @@ class V1(CourseAPI):
             green_fee = fee_info.get('green_fee', 0),
             price = fee_info.get('price', 0),
             half_cart = fee_info.get('half_cart_price', 0),
-            subtotal = fee_info.get('subtotal', 0)
+            subtotal = fee_info.get('subtotal', 0),
+            min_num_players = min_num_players,
+            max_num_players = max_num_players
         )
 
 
@@ -70,7 +84,8 @@ class V1(CourseAPI):
             try:
                 response = requests.get(
                     tee_time_parameter.endpoint,
-                    headers = tee_time_parameter.headers
+                    headers = tee_time_parameter.headers,
+                    timeout = transport.call_timeout()
                 )
 
                 response.raise_for_status()
@@ -109,39 +124,31 @@ class V1(CourseAPI):
                 raise
 
 
-    def _hit_endpoint_with_curl(self, tee_time_parameter: TeeTimeParameter):
+    async def _hit_endpoint(self, tee_time_parameter: TeeTimeParameter):
         with RequestTimer() as timer:
             try:
-                cmd = request_builder.cg_v1(tee_time_parameter)
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+                request = transport.parse_curl(request_builder.cg_v1(tee_time_parameter))
+                response = await self.transport.request(request, course_name=self.course.name)
+                response.raise_for_status(provider="chronogolf_v1")
 
-                if result.returncode != 0:
-                    error_msg = f"Curl command failed: {result.stderr}"
-                    RequestLogger.log_error(
+                data = response.json()
+
+                # Log successful request
+                if self.LOG:
+                    RequestLogger.log_success(
                         provider="chronogolf_v1",
                         endpoint=tee_time_parameter.endpoint,
-                        error=error_msg,
+                        response=data,
                         course=self.course.name,
+                        status_code=response.status,
                         duration_ms=timer.get_duration()
                     )
-                    raise Exception(error_msg)
-
-                data = json.loads(result.stdout)
-
-                # Log successful request
-                RequestLogger.log_success(
-                    provider="chronogolf_v1",
-                    endpoint=tee_time_parameter.endpoint,
-                    response=data,
-                    course=self.course.name,
-                    duration_ms=timer.get_duration()
-                )
 
                 return data
 
             except Exception as e:
-                if "json.loads" in str(e):
-                    error_msg = f"Invalid JSON response: {result.stdout[:200] if 'result' in locals() else 'Unknown'}"
+                if isinstance(e, json.JSONDecodeError):
+                    error_msg = f"Invalid JSON response: {response.body[:200]}"
                 else:
                     error_msg = str(str(traceback.format_exc()))
 
@@ -151,27 +158,44 @@ class V1(CourseAPI):
                         endpoint=tee_time_parameter.endpoint,
                         error=error_msg,
                         course=self.course.name,
+                        status_code=getattr(e, 'status_code', None),
                         duration_ms=timer.get_duration()
                     )
                 raise
 
 
-    def get_tee_times(self, tee_time_parameter: TeeTimeParameter) -> List[TeeTime]: #  
-        tee_times = []
+    async def fetch(self, tee_time_parameter: TeeTimeParameter, previous_hash: str = None) -> FetchResult:
+        response = await self._hit_endpoint(tee_time_parameter)
+
+        # Same payload as last scrape: skip parsing entirely
+        response_hash = transport.content_hash(response)
+        if response_hash == previous_hash:
+            return FetchResult(content_hash=response_hash, unchanged=True)
 
-        response = self._hit_endpoint_with_curl(tee_time_parameter)
+        tee_times = []
         for resp_tee_time in response:
-            tee_times.append(self.get_tee_time_from_response(resp_tee_time))
+            tee_time = self.get_tee_time_from_response(resp_tee_time, tee_time_parameter.num_players)
+            if tee_time is not None:
+                tee_times.append(tee_time)
+
+        return FetchResult(tee_times=tee_times, content_hash=response_hash)
+
 
-        return tee_times
+    async def fetch_tee_times(self, tee_time_parameter: TeeTimeParameter) -> List[TeeTime]:
+        return (await self.fetch(tee_time_parameter)).tee_times
+
+
+    def get_tee_times(self, tee_time_parameter: TeeTimeParameter) -> List[TeeTime]: #  
+        return transport.run_sync(self, self.fetch_tee_times, tee_time_parameter)
 
 
 
 class V2(CourseAPI):
 
-    def __init__(self, course: Course, log=True):
+    def __init__(self, course: Course, log=True, transport=None):
         super().__init__(course)
         self.LOG = log
+        self.transport = transport
 
 
     def get_tee_time_from_response(self, r):
@@ -205,6 +229,7 @@ class V2(CourseAPI):
             "start_time_unf": response_data.get("start_time"),
             "date": response_data.get("date"),
             "course_name": self.course.name,
+            "course_side": str(course_info["id"]) if course_info.get("id") else None,
             "booking_url": self.course.booking_url,
             "holes": [price_info.get("bookable_holes", course_info.get("holes", 18))],
             "special_offer": response_data.get("has_deal", False),
@@ -215,6 +240,8 @@ class V2(CourseAPI):
             "price": price_info.get("subtotal", 0.0),  # Using subtotal as the main price
             "half_cart": price_info.get("half_cart", 0.0),
             "subtotal": price_info.get("subtotal", 0.0),
+            "min_num_players": min_players,
+            "max_num_players": response_data.get("max_player_size"),
             "raw_json_response": response_data
         }
         # print(tee_time_data)
@@ -230,7 +257,8 @@ class V2(CourseAPI):
             try:
                 response = requests.get(
                     tee_time_parameter.endpoint,
-                    headers = tee_time_parameter.headers
+                    headers = tee_time_parameter.headers,
+                    timeout = transport.call_timeout()
                 )
 
                 response.raise_for_status()
@@ -270,26 +298,14 @@ class V2(CourseAPI):
                 raise
 
 
-    def _hit_endpoint_with_curl(self, tee_time_parameter: TeeTimeParameter):
+    async def _hit_endpoint(self, tee_time_parameter: TeeTimeParameter):
         with RequestTimer() as timer:
             try:
-                cmd = request_builder.cg_v2(tee_time_parameter)
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-
-                if result.returncode != 0:
-                    error_msg = f"Curl command failed: {result.stderr}"
-
-                    if self.LOG:
-                        RequestLogger.log_error(
-                            provider="chronogolf_v2",
-                            endpoint=tee_time_parameter.endpoint,
-                            error=error_msg,
-                            course=self.course.name,
-                            duration_ms=timer.get_duration()
-                        )
-                    raise Exception(error_msg)
-
-                data = json.loads(result.stdout)
+                request = transport.parse_curl(request_builder.cg_v2(tee_time_parameter))
+                response = await self.transport.request(request, course_name=self.course.name)
+                response.raise_for_status(provider="chronogolf_v2")
+
+                data = response.json()
                 tee_times_data = data.get("teetimes", [])
 
                 # Log successful request
@@ -299,14 +315,15 @@ class V2(CourseAPI):
                         endpoint=tee_time_parameter.endpoint,
                         response=data,
                         course=self.course.name,
+                        status_code=response.status,
                         duration_ms=timer.get_duration()
                     )
 
                 return tee_times_data
 
             except Exception as e:
-                if "json.loads" in str(e):
-                    error_msg = f"Invalid JSON response: {result.stdout[:200] if 'result' in locals() else 'Unknown'}"
+                if isinstance(e, json.JSONDecodeError):
+                    error_msg = f"Invalid JSON response: {response.body[:200]}"
                 else:
                     error_msg = str(traceback.format_exc())
                 if self.LOG:
@@ -315,16 +332,32 @@ class V2(CourseAPI):
                         endpoint=tee_time_parameter.endpoint,
                         error=error_msg,
                         course=self.course.name,
+                        status_code=getattr(e, 'status_code', None),
                         duration_ms=timer.get_duration()
                     )
                 raise
 
 
-    def get_tee_times(self, tee_time_parameter: TeeTimeParameter) -> List[TeeTime]:
-        tee_times = []
+    async def fetch(self, tee_time_parameter: TeeTimeParameter, previous_hash: str = None) -> FetchResult:
+        response = await self._hit_endpoint(tee_time_parameter)
+
+        # Same payload as last scrape: skip parsing entirely
+        response_hash = transport.content_hash(response)
+        if response_hash == previous_hash:
+            return FetchResult(content_hash=response_hash, unchanged=True)
 
-        response = self._hit_endpoint_with_curl(tee_time_parameter)
+        tee_times = []
         for resp_tee_time in response:
-            tee_times.append(self.get_tee_time_from_response(resp_tee_time))
+            tee_time = self.get_tee_time_from_response(resp_tee_time)
+            if tee_time is not None:
+                tee_times.append(tee_time)
+
+        return FetchResult(tee_times=tee_times, content_hash=response_hash)
 
-        return tee_times
+
+    async def fetch_tee_times(self, tee_time_parameter: TeeTimeParameter) -> List[TeeTime]:
+        return (await self.fetch(tee_time_parameter)).tee_times
+
+
+    def get_tee_times(self, tee_time_parameter: TeeTimeParameter) -> List[TeeTime]:
+        return transport.run_sync(self, self.fetch_tee_times, tee_time_parameter)
@@ -3,22 +3,24 @@ import json
 from datetime import date, datetime, timedelta
 from typing import List, Dict, Any, Optional
 import os
-import subprocess
 from src.config import courses as CONFIG
 from datetime import datetime, timedelta
 from src._typing.structs import (
     TeeTime, 
     TeeTimeParameter,
     Course,
+    FetchResult,
 )
 from src.misc import request_builder
+from src.scraper import transport
 from src.request_logger import RequestLogger, RequestTimer
 
 
 class Eaglewood:
 
-    def __init__(self, course: Course):
+    def __init__(self, course: Course, transport=None):
         self.course = course
+        self.transport = transport
         # self.course_config = CONFIG[self.course.name]
         # self.sub_config = self.course_config["config"]
         # self.endpoint = os.environ[self.sub_config["endpoint_env_var"]]
@@ -60,6 +62,7 @@ class Eaglewood:
             start_time_unf = self.convert_time(r.get("teeTime")),
             date = self.tee_time_parameter.date,
             course_name = self.course.name,
+            course_side = "Back Nine" if is_back_nine_only else None,
             booking_url = self.course.booking_url,
             holes = holes,
             provider="membersports",
@@ -73,24 +76,14 @@ class Eaglewood:
         )
 
 
-    def _hit_endpoint_with_curl(self) -> dict:
+    async def _hit_endpoint(self) -> dict:
         with RequestTimer() as timer:
             try:
-                cmd = request_builder.ew_curl(self.tee_time_parameter)
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-                
-                if result.returncode != 0:
-                    error_msg = f"Curl command failed: {result.stderr}"
-                    RequestLogger.log_error(
-                        provider="eaglewood",
-                        endpoint=self.tee_time_parameter.endpoint,
-                        error=error_msg,
-                        course=self.course.name,
-                        duration_ms=timer.get_duration()
-                    )
-                    raise Exception(error_msg)
-                
-                data = json.loads(result.stdout)
+                request = transport.parse_curl(request_builder.ew_curl(self.tee_time_parameter))
+                response = await self.transport.request(request, course_name=self.course.name)
+                response.raise_for_status(provider="eaglewood")
+
+                data = response.json()
                 
                 # Log successful request
                 RequestLogger.log_success(
@@ -98,14 +91,15 @@ class Eaglewood:
                     endpoint=self.tee_time_parameter.endpoint,
                     response=data,
                     course=self.course.name,
+                    status_code=response.status,
                     duration_ms=timer.get_duration()
                 )
                 
                 return data
                 
             except Exception as e:
-                if "json.loads" in str(e):
-                    error_msg = f"Invalid JSON response: {result.stdout[:200] if 'result' in locals() else 'Unknown'}"
+                if isinstance(e, json.JSONDecodeError):
+                    error_msg = f"Invalid JSON response: {response.body[:200]}"
                 else:
                     error_msg = str(e)
                     
@@ -114,6 +108,7 @@ class Eaglewood:
                     endpoint=self.tee_time_parameter.endpoint,
                     error=error_msg,
                     course=self.course.name,
+                    status_code=getattr(e, 'status_code', None),
                     duration_ms=timer.get_duration()
                 )
                 raise
@@ -125,16 +120,20 @@ class Eaglewood:
         #         tee_time_specs = tee_time_specs[0]
 
 
-    def get_tee_times(self, tee_time_parameter):
+    async def fetch(self, tee_time_parameter, previous_hash: str = None) -> FetchResult:
 
         self.tee_time_parameter = tee_time_parameter
 
-        tee_times = []
+        response = await self._hit_endpoint()
 
-        response = self._hit_endpoint_with_curl()
+        # Same payload as last scrape: skip parsing entirely
+        response_hash = transport.content_hash(response)
+        if response_hash == previous_hash:
+            return FetchResult(content_hash=response_hash, unchanged=True)
+
+        tee_times = []
 
         for resp_tee_time in response:
-            print(resp_tee_time)
             resp_tee_time_specs = resp_tee_time.get("items")
             if resp_tee_time_specs:
                 tee_times.append(
@@ -143,4 +142,12 @@ class Eaglewood:
                     )
                 )
 
-        return tee_times
+        return FetchResult(tee_times=tee_times, content_hash=response_hash)
+
+
+    async def fetch_tee_times(self, tee_time_parameter):
+        return (await self.fetch(tee_time_parameter)).tee_times
+
+
+    def get_tee_times(self, tee_time_parameter):
+        return transport.run_sync(self, self.fetch_tee_times, tee_time_parameter)
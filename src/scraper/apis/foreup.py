@@ -1,23 +1,24 @@
 import requests
-import json
 from datetime import date, datetime, timedelta
 from typing import List, Dict, Any, Optional
 from urllib.parse import urlencode
 import os
-import subprocess
 from src._typing.structs import (
     TeeTime, 
     TeeTimeParameter,
     Course,
+    FetchResult,
 )
 from src.misc import request_builder
+from src.scraper import transport
 
 
 class Foreup:
 
-    def __init__(self, course):
+    def __init__(self, course, transport=None):
         self.course = course
         self.course_name = self.course.name
+        self.transport = transport
 
 
     def get_tee_time_from_response(self, r):
@@ -132,6 +133,7 @@ class Foreup:
             start_time_unf = time,
             date = date,
             course_name = self.course.name,
+            course_side = r.get("teesheet_side_name") or None,
             booking_url = self.course.booking_url,
             holes = holes,
             provider="foreup",
@@ -145,25 +147,31 @@ class Foreup:
         )
 
 
-    def _hit_endpoint_with_curl(self) -> dict:
+    async def _hit_endpoint(self) -> dict:
         if self.course.name == "Stonebridge Golf Club":
             cmd = request_builder.ew_curl(self.tee_time_parameter)
         elif self.course.name == "Bountiful Ridge Golf Course":
             cmd = request_builder.stonebridge_curl(self.tee_time_parameter)
 
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+        response = await self.transport.request(transport.parse_curl(cmd), course_name=self.course.name)
+        response.raise_for_status(provider="foreup")
 
-        data = json.loads(result.stdout)
+        data = response.json()
         return data
 
 
-    def get_tee_times(self, tee_time_parameter):
+    async def fetch(self, tee_time_parameter, previous_hash: str = None) -> FetchResult:
 
         self.tee_time_parameter = tee_time_parameter
 
-        tee_times = []
+        response = await self._hit_endpoint()
 
-        response = self._hit_endpoint_with_curl()
+        # Same payload as last scrape: skip parsing entirely
+        response_hash = transport.content_hash(response)
+        if response_hash == previous_hash:
+            return FetchResult(content_hash=response_hash, unchanged=True)
+
+        tee_times = []
 
         for resp_tee_time in response:
             tee_times.append(
@@ -172,4 +180,12 @@ class Foreup:
                 )
             )
 
-        return tee_times
+        return FetchResult(tee_times=tee_times, content_hash=response_hash)
+
+
+    async def fetch_tee_times(self, tee_time_parameter):
+        return (await self.fetch(tee_time_parameter)).tee_times
+
+
+    def get_tee_times(self, tee_time_parameter):
+        return transport.run_sync(self, self.fetch_tee_times, tee_time_parameter)
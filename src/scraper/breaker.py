@@ -0,0 +1,159 @@
+"""
+    Circuit breakers per (provider, course).
+
+    A course whose endpoint keeps failing (timeouts, 5xx, garbage) would
+    otherwise cost a full request timeout on every task of every run. After
+    FAILURE_THRESHOLD consecutive failed fetches its breaker opens and the
+    engine skips the course outright for a cooldown that doubles each time
+    the breaker re-opens, from BASE_COOLDOWN up to MAX_COOLDOWN. Once the
+    cooldown has passed a single fetch is let through as a half-open probe:
+    success closes the breaker, failure re-opens it for the next, longer
+    cooldown.
+
+        closed --N failures--> open --cooldown--> half_open --ok--> closed
+                                 ^                    |
+                                 +------failure-------+
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+
+FAILURE_THRESHOLD = int(os.environ.get("SCRAPE_BREAKER_FAILURES", 3))
+BASE_COOLDOWN = float(os.environ.get("SCRAPE_BREAKER_COOLDOWN_SECONDS", 300))
+MAX_COOLDOWN = float(os.environ.get("SCRAPE_BREAKER_MAX_COOLDOWN_HOURS", 6)) * 3600
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+Key = Tuple[str, str]  # (provider, course_name)
+
+
+@dataclass
+class CircuitBreaker:
+    state: str = CLOSED
+    failures: int = 0  # consecutive, while closed
+    trips: int = 0  # consecutive openings; sets the cooldown
+    opened_at: Optional[float] = None
+    retry_at: Optional[float] = None  # when the next half-open probe may go out
+    skipped: int = 0  # fetches skipped since the breaker last closed
+
+    def cooldown(self) -> float:
+        return min(MAX_COOLDOWN, BASE_COOLDOWN * 2 ** max(0, self.trips - 1))
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self.trips += 1
+        self.opened_at = now
+        self.retry_at = now + self.cooldown()
+
+
+class BreakerBoard:
+    """Every course's breaker; thread safe, shared by every engine run in the process"""
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD):
+        self.failure_threshold = failure_threshold
+        self._breakers: Dict[Key, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: Key) -> CircuitBreaker:
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker()
+        return breaker
+
+    def state(self, key: Key) -> str:
+        with self._lock:
+            breaker = self._breakers.get(key)
+            return breaker.state if breaker else CLOSED
+
+    def blocked(self, key: Key, now: float = None) -> bool:
+        """Whether a fetch would be skipped right now; takes no probe"""
+        now = now or time.time()
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None or breaker.state == CLOSED:
+                return False
+            return breaker.state == HALF_OPEN or now < breaker.retry_at
+
+    def allow(self, key: Key, now: float = None) -> Optional[str]:
+        """
+        Admit one fetch for a course.
+
+        Returns:
+            The state the fetch runs under (closed, or half_open for the single
+            probe after a cooldown), or None when it must be skipped
+        """
+        now = now or time.time()
+        with self._lock:
+            breaker = self._get(key)
+            if breaker.state == CLOSED:
+                return CLOSED
+            if breaker.state == OPEN and now >= breaker.retry_at:
+                breaker.state = HALF_OPEN
+                return HALF_OPEN
+            # Cooling down, or a probe is already in flight
+            breaker.skipped += 1
+            return None
+
+    def record_success(self, key: Key) -> Optional[str]:
+        """Returns CLOSED if this success closed the breaker"""
+        with self._lock:
+            breaker = self._get(key)
+            if breaker.state == OPEN:
+                # A fetch admitted before the breaker opened; wait for the probe
+                return None
+            reopened = breaker.state == HALF_OPEN
+            self._breakers[key] = CircuitBreaker()
+            return CLOSED if reopened else None
+
+    def record_failure(self, key: Key, now: float = None) -> Optional[str]:
+        """Returns OPEN if this failure opened (or re-opened) the breaker"""
+        now = now or time.time()
+        with self._lock:
+            breaker = self._get(key)
+            if breaker.state == HALF_OPEN:
+                breaker._open(now)
+                return OPEN
+            if breaker.state == CLOSED:
+                breaker.failures += 1
+                if breaker.failures >= self.failure_threshold:
+                    breaker._open(now)
+                    return OPEN
+            return None
+
+    def release_probe(self, key: Key):
+        """
+        A fetch was cancelled (e.g. the run's deadline passed) before it could
+        tell us anything: hand a half-open probe back so the next fetch probes
+        again. Counts nothing against the course
+        """
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is not None and breaker.state == HALF_OPEN:
+                breaker.state = OPEN  # retry_at has passed, so the next allow() probes
+
+    def describe(self, key: Key) -> str:
+        """One line on a breaker, for logs"""
+        with self._lock:
+            breaker = self._get(key)
+            if breaker.state == CLOSED:
+                return f"closed ({breaker.failures} consecutive failures)"
+            retry_in = max(0, int(breaker.retry_at - time.time()))
+            return (f"{breaker.state} after {breaker.trips} trip(s), "
+                    f"cooldown {int(breaker.cooldown())}s, probe in {retry_in}s, "
+                    f"{breaker.skipped} fetches skipped")
+
+    def summary(self) -> Dict[str, str]:
+        """Description of every breaker that is not closed, keyed 'provider/course'"""
+        with self._lock:
+            keys = [key for key, b in self._breakers.items() if b.state != CLOSED]
+        return {f"{provider}/{course_name}": self.describe((provider, course_name))
+                for provider, course_name in keys}
+
+
+# Shared by every engine run in the process
+breakers = BreakerBoard()
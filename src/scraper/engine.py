@@ -0,0 +1,312 @@
+"""
+    Concurrent scrape engine.
+
+    Every (course, date) fetch is planned up front as a ScrapeTask and then
+    fanned out on one asyncio loop behind a global concurrency cap, so a
+    refresh takes about as long as the slowest provider instead of the sum
+    of all of them.
+
+    Each course fetch goes through its (provider, course) circuit breaker:
+    courses that keep failing are skipped during a cooldown instead of
+    costing a timeout per task (see breaker).
+
+    A run never outlives its deadline (SCRAPE_RUN_DEADLINE_SECONDS): provider
+    timeouts and retries are cut down to the time left, and whatever is still
+    queued or in flight when it passes comes back timed_out, so the caller
+    ingests what finished and keeps the rest as stale.
+"""
+import asyncio
+import logging
+import os
+import time
+import traceback
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date as dt_date, timedelta
+from typing import List, Optional, Iterable, Dict, Tuple, Callable
+
+from src.config import courses
+from src.scraper import scraper
+from src.scraper.transport import Transport
+from src.scraper import ratelimit
+from src.scraper import breaker
+from src.scraper import retry
+from src.scraper import hedging
+from src.request_logger import RequestLogger, current_circuit_state
+from src._typing.structs import TeeTime
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on provider calls in flight at once, across every provider
+MAX_CONCURRENCY = int(os.environ.get("SCRAPE_MAX_CONCURRENCY", 8))
+
+# Wall time budget of one run, from start to the last result
+RUN_DEADLINE_SECONDS = float(os.environ.get("SCRAPE_RUN_DEADLINE_SECONDS", 600))
+
+# Dates covered by a horizon run: today through today + HORIZON_DAYS - 1
+HORIZON_DAYS = int(os.environ.get("SCRAPE_HORIZON_DAYS", 14))
+
+# Keeps the collection order get_all_tee_times has always used
+PROVIDER_ORDER = ["foreup", "custom", "chronogolf"]
+
+
+@dataclass
+class ScrapeTask:
+    course_name: str
+    date: str
+    provider: str  # cache provider name (chronogolf, foreup, eaglewood)
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        """(provider, course, date), the identity used for response fingerprints"""
+        return (self.provider, self.course_name, self.date)
+
+    @property
+    def breaker_key(self) -> Tuple[str, str]:
+        """(provider, course), the unit a circuit breaker covers"""
+        return (self.provider, self.course_name)
+
+
+@dataclass
+class ScrapeResult:
+    task: ScrapeTask
+    tee_times: List[TeeTime] = field(default_factory=list)
+    error: Optional[str] = None
+    duration_ms: Optional[int] = None
+    content_hash: Optional[str] = None
+    unchanged: bool = False  # provider returned the same payload as last time
+    skipped: bool = False  # not fetched: the course's circuit breaker is open
+    timed_out: bool = False  # cut off by the run's deadline
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def horizon_dates(start: dt_date = None, days: int = None) -> List[str]:
+    """YYYY-MM-DD dates from start (default today) for days (default HORIZON_DAYS)"""
+    start = start or dt_date.today()
+    return [(start + timedelta(days=n)).strftime('%Y-%m-%d') for n in range(days or HORIZON_DAYS)]
+
+
+def plan_tasks(dates: Iterable[str],
+               course_names: Iterable[str] = None,
+               providers: Iterable[str] = None) -> List[ScrapeTask]:
+    """
+    Build the ordered list of (course, date) fetches for a run.
+
+    Args:
+        dates: Dates to scrape (YYYY-MM-DD)
+        course_names: Optional subset of config.courses to scrape
+        providers: Optional subset of cache providers (chronogolf, foreup, eaglewood)
+
+    Returns:
+        Tasks ordered by date, then provider, then config order
+    """
+    wanted = set(course_names) if course_names is not None else None
+
+    tasks = []
+    for date in dates:
+        for config_provider in PROVIDER_ORDER:
+            provider, _ = scraper.COURSE_FETCHERS[config_provider]
+            if providers is not None and provider not in providers:
+                continue
+            for course_name, course_details in courses.items():
+                if course_details.get("provider") != config_provider:
+                    continue
+                if wanted is not None and course_name not in wanted:
+                    continue
+                tasks.append(ScrapeTask(course_name=course_name, date=date, provider=provider))
+
+    return tasks
+
+
+def _record_breaker(task: ScrapeTask, result: ScrapeResult) -> None:
+    """Feed a fetch's outcome to its course's breaker; log any transition"""
+    if result.ok:
+        transition = breaker.breakers.record_success(task.breaker_key)
+    else:
+        transition = breaker.breakers.record_failure(task.breaker_key)
+    if transition is None:
+        return
+
+    description = breaker.breakers.describe(task.breaker_key)
+    print(f"Circuit {transition} for {task.provider}/{task.course_name}: {description}")
+    RequestLogger.log_request(
+        provider=task.provider,
+        endpoint="circuit_breaker",
+        course=task.course_name,
+        error=description if transition == breaker.OPEN else None,
+        is_error=transition == breaker.OPEN,
+        circuit_state=transition
+    )
+
+
+async def _run_task(task: ScrapeTask,
+                    semaphore: asyncio.Semaphore,
+                    transport: Transport,
+                    previous_hash: str = None) -> ScrapeResult:
+    config_provider = courses[task.course_name].get("provider")
+    _, fetcher = scraper.COURSE_FETCHERS[config_provider]
+
+    async with semaphore:
+        # Checked once a slot is free, so a breaker opened by earlier tasks applies
+        state = breaker.breakers.allow(task.breaker_key)
+        if state is None:
+            return ScrapeResult(task=task, skipped=True,
+                                error=f"circuit open: {breaker.breakers.describe(task.breaker_key)}")
+
+        start = time.monotonic()
+        # Stamped on every RequestLog row the adapter writes for this fetch
+        token = current_circuit_state.set(state)
+        try:
+            fetched = await fetcher(task.course_name, task.date, transport, previous_hash)
+            result = ScrapeResult(
+                task=task,
+                tee_times=fetched.tee_times,
+                content_hash=fetched.content_hash,
+                unchanged=fetched.unchanged,
+                duration_ms=int((time.monotonic() - start) * 1000)
+            )
+        except asyncio.CancelledError:
+            # Running out of time says nothing about the course; just don't
+            # leave a half-open probe hanging
+            breaker.breakers.release_probe(task.breaker_key)
+            raise
+        except Exception:
+            logger.exception(f"Fetch failed for {task.course_name} on {task.date}")
+            result = ScrapeResult(
+                task=task,
+                error=traceback.format_exc(limit=1),
+                duration_ms=int((time.monotonic() - start) * 1000)
+            )
+        finally:
+            current_circuit_state.reset(token)
+
+        _record_breaker(task, result)
+        return result
+
+
+async def run_tasks_async(tasks: List[ScrapeTask],
+                          max_concurrency: int = None,
+                          previous_hashes: Dict[Tuple[str, str, str], str] = None,
+                          on_date_done: Callable[[str, List[ScrapeResult]], None] = None,
+                          deadline_seconds: float = None) -> List[ScrapeResult]:
+    """Run every task concurrently over one pooled transport; results come back in task order."""
+    previous_hashes = previous_hashes or {}
+    deadline = time.monotonic() + (deadline_seconds or RUN_DEADLINE_SECONDS)
+    # Seen by every provider call of this run (tasks copy the context)
+    retry.current_deadline.set(deadline)
+    semaphore = asyncio.Semaphore(max_concurrency or MAX_CONCURRENCY)
+    remaining = Counter(task.date for task in tasks)
+    done: Dict[str, List[ScrapeResult]] = {}
+
+    async def run(index: int, task: ScrapeTask) -> ScrapeResult:
+        try:
+            result = await asyncio.wait_for(
+                _run_task(task, semaphore, transport, previous_hashes.get(task.key)),
+                timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            result = ScrapeResult(task=task, timed_out=True, error="Scrape run deadline passed")
+        if on_date_done is None:
+            return result
+
+        done.setdefault(task.date, []).append((index, result))
+        remaining[task.date] -= 1
+        if remaining[task.date] == 0:
+            # Hand the finished date over while later dates are still in flight;
+            # its (blocking) ingest runs on a worker thread so the loop keeps
+            # serving the requests still in flight
+            date_results = [r for _, r in sorted(done.pop(task.date), key=lambda pair: pair[0])]
+            try:
+                await asyncio.to_thread(on_date_done, task.date, date_results)
+            except Exception:
+                logger.exception(f"on_date_done failed for {task.date}")
+        return result
+
+    async with Transport() as transport:
+        results = await asyncio.gather(*(run(index, task) for index, task in enumerate(tasks)))
+
+    timed_out = sum(1 for result in results if result.timed_out)
+    if timed_out:
+        print(f"Run deadline passed: {timed_out}/{len(results)} tasks cut off")
+
+    # Cumulative per-host rate limiter waits, shared with any concurrent run
+    for host, stats in ratelimit.limiter.stats().items():
+        print(f"Rate limit {host}: {stats}")
+    print(f"Retries: {retry.policy.stats()}")
+    if hedging.hedger.enabled:
+        for host, stats in hedging.hedger.stats().items():
+            print(f"Hedging {host}: {stats}")
+    for course, description in breaker.breakers.summary().items():
+        print(f"Circuit {course}: {description}")
+    return results
+
+
+def run_tasks(tasks: List[ScrapeTask],
+              max_concurrency: int = None,
+              previous_hashes: Dict[Tuple[str, str, str], str] = None,
+              on_date_done: Callable[[str, List[ScrapeResult]], None] = None,
+              deadline_seconds: float = None) -> List[ScrapeResult]:
+    """
+    Blocking entry point for the scheduler and scraper helpers.
+
+    Args:
+        tasks: Planned (course, date) fetches
+        max_concurrency: Overrides SCRAPE_MAX_CONCURRENCY for this run
+        previous_hashes: Last ingested response hash per task.key; a task whose
+            response still matches comes back unchanged with no tee times
+        on_date_done: Called with (date, results) as soon as every task of a
+            date has finished, on a worker thread; it must not share the
+            caller's DB session (push its own app context).
+            Exceptions are logged and do not stop the run. Dates with tasks cut
+            off by the deadline are handed over with those results timed_out
+        deadline_seconds: Overrides SCRAPE_RUN_DEADLINE_SECONDS for this run
+
+    Returns:
+        One ScrapeResult per task, in task order
+    """
+    if not tasks:
+        return []
+
+    return asyncio.run(run_tasks_async(tasks, max_concurrency, previous_hashes, on_date_done,
+                                       deadline_seconds))
+
+
+def collect_tee_times(results: List[ScrapeResult], provider: str = None) -> List[TeeTime]:
+    """Flatten results (optionally for one provider) into a single list"""
+    tee_times = []
+    for result in results:
+        if provider is None or result.task.provider == provider:
+            tee_times.extend(result.tee_times)
+    return tee_times
+
+
+def collect_scopes(results: List[ScrapeResult], provider: str = None) -> List[Tuple[str, str]]:
+    """(course, date) pairs whose fresh response should replace the cached slots"""
+    return [
+        (result.task.course_name, result.task.date)
+        for result in results
+        if result.ok and not result.unchanged
+        and (provider is None or result.task.provider == provider)
+    ]
+
+
+def collect_stale_scopes(results: List[ScrapeResult]) -> List[Tuple[str, str]]:
+    """(course, date) pairs the run got no answer for: failed, skipped or cut off"""
+    return [(result.task.course_name, result.task.date) for result in results if not result.ok]
+
+
+def coverage(results: List[ScrapeResult]) -> dict:
+    """How much of a run's plan came back, for logs"""
+    fetched = sum(1 for r in results if r.ok)
+    return {
+        'planned': len(results),
+        'fetched': fetched,
+        'unchanged': sum(1 for r in results if r.ok and r.unchanged),
+        'failed': sum(1 for r in results if not r.ok and not r.skipped and not r.timed_out),
+        'skipped': sum(1 for r in results if r.skipped),
+        'timed_out': sum(1 for r in results if r.timed_out),
+        'coverage': round(fetched / len(results), 3) if results else 1.0,
+    }
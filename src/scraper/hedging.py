@@ -0,0 +1,153 @@
+"""
+    Hedged provider requests.
+
+    With SCRAPE_HEDGE_REQUESTS on, a GET that hasn't answered by its host's
+    observed HEDGE_PERCENTILE latency gets one duplicate, and whichever
+    answers first wins; the other is cancelled. A host needs MIN_SAMPLES
+    observed requests before it is hedged, and a duplicate only goes out when
+    the host's rate limiter has a token to spare right away, so hedging never
+    queues behind or overdraws the provider's budget. HEDGE_MAX_RATE caps the
+    share of a host's requests that get hedged.
+
+    Latencies are kept over the last WINDOW requests per host. A hedged
+    request is recorded as the time its first answer took.
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+
+ENABLED = os.environ.get("SCRAPE_HEDGE_REQUESTS", "0").lower() in ("1", "true", "yes")
+HEDGE_PERCENTILE = float(os.environ.get("SCRAPE_HEDGE_PERCENTILE", 95))
+HEDGE_MAX_RATE = float(os.environ.get("SCRAPE_HEDGE_MAX_RATE", 0.1))
+MIN_SAMPLES = int(os.environ.get("SCRAPE_HEDGE_MIN_SAMPLES", 20))
+WINDOW = 200
+
+# Never hedge sooner than this, however fast a host usually is
+MIN_DELAY_SECONDS = 0.1
+
+# Only requests safe to send twice
+HEDGEABLE_METHODS = {"GET", "HEAD"}
+
+
+class HostLatency:
+    """Recent latencies and hedge counters of one provider host"""
+
+    def __init__(self, window: int = WINDOW):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0  # the duplicate answered first
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+    def stats(self) -> dict:
+        p95 = self.percentile(95)
+        return {
+            'requests': self.requests,
+            'hedged': self.hedged,
+            'hedge_rate': round(self.hedged / self.requests, 3) if self.requests else 0.0,
+            'hedge_wins': self.hedge_wins,
+            'win_rate': round(self.hedge_wins / self.hedged, 3) if self.hedged else 0.0,
+            'p95_ms': int(p95 * 1000) if p95 is not None else None,
+        }
+
+
+class Hedger:
+
+    def __init__(self,
+                 enabled: bool = ENABLED,
+                 percentile: float = HEDGE_PERCENTILE,
+                 max_rate: float = HEDGE_MAX_RATE,
+                 min_samples: int = MIN_SAMPLES):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self.min_samples = min_samples
+        self._hosts: Dict[str, HostLatency] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host: str) -> HostLatency:
+        latency = self._hosts.get(host)
+        if latency is None:
+            latency = self._hosts[host] = HostLatency()
+        return latency
+
+    def delay(self, host: str, method: str) -> Optional[float]:
+        """Seconds to wait before hedging a request to host, or None to not hedge it"""
+        if not self.enabled or method.upper() not in HEDGEABLE_METHODS:
+            return None
+        with self._lock:
+            latency = self._host(host)
+            if len(latency.samples) < self.min_samples:
+                return None
+            if latency.requests and latency.hedged / latency.requests >= self.max_rate:
+                return None
+            return max(MIN_DELAY_SECONDS, latency.percentile(self.percentile))
+
+    def _record(self, host: str, seconds: float = None, hedged: bool = False, won: bool = False):
+        with self._lock:
+            latency = self._host(host)
+            latency.requests += 1
+            latency.hedged += hedged
+            latency.hedge_wins += won
+            if seconds is not None:
+                latency.samples.append(seconds)
+
+    async def send(self, host: str, method: str,
+                   attempt: Callable[[], Awaitable],
+                   try_acquire: Callable[[], bool]):
+        """
+        Run attempt(), hedging it with a second attempt() if it is slow.
+
+        Args:
+            attempt: Sends the request once
+            try_acquire: Takes a rate limiter token for the duplicate without
+                waiting; False when the host has none to spare
+        """
+        start = time.monotonic()
+        delay = self.delay(host, method)
+        if delay is None:
+            response = await attempt()
+            self._record(host, time.monotonic() - start)
+            return response
+
+        primary = asyncio.ensure_future(attempt())
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not try_acquire():
+            response = await primary
+            self._record(host, time.monotonic() - start)
+            return response
+
+        backup = asyncio.ensure_future(attempt())
+        pending = {primary, backup}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._record(host, time.monotonic() - start, hedged=True, won=task is backup)
+                        return task.result()
+            # Both failed; report the original request's error
+            self._record(host, hedged=True)
+            return primary.result()
+        finally:
+            for task in (primary, backup):
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {host: latency.stats() for host, latency in self._hosts.items()}
+
+
+# Shared by every Transport in the process
+hedger = Hedger()
@@ -0,0 +1,320 @@
+"""
+    Change-rate adaptive scrape planning.
+
+    Every (provider, course, date) in the booking horizon keeps an EWMA of
+    how many slot changes per hour its scrapes observe. Its next refresh is
+    due after the time expected for TARGET_CHANGES changes, clamped to
+    [MIN_INTERVAL, MAX_INTERVAL]; quiet sheets drift towards the max,
+    moving ones towards the min. A token bucket caps provider requests per
+    hour, and when more pairs are due than the budget allows, the ones whose
+    data is moving fastest (and are most overdue) go first.
+
+    Courses that open a new date at a fixed moment (e.g. 7 days out at 07:00
+    Mountain) get a burst: from RELEASE_BURST_BEFORE before until
+    RELEASE_BURST_AFTER after the release, the newly opened date is scraped
+    every RELEASE_BURST_INTERVAL ahead of everything else. Release rules come
+    from config.courses:
+
+        "release": {"days_ahead": 7, "time": "07:00", "tz": "America/Denver"}
+
+    or, for courses without one, are inferred when a date goes from empty to
+    having tee times. A sighting only bounds the release from above, so the
+    earliest time of day seen so far is kept rather than the latest one.
+
+    With a DemandTracker attached, due pairs users are looking at move up the
+    queue: priority is multiplied by 1 + DEMAND_BOOST x relative demand.
+
+    Courses whose circuit breaker is open are left out of the plan until
+    their cooldown ends and the engine can send a probe.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date as dt_date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pytz
+
+from src.config import courses
+from src.demand import DemandTracker
+from src.scraper import engine
+from src.scraper import breaker
+from src.scraper.engine import ScrapeTask, ScrapeResult
+from src.util import misc
+
+
+# Refresh bounds per (course, date)
+MIN_INTERVAL = float(os.environ.get("SCRAPE_MIN_INTERVAL_MINUTES", 15)) * 60
+MAX_INTERVAL = float(os.environ.get("SCRAPE_MAX_INTERVAL_HOURS", 24)) * 3600
+
+# Global provider request budget
+REQUEST_BUDGET_PER_HOUR = float(os.environ.get("SCRAPE_REQUEST_BUDGET_PER_HOUR", 240))
+
+# Changes we accept missing between two scrapes of one (course, date)
+TARGET_CHANGES = float(os.environ.get("SCRAPE_TARGET_CHANGES", 1))
+
+# Weight of the latest observation in the change-rate EWMA
+RATE_ALPHA = 0.5
+
+# Intervals used until a pair has been observed, by days from today: the
+# cadence the fixed today / tomorrow / day-after jobs used to have
+PRIOR_INTERVALS = {0: 3 * 3600, 1: 12 * 3600}
+
+# Burst around a release moment
+RELEASE_BURST_BEFORE = float(os.environ.get("SCRAPE_RELEASE_BURST_BEFORE_MINUTES", 5)) * 60
+RELEASE_BURST_AFTER = float(os.environ.get("SCRAPE_RELEASE_BURST_AFTER_MINUTES", 20)) * 60
+RELEASE_BURST_INTERVAL = float(os.environ.get("SCRAPE_RELEASE_BURST_INTERVAL_SECONDS", 60))
+
+# Priority multiplier for the most requested (course, date), relative to unrequested ones
+DEMAND_BOOST = float(os.environ.get("SCRAPE_DEMAND_BOOST", 4))
+
+
+@dataclass
+class RefreshState:
+    change_rate: Optional[float] = None  # changes per hour, EWMA; None until observed
+    last_scraped_at: Optional[float] = None
+    next_due_at: float = 0.0
+    scrapes: int = 0
+    changes: int = 0  # total observed
+    last_count: Optional[int] = None  # tee times in the last changed response
+
+
+@dataclass(frozen=True)
+class ReleaseRule:
+    days_ahead: int  # a date opens this many days before it
+    minute: int  # course-local minute of day it opens at
+    tz: str = misc.COURSE_TZ.zone
+    inferred: bool = False
+
+    def release_at(self, date: str) -> float:
+        """Epoch seconds at which date opens"""
+        day = misc.parse_date(date) - timedelta(days=self.days_ahead)
+        local = pytz.timezone(self.tz).localize(
+            datetime.combine(day, datetime.min.time()) + timedelta(minutes=self.minute))
+        return local.timestamp()
+
+    def release_date(self, now: float) -> str:
+        """The date this rule opens on the course-local day of now"""
+        today = datetime.fromtimestamp(now, pytz.timezone(self.tz)).date()
+        return (today + timedelta(days=self.days_ahead)).strftime('%Y-%m-%d')
+
+
+def release_rules_from_config() -> Dict[str, ReleaseRule]:
+    """ReleaseRule per course that configures a "release" entry"""
+    rules = {}
+    for course_name, course_details in courses.items():
+        release = course_details.get("release")
+        if release:
+            rules[course_name] = ReleaseRule(
+                days_ahead=int(release["days_ahead"]),
+                minute=misc.minute_of_day(release["time"]),
+                tz=release.get("tz", misc.COURSE_TZ.zone),
+            )
+    return rules
+
+
+class AdaptivePlanner:
+    """Decides which (course, date) pairs to scrape on each scheduler tick"""
+
+    def __init__(self,
+                 min_interval: float = MIN_INTERVAL,
+                 max_interval: float = MAX_INTERVAL,
+                 budget_per_hour: float = REQUEST_BUDGET_PER_HOUR,
+                 target_changes: float = TARGET_CHANGES,
+                 demand: DemandTracker = None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget_per_hour = budget_per_hour
+        self.target_changes = target_changes
+        self.demand = demand
+
+        # Unused budget carries over, up to a quarter hour's worth
+        self.capacity = max(1.0, budget_per_hour / 4)
+        self.tokens = self.capacity
+        self._refilled_at = time.time()
+
+        self.states: Dict[Tuple[str, str, str], RefreshState] = {}
+        self.release_rules: Dict[str, ReleaseRule] = release_rules_from_config()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = max(0.0, now - self._refilled_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.budget_per_hour / 3600)
+        self._refilled_at = now
+
+    def _prior_interval(self, date: str) -> float:
+        days_out = (datetime.strptime(date, '%Y-%m-%d').date() - dt_date.today()).days
+        return min(self.max_interval, max(self.min_interval,
+                                          PRIOR_INTERVALS.get(days_out, self.max_interval)))
+
+    def in_burst(self, task: ScrapeTask, now: float) -> bool:
+        """Whether task's date is inside its course's release window"""
+        rule = self.release_rules.get(task.course_name)
+        if rule is None:
+            return False
+        release_at = rule.release_at(task.date)
+        return release_at - RELEASE_BURST_BEFORE <= now <= release_at + RELEASE_BURST_AFTER
+
+    def _is_due(self, task: ScrapeTask, now: float) -> bool:
+        state = self.states.get(task.key)
+        if state is None:
+            return True
+        if self.in_burst(task, now):
+            return state.last_scraped_at is None or now - state.last_scraped_at >= RELEASE_BURST_INTERVAL
+        return now >= state.next_due_at
+
+    def _release_dates(self, now: float) -> List[str]:
+        """Dates being released around now, which may lie past the horizon"""
+        dates = set()
+        for rule in self.release_rules.values():
+            for offset in (-1, 0, 1):  # windows can straddle local midnight
+                date = rule.release_date(now + offset * 86400)
+                release_at = rule.release_at(date)
+                if release_at - RELEASE_BURST_BEFORE <= now <= release_at + RELEASE_BURST_AFTER:
+                    dates.add(date)
+        return sorted(dates)
+
+    def interval(self, key: Tuple[str, str, str]) -> float:
+        """Seconds between refreshes of a pair at its current change rate"""
+        state = self.states.get(key)
+        if state is None or state.change_rate is None:
+            return self._prior_interval(key[2])
+        if state.change_rate <= 0:
+            return self.max_interval
+        seconds = self.target_changes / state.change_rate * 3600
+        return min(self.max_interval, max(self.min_interval, seconds))
+
+    def priority(self, task: ScrapeTask, now: float) -> float:
+        """Higher goes first: release bursts and pairs never scraped, then by change rate x overdue factor"""
+        state = self.states.get(task.key)
+        if state is None or state.last_scraped_at is None or self.in_burst(task, now):
+            return float('inf')
+        overdue = (now - state.last_scraped_at) / self.interval(task.key)
+        # Floor so quiet pairs still age their way up the queue
+        rate = max(state.change_rate or 0.0, 1 / (self.max_interval / 3600))
+        return rate * overdue
+
+    def plan(self, dates: List[str] = None, now: float = None) -> List[ScrapeTask]:
+        """
+        Tasks due now that fit in the request budget, highest priority first.
+
+        Args:
+            dates: Dates to consider (defaults to the engine's horizon)
+        """
+        now = now or time.time()
+        dates = dates or engine.horizon_dates()
+
+        with self._lock:
+            # Dates opening right now, for the courses releasing them
+            tasks = engine.plan_tasks(dates)
+            release_dates = [d for d in self._release_dates(now) if d not in set(dates)]
+            tasks += [task for task in engine.plan_tasks(release_dates)
+                      if self.in_burst(task, now)]
+
+            # Forget pairs that have left the horizon
+            wanted = set(dates) | set(release_dates)
+            for key in [k for k in self.states if k[2] not in wanted]:
+                del self.states[key]
+
+            self._refill(now)
+            # Courses quarantined by their circuit breaker don't spend budget
+            due = [task for task in tasks
+                   if self._is_due(task, now) and not breaker.breakers.blocked(task.breaker_key, now)]
+            weights = self.demand.weights({(t.course_name, t.date) for t in due}, now) \
+                if self.demand is not None else {}
+
+            def rank(task):
+                weight = weights.get((task.course_name, task.date), 0.0)
+                # Demand also orders the unbounded (burst / never scraped) priorities
+                return (self.priority(task, now) * (1 + DEMAND_BOOST * weight), weight)
+
+            # Stable sort: equal ranks keep date order
+            due.sort(key=rank, reverse=True)
+
+            planned = due[:int(self.tokens)]
+            self.tokens -= len(planned)
+            return planned
+
+    def record(self, result: ScrapeResult, changes: int = 0, now: float = None):
+        """
+        Fold one scrape into its pair's change rate and schedule its next refresh.
+
+        Args:
+            result: The scrape
+            changes: Rows the ingest inserted, updated or closed for this pair
+                (0 when the response was unchanged)
+        """
+        now = now or time.time()
+        key = result.task.key
+
+        with self._lock:
+            state = self.states.setdefault(key, RefreshState())
+            if not result.ok:
+                # Retry a failed pair soon, but not on the very next tick
+                state.next_due_at = now + self.min_interval
+                return
+
+            previous = state.last_scraped_at
+            if previous is not None:
+                hours = max(now - previous, 60) / 3600
+                observed = changes / hours
+                state.change_rate = observed if state.change_rate is None else \
+                    RATE_ALPHA * observed + (1 - RATE_ALPHA) * state.change_rate
+            state.last_scraped_at = now
+            state.scrapes += 1
+            state.changes += changes
+            state.next_due_at = now + self.interval(key)
+
+            if not result.unchanged:
+                count = len(result.tee_times)
+                if state.last_count == 0 and count > 0:
+                    self._infer_release(result.task, now, empty_at=previous)
+                state.last_count = count
+
+    def _infer_release(self, task: ScrapeTask, now: float, empty_at: float = None):
+        """
+        A date just went from empty to open: remember when, unless configured.
+
+        The date opened after empty_at (the scrape that still found it empty)
+        and by now. A sighting later in the day than the current rule's only
+        means the scrape came late, unless empty_at shows the date was still
+        closed at the rule's time today.
+        """
+        current = self.release_rules.get(task.course_name)
+        if current is not None and not current.inferred:
+            return
+        local_now = datetime.fromtimestamp(now, misc.COURSE_TZ)
+        days_ahead = (misc.parse_date(task.date) - local_now.date()).days
+        if days_ahead <= 0:
+            return
+        # A release opens the course's furthest date; an earlier date
+        # reopening is a cancellation
+        if any(key[1] == task.course_name and key[2] > task.date and state.last_count
+               for key, state in self.states.items()):
+            return
+        minute = local_now.hour * 60 + local_now.minute
+        if current is not None and current.days_ahead == days_ahead and current.minute < minute:
+            local_empty = datetime.fromtimestamp(empty_at, misc.COURSE_TZ) if empty_at else None
+            still_closed = local_empty is not None and local_empty.date() == local_now.date() and \
+                local_empty.hour * 60 + local_empty.minute >= current.minute
+            if not still_closed:
+                return
+        self.release_rules[task.course_name] = ReleaseRule(
+            days_ahead=days_ahead,
+            minute=minute,
+            inferred=True,
+        )
+        print(f"Inferred release rule for {task.course_name}: "
+              f"{days_ahead} days ahead at {local_now.strftime('%H:%M')}")
+
+    def summary(self) -> dict:
+        """Counts for logging: pairs tracked, due, and budget left"""
+        now = time.time()
+        with self._lock:
+            return {
+                'tracked': len(self.states),
+                'due': sum(1 for s in self.states.values() if now >= s.next_due_at),
+                'tokens': round(self.tokens, 1),
+                'release_rules': len(self.release_rules),
+            }
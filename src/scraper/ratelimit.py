@@ -0,0 +1,147 @@
+"""
+    Outbound request budgets per provider host.
+
+    Every provider request takes a token from its host's bucket first and
+    waits (asynchronously) when the bucket is empty, so concurrent scrapes
+    never exceed a host's configured rate. One limiter is shared by every
+    Transport in the process, so overlapping runs share the budget too.
+
+    Limits are set per course in config.courses (every course of a provider
+    shares its provider's limit, e.g. CHRONOGOLF_RATE_LIMIT):
+
+        "rate_limit": {"rate": 2, "burst": 4}   # requests/second, bucket size
+
+    Courses on the same host share one bucket; the strictest limit among
+    them wins. Hosts without one use SCRAPE_RATE_PER_SECOND / SCRAPE_RATE_BURST.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from src.config import courses
+
+
+DEFAULT_RATE = float(os.environ.get("SCRAPE_RATE_PER_SECOND", 4))
+DEFAULT_BURST = float(os.environ.get("SCRAPE_RATE_BURST", 8))
+
+
+def course_rate_limit(course_name: Optional[str]) -> Optional[Tuple[float, float]]:
+    """(rate, burst) configured for a course, if any"""
+    limit = (courses.get(course_name) or {}).get("rate_limit") if course_name else None
+    if not limit:
+        return None
+    rate = float(limit["rate"])
+    return rate, float(limit.get("burst", max(1.0, rate)))
+
+
+class TokenBucket:
+    """Reservation-style token bucket; safe to share across threads and event loops"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.configured = False  # still on the defaults
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.throttled = 0
+        self.waited_total = 0.0
+        self.waited_max = 0.0
+
+    def configure(self, rate: float, burst: float):
+        """Apply a configured limit: replaces the defaults, then only ever tightens"""
+        with self._lock:
+            if self.configured:
+                rate, burst = min(self.rate, rate), min(self.burst, burst)
+            self.rate, self.burst = rate, burst
+            self.tokens = min(self.tokens, burst)
+            self.configured = True
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take a token; returns the seconds to wait before using it"""
+        with self._lock:
+            self._refill()
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+            self.requests += 1
+            if wait > 0:
+                self.throttled += 1
+                self.waited_total += wait
+                self.waited_max = max(self.waited_max, wait)
+            return wait
+
+    def try_reserve(self) -> bool:
+        """Take a token only if one is available right now"""
+        with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            self.requests += 1
+            return True
+
+    async def acquire(self) -> float:
+        """Wait for a token; returns the seconds waited"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def stats(self) -> dict:
+        return {
+            'rate': self.rate,
+            'burst': self.burst,
+            'requests': self.requests,
+            'throttled': self.throttled,
+            'waited_ms_total': int(self.waited_total * 1000),
+            'waited_ms_max': int(self.waited_max * 1000),
+        }
+
+
+class RateLimiter:
+    """One TokenBucket per provider host"""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: float = DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._configured = set()  # (host, course_name) pairs already applied
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str, course_name: str = None) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+            if (host, course_name) not in self._configured:
+                self._configured.add((host, course_name))
+                limit = course_rate_limit(course_name)
+                if limit is not None:
+                    bucket.configure(*limit)
+            return bucket
+
+    async def acquire(self, host: str, course_name: str = None) -> float:
+        """Wait for the host's budget; returns the seconds waited"""
+        return await self.bucket(host, course_name).acquire()
+
+    def try_acquire(self, host: str, course_name: str = None) -> bool:
+        """Take a token from the host's budget without waiting; False if none is spare"""
+        return self.bucket(host, course_name).try_reserve()
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {host: bucket.stats() for host, bucket in self._buckets.items()}
+
+
+# Shared by every Transport in the process
+limiter = RateLimiter()
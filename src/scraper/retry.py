@@ -0,0 +1,189 @@
+"""
+    Retry policy for provider requests.
+
+    Every Transport request goes through a RetryPolicy. Connection errors,
+    timeouts and retryable statuses (408, 425, 429, 5xx gateway errors) are
+    retried up to MAX_ATTEMPTS times with decorrelated jitter backoff:
+
+        delay = min(MAX_DELAY, uniform(BASE_DELAY, 3 x previous delay))
+
+    A Retry-After header sets the floor for the next delay; one longer than
+    MAX_RETRY_AFTER ends the retries instead of stalling the run. Anything
+    else (400, 401, 403, 404, ...) is returned straight away for the adapter's
+    raise_for_status, which classifies it with error_for_status.
+
+    When the running scrape has a deadline (current_deadline), a retry is only
+    scheduled if it can start at least MIN_ATTEMPT_SECONDS before it.
+    Every attempt takes its own rate limiter token.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aiohttp
+
+from src._typing.errors import (
+    RequestError,
+    RetryableAPIError,
+    NonRetryableAPIError,
+    RateLimitError,
+)
+
+
+MAX_ATTEMPTS = int(os.environ.get("SCRAPE_RETRY_MAX_ATTEMPTS", 3))
+BASE_DELAY = float(os.environ.get("SCRAPE_RETRY_BASE_DELAY_SECONDS", 0.5))
+MAX_DELAY = float(os.environ.get("SCRAPE_RETRY_MAX_DELAY_SECONDS", 10))
+MAX_RETRY_AFTER = float(os.environ.get("SCRAPE_RETRY_MAX_RETRY_AFTER_SECONDS", 30))
+
+# A retry that can't start this long before the deadline isn't worth sending
+MIN_ATTEMPT_SECONDS = 2.0
+
+RATE_LIMITED_STATUS = 429
+RETRYABLE_STATUS = {408, 425, RATE_LIMITED_STATUS, 500, 502, 503, 504}
+
+# time.monotonic() by which the current scrape has to be done; None for no deadline
+current_deadline: ContextVar[Optional[float]] = ContextVar('current_deadline', default=None)
+
+
+def _header(headers: Optional[Dict[str, str]], name: str) -> Optional[str]:
+    return next((v for k, v in (headers or {}).items() if k.lower() == name.lower()), None)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def error_for_status(status: int, message: str, provider: str = None,
+                     headers: Dict[str, str] = None) -> RequestError:
+    """The errors.py class a failed HTTP status maps to"""
+    if status == RATE_LIMITED_STATUS:
+        return RateLimitError(message, retry_after=parse_retry_after(_header(headers, "Retry-After")),
+                              provider=provider, status_code=status)
+    if status in RETRYABLE_STATUS:
+        return RetryableAPIError(message, provider, status)
+    return NonRetryableAPIError(message, provider, status)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient failures: retryable statuses, dropped connections and timeouts"""
+    return isinstance(error, (RetryableAPIError,
+                              aiohttp.ClientConnectionError,
+                              aiohttp.ClientPayloadError,
+                              asyncio.TimeoutError))
+
+
+class RetryPolicy:
+
+    def __init__(self,
+                 max_attempts: int = MAX_ATTEMPTS,
+                 base_delay: float = BASE_DELAY,
+                 max_delay: float = MAX_DELAY,
+                 max_retry_after: float = MAX_RETRY_AFTER):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+        self.retries = 0  # attempts after the first
+        self.recovered = 0  # requests that succeeded on a retry
+        self.exhausted = 0  # requests still failing when retries ran out
+        self.deadline_stops = 0  # of those, stopped early by the run's deadline
+        self._lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def next_delay(self, previous: float) -> float:
+        """Decorrelated jitter"""
+        return min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, previous * 3)))
+
+    async def send(self, attempt: Callable[[], Awaitable[Any]], label: str = None) -> Any:
+        """
+        Run attempt() until it returns a response whose status isn't retryable.
+
+        Args:
+            attempt: Sends the request once; returns an HttpResponse
+            label: What is being sent, for logs
+
+        Returns:
+            The first non-retryable response, or the last response once
+            retries run out (its raise_for_status reports the failure)
+
+        Raises:
+            The last error when the final attempt raised, or the first
+            error that isn't retryable
+        """
+        delay = self.base_delay
+        for number in range(1, self.max_attempts + 1):
+            response, error = None, None
+            try:
+                response = await attempt()
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                error = e
+
+            if response is not None and response.status not in RETRYABLE_STATUS:
+                if number > 1:
+                    self._count('recovered')
+                return response
+            if number == self.max_attempts:
+                break
+
+            delay = self.next_delay(delay)
+            wait = delay
+            retry_after = parse_retry_after(_header(response.headers, "Retry-After")) \
+                if response is not None else None
+            if retry_after is not None:
+                if retry_after > self.max_retry_after:
+                    break
+                wait = max(wait, retry_after)
+
+            deadline = current_deadline.get()
+            if deadline is not None and time.monotonic() + wait + MIN_ATTEMPT_SECONDS > deadline:
+                self._count('deadline_stops')
+                break
+
+            reason = f"HTTP {response.status}" if response is not None else repr(error)
+            print(f"Retrying {label or 'request'} in {wait:.2f}s "
+                  f"(attempt {number + 1}/{self.max_attempts}): {reason}")
+            self._count('retries')
+            await asyncio.sleep(wait)
+
+        self._count('exhausted')
+        if response is not None:
+            return response
+        raise error
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'retries': self.retries,
+                'recovered': self.recovered,
+                'exhausted': self.exhausted,
+                'deadline_stops': self.deadline_stops,
+            }
+
+
+# Shared by every Transport in the process
+policy = RetryPolicy()
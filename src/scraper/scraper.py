@@ -1,9 +1,7 @@
-from datetime import date
 import json
 from typing import List, Dict, Any
 from src.config import courses
 import os
-import traceback
 from src.scraper.apis.chronogolf import V1, V2
 from src.scraper.apis.eaglewood import Eaglewood
 from src.scraper.apis.foreup import Foreup
@@ -11,9 +9,25 @@ from src._typing.structs import (
     Course,
     TeeTimeParameter,
     TeeTime,
+    FetchResult,
 )
 
 
+# Party size sent to each provider: the most permissive one it accepts, so a
+# single request returns every open slot. Availability for any party size is
+# then derived from each slot's min/max players (ForeUp takes 0 for "any")
+FETCH_NUM_PLAYERS = {
+    "chronogolf": 1,
+    "foreup": 0,
+    "eaglewood": 1,
+}
+
+# Chronogolf's legacy marketplace (V1) doesn't reliably report a slot's open
+# spots, so it keeps the party size it has always been asked for: every slot it
+# returns has at least that many, which is stored when the slot says nothing else
+CHRONOGOLF_V1_NUM_PLAYERS = 3
+
+
 def chronogolf_v2_api(tee_time_parameter):
     tee_times = []
     try:
@@ -35,114 +49,107 @@ def chronogolf_v1_api(tee_time_parameter):
     return tee_times
 
 
-def chronogolf_tee_times(date):
+async def chronogolf_course_tee_times(course_name, date, transport=None, previous_hash=None) -> FetchResult:
+    """Fetch one chronogolf course for one date. Raises on failure."""
+    course_details = courses.get(course_name)
+    sub_details = course_details.get("config")
+
+    # add date to booking url for specific click-search
+    booking_url = f"{sub_details.get('booking_url')}?date={date}"
+    course = Course(
+        name=course_name,
+        booking_url=booking_url,
+        club_id=sub_details.get("club_id", None),
+        course_ids=sub_details.get("course_ids", None)
+    )
+
+    is_v1 = sub_details.get("version") == "marketplaceV1"
+    ttp = TeeTimeParameter(
+        endpoint=os.environ[sub_details.get("endpoint_env_var")],
+        date=date,
+        num_players=CHRONOGOLF_V1_NUM_PLAYERS if is_v1 else FETCH_NUM_PLAYERS["chronogolf"],
+        holes=[18],
+        course=course,
+    )
+
+    if is_v1:
+        return await V1(course, transport=transport).fetch(ttp, previous_hash)
+    elif sub_details.get("version") == "marketplaceV2":
+        return await V2(course, transport=transport).fetch(ttp, previous_hash)
+    return FetchResult()
 
-    all_tee_times = []
 
-    for course_name in courses:
-        try:
-            course_details = courses.get(course_name)
-            sub_details = course_details.get("config")
+def chronogolf_tee_times(date):
+    from src.scraper import engine
 
-            # add date to booking url for specific click-search
-            booking_url = f"{sub_details.get('booking_url')}?date={date}"
-            course = Course(
-                name=course_name,
-                booking_url=booking_url,
-                club_id=sub_details.get("club_id", None),
-                course_ids=sub_details.get("course_ids", None)
-            )
+    results = engine.run_tasks(engine.plan_tasks([date], providers=["chronogolf"]))
+    return engine.collect_tee_times(results)
 
-            ttp = TeeTimeParameter(
-                endpoint=os.environ[sub_details.get("endpoint_env_var")],
-                date=date,
-                num_players=3,
-                holes=[18],
-                course=course,
-            )
 
-            tee_times = []
-            if course_details.get("provider") == "chronogolf":
-                if sub_details.get("version") == "marketplaceV1":
-                    tee_times.extend(chronogolf_v1_api(ttp))
+async def eaglewood_course_tee_times(course_name, date, transport=None, previous_hash=None) -> FetchResult:
+    """Fetch Eaglewood for one date. Raises on failure."""
+    course_details = courses.get(course_name)
+    sub_details = course_details.get("config")
 
-                elif sub_details.get("version") == "marketplaceV2":
-                    tee_times.extend(chronogolf_v2_api(ttp))
+    # add date to booking url for specific click-search
+    booking_url = sub_details.get('booking_url') # f"{sub_details.get('booking_url')}?date={date}"
 
-            all_tee_times.extend(tee_times)
-        except Exception as e:
-            print(traceback.format_exc())
+    course = Course(
+        name=course_name,
+        booking_url=booking_url,
+    )
 
-    return all_tee_times
+    ttp = TeeTimeParameter(
+        endpoint="",
+        date=date,
+        num_players=FETCH_NUM_PLAYERS["eaglewood"],
+        holes=[18],
+        course=course,
+    )
+    eaglewood = Eaglewood(course, transport=transport)
+    return await eaglewood.fetch(ttp, previous_hash)
 
 
 def eaglewood_tee_times(date):
-    tee_times = []
-    try:
-        course_name = "Eaglewood Golf Course"
-        course_details = courses.get(course_name)
-        sub_details = course_details.get("config")
-        print(sub_details)
-
-        # add date to booking url for specific click-search
-        booking_url = sub_details.get('booking_url') # f"{sub_details.get('booking_url')}?date={date}"
-
-        course = Course(
-            name=course_name,
-            booking_url=booking_url,
-        )
-
-        ttp = TeeTimeParameter(
-            endpoint="",
-            date=date,
-            num_players=2,
-            holes=[18],
-            course=course,
-        )
-        eaglewood = Eaglewood(course)
-        tee_times.extend(eaglewood.get_tee_times(ttp))
-    except Exception as e:
-        print(e)
+    from src.scraper import engine
 
-    return tee_times
-
-
-def foreup_tee_times(date):
-
-    all_tee_times = []
+    results = engine.run_tasks(engine.plan_tasks([date], providers=["eaglewood"]))
+    return engine.collect_tee_times(results)
 
-    for course_name in courses:
-        try:
 
-            course_details = courses.get(course_name)
+async def foreup_course_tee_times(course_name, date, transport=None, previous_hash=None) -> FetchResult:
+    """Fetch one foreup course for one date. Raises on failure."""
+    sub_details = courses.get(course_name).get("config")
+    course = Course(
+        name=course_name,
+        booking_url=sub_details.get("booking_url")
+    )
 
-            if course_details.get("provider") == "foreup":
+    ttp = TeeTimeParameter(
+        endpoint="", # os.environ[sub_details.get("endpoint_env_var")]"",
+        date=date,
+        num_players=FETCH_NUM_PLAYERS["foreup"],
+        holes=[18],
+        course=course,
+    )
 
-                sub_details = course_details.get("config")
-                course = Course(
-                    name=course_name,
-                    booking_url=sub_details.get("booking_url")
-                )
+    foreup = Foreup(course, transport=transport)
+    return await foreup.fetch(ttp, previous_hash)
 
-                ttp = TeeTimeParameter(
-                    endpoint="", # os.environ[sub_details.get("endpoint_env_var")]"",
-                    date=date,
-                    num_players=3,
-                    holes=[18],
-                    course=course,
-                )
 
-                foreup = Foreup(course)
+def foreup_tee_times(date):
+    from src.scraper import engine
 
-                tee_times = []
-                tee_times.extend(foreup.get_tee_times(ttp))
-                
-                all_tee_times.extend(tee_times)
+    results = engine.run_tasks(engine.plan_tasks([date], providers=["foreup"]))
+    return engine.collect_tee_times(results)
 
-        except Exception as e:
-            print(traceback.format_exc())
 
-    return all_tee_times
+# config provider -> (cache provider name, single course fetcher)
+COURSE_FETCHERS = {
+    "chronogolf": ("chronogolf", chronogolf_course_tee_times),
+    "foreup": ("foreup", foreup_course_tee_times),
+    "custom": ("eaglewood", eaglewood_course_tee_times),
+}
 
 
 def order_tee_times(tee_times: List[TeeTime]) -> List[TeeTime]:
@@ -176,20 +183,21 @@ def sort_tee_times_in_place(tee_times: List[TeeTime]) -> None:
 
 
 def get_all_tee_times(date):
+    """
+    Scrape every configured course for a date concurrently.
 
-    all_times = []
-    all_times.extend(foreup_tee_times(date))
-    all_times.extend(eaglewood_tee_times(date))
-    all_times.extend(chronogolf_tee_times(date))
-
-    all_times_ordered = order_tee_times(all_times)
+    Results keep the old foreup -> eaglewood -> chronogolf collection
+    order before sorting, so ties break the same way they always have.
+    """
+    from src.scraper import engine
 
-    return all_times_ordered
+    results = engine.run_tasks(engine.plan_tasks([date]))
+    return order_tee_times(engine.collect_tee_times(results))
 
 
-x = get_all_tee_times("2025-09-03")
-# print(x)
-# x = eaglewood_tee_times("2025-09-03") # "9:30 AM" 4:30 PM
-# x = foreup_tee_times("2025-09-03") # 17:15
-# x = chronogolf_tee_times("2025-09-05")
-# print(x)
+if __name__ == "__main__":
+    x = get_all_tee_times("2025-09-03")
+    print(x)
+    # x = eaglewood_tee_times("2025-09-03") # "9:30 AM" 4:30 PM
+    # x = foreup_tee_times("2025-09-03") # 17:15
+    # x = chronogolf_tee_times("2025-09-05")
@@ -0,0 +1,336 @@
+"""
+    Shared in-process HTTP transport for the provider adapters.
+
+    request_builder still owns what each provider request looks like (it
+    hands back a curl command); the transport parses that command and sends
+    the exact same method, url, headers and body over a keep-alive
+    connection pool per provider host instead of spawning curl. Transient
+    failures are retried per the retry policy (see retry), and slow GETs can
+    be hedged with a duplicate (see hedging).
+"""
+import asyncio
+import hashlib
+import json
+import os
+import shlex
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Any
+from urllib.parse import urlsplit
+
+import aiohttp
+import brotli
+import zstandard
+
+from src._typing.errors import RequestError
+from src.scraper import ratelimit
+from src.scraper import retry
+from src.scraper import hedging
+
+
+# Connections kept open per provider host
+POOL_SIZE_PER_HOST = int(os.environ.get("SCRAPE_POOL_SIZE_PER_HOST", 10))
+KEEPALIVE_SECONDS = 60
+DEFAULT_TIMEOUT_SECONDS = 30
+
+# Only advertise what we can actually decode in-process
+SUPPORTED_ENCODINGS = ["gzip", "deflate", "br", "zstd"]
+
+# Headers curl sends unless the command sets its own, so requests go out
+# as request_builder's commands did under curl
+CURL_USER_AGENT = "curl/8.7.1"
+CURL_DEFAULT_HEADERS = {"User-Agent": CURL_USER_AGENT, "Accept": "*/*"}
+CURL_FORM_CONTENT_TYPE = "application/x-www-form-urlencoded"
+
+# curl flags that take no value
+_CURL_SWITCHES = {
+    "-s", "--silent", "-S", "--show-error", "-L", "--location",
+    "--compressed", "-k", "--insecure", "-g", "--globoff", "-i", "--include",
+    "-v", "--verbose",
+}
+_CURL_DATA_FLAGS = {"-d", "--data", "--data-raw", "--data-binary", "--data-ascii"}
+# Flags whose value we skip; the transport sets its own timeouts and keeps the body
+_CURL_IGNORED_OPTIONS = {
+    "-m", "--max-time", "--connect-timeout", "--retry", "-o", "--output",
+    "-w", "--write-out", "-x", "--proxy",
+}
+
+
+@dataclass
+class HttpRequest:
+    url: str
+    method: str = "GET"
+    headers: Dict[str, str] = field(default_factory=dict)
+    data: Optional[str] = None
+
+    @property
+    def host(self) -> str:
+        parts = urlsplit(self.url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+
+@dataclass
+class HttpResponse:
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    url: str
+
+    def json(self) -> Any:
+        # json.loads takes bytes directly, no intermediate str decode
+        return json.loads(self.body)
+
+    def raise_for_status(self, provider: str = None) -> None:
+        if self.status >= 400:
+            raise retry.error_for_status(
+                self.status,
+                f"HTTP {self.status} from {self.url}: {self.body[:200]!r}",
+                provider=provider,
+                headers=self.headers
+            )
+
+
+def call_timeout(timeout: float = DEFAULT_TIMEOUT_SECONDS) -> float:
+    """timeout, cut down to what is left before the current scrape's deadline"""
+    deadline = retry.current_deadline.get()
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise asyncio.TimeoutError("Scrape run deadline passed")
+    return min(timeout, remaining)
+
+
+def content_hash(data: Any) -> str:
+    """Stable hash of a decoded provider response (key order doesn't matter)"""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def parse_curl(cmd: str) -> HttpRequest:
+    """
+    Turn a request_builder curl command into an HttpRequest.
+
+    Args:
+        cmd: Shell curl command as built by request_builder
+
+    Returns:
+        HttpRequest with the same method, url, headers and body, plus the
+        headers curl adds on its own (User-Agent, Accept and, for a body,
+        the form Content-Type) where the command doesn't set them
+
+    Raises:
+        RequestError: On a flag this parser doesn't know, a flag missing its
+            value, or a command without a URL
+    """
+    tokens = shlex.split(cmd.replace("\\\n", " "))
+    if tokens and tokens[0] == "curl":
+        tokens = tokens[1:]
+
+    request = HttpRequest(url="")
+    explicit_method = None
+
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        value = tokens[i + 1] if i + 1 < len(tokens) else None
+        if value is None and token.startswith("-") and token not in _CURL_SWITCHES:
+            raise RequestError(f"curl flag {token} is missing its value: {cmd!r}")
+
+        if token in ("-H", "--header"):
+            name, _, header_value = value.partition(":")
+            request.headers[name.strip()] = header_value.strip()
+            i += 2
+        elif token in ("-X", "--request"):
+            explicit_method = value.upper()
+            i += 2
+        elif token in _CURL_DATA_FLAGS:
+            request.data = value if request.data is None else f"{request.data}&{value}"
+            i += 2
+        elif token in ("-b", "--cookie"):
+            request.headers["Cookie"] = value
+            i += 2
+        elif token in ("-A", "--user-agent"):
+            request.headers["User-Agent"] = value
+            i += 2
+        elif token in ("-e", "--referer"):
+            request.headers["Referer"] = value
+            i += 2
+        elif token == "--url":
+            request.url = value
+            i += 2
+        elif token in _CURL_SWITCHES:
+            i += 1
+        elif token in _CURL_IGNORED_OPTIONS:
+            i += 2
+        elif token.startswith("-"):
+            # Guessing whether it takes a value could swallow the URL
+            raise RequestError(f"Unsupported curl flag {token}: {cmd!r}")
+        else:
+            request.url = token
+            i += 1
+
+    if not request.url:
+        raise RequestError(f"No URL in curl command: {cmd!r}")
+    request.method = explicit_method or ("POST" if request.data is not None else "GET")
+
+    present = {name.lower() for name in request.headers}
+    defaults = dict(CURL_DEFAULT_HEADERS)
+    if request.data is not None:
+        # curl's -d/--data* default; aiohttp would send text/plain
+        defaults["Content-Type"] = CURL_FORM_CONTENT_TYPE
+    for name, value in defaults.items():
+        if name.lower() not in present:
+            request.headers[name] = value
+    return request
+
+
+def accept_encoding(requested: Optional[str]) -> str:
+    """Narrow an Accept-Encoding header to the codecs decode_body handles"""
+    if not requested:
+        return ", ".join(SUPPORTED_ENCODINGS)
+    wanted = [e.strip() for e in requested.split(",")]
+    kept = [e for e in wanted if e.split(";")[0].strip() in SUPPORTED_ENCODINGS]
+    return ", ".join(kept) or "identity"
+
+
+def decode_body(body: bytes, content_encoding: Optional[str]) -> bytes:
+    """Undo every Content-Encoding applied to a response body, in reverse"""
+    if not content_encoding:
+        return body
+
+    for encoding in reversed([e.strip().lower() for e in content_encoding.split(",")]):
+        if encoding in ("gzip", "x-gzip"):
+            body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            try:
+                body = zlib.decompress(body)
+            except zlib.error:
+                # Some servers send raw deflate without the zlib header
+                body = zlib.decompress(body, -zlib.MAX_WBITS)
+        elif encoding == "br":
+            body = brotli.decompress(body)
+        elif encoding == "zstd":
+            body = zstandard.ZstdDecompressor().decompressobj().decompress(body)
+        elif encoding in ("identity", ""):
+            continue
+        else:
+            raise RequestError(f"Unsupported Content-Encoding: {encoding}")
+    return body
+
+
+class Transport:
+    """
+    One aiohttp session (and connection pool) per provider host.
+
+    Must be created and closed on the event loop that uses it:
+
+        async with Transport() as transport:
+            response = await transport.request(parse_curl(cmd))
+    """
+
+    def __init__(self, pool_size_per_host: int = None, timeout: float = DEFAULT_TIMEOUT_SECONDS,
+                 limiter: ratelimit.RateLimiter = None, retry_policy: retry.RetryPolicy = None,
+                 hedger: hedging.Hedger = None):
+        self.pool_size_per_host = pool_size_per_host or POOL_SIZE_PER_HOST
+        self.timeout = timeout
+        self.limiter = limiter or ratelimit.limiter
+        self.retry_policy = retry_policy or retry.policy
+        self.hedger = hedger or hedging.hedger
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _session(self, host: str) -> aiohttp.ClientSession:
+        session = self._sessions.get(host)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.pool_size_per_host,
+                keepalive_timeout=KEEPALIVE_SECONDS,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                # Bodies are decoded in decode_body so br/zstd work the same as gzip
+                auto_decompress=False,
+                # Cookies come from request_builder, never from a previous response
+                cookie_jar=aiohttp.DummyCookieJar(),
+            )
+            self._sessions[host] = session
+        return session
+
+    async def request(self, request: HttpRequest, timeout: float = None,
+                      course_name: str = None) -> HttpResponse:
+        """
+        Send a request once its host's rate budget allows, retrying transient failures.
+
+        Args:
+            course_name: Course the request is for; selects its configured rate limit
+        """
+        return await self.retry_policy.send(
+            lambda: self._send(request, timeout, course_name),
+            label=course_name or request.host
+        )
+
+    async def _send(self, request: HttpRequest, timeout: float = None,
+                    course_name: str = None) -> HttpResponse:
+        await self.limiter.acquire(request.host, course_name)
+        # Checked after the rate limit wait, which can be long
+        timeout = call_timeout(timeout or self.timeout)
+
+        return await self.hedger.send(
+            request.host,
+            request.method,
+            lambda: self._fetch(request, timeout),
+            lambda: self.limiter.try_acquire(request.host, course_name)
+        )
+
+    async def _fetch(self, request: HttpRequest, timeout: float) -> HttpResponse:
+        headers = dict(request.headers)
+        encoding_header = next((k for k in headers if k.lower() == "accept-encoding"), "Accept-Encoding")
+        headers[encoding_header] = accept_encoding(headers.get(encoding_header))
+
+        session = self._session(request.host)
+        async with session.request(
+            request.method,
+            request.url,
+            headers=headers,
+            data=request.data,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as response:
+            raw = await response.read()
+            return HttpResponse(
+                status=response.status,
+                headers=dict(response.headers),
+                body=decode_body(raw, response.headers.get("Content-Encoding")),
+                url=str(response.url),
+            )
+
+    async def close(self) -> None:
+        sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            await session.close()
+
+
+def run_sync(adapter, coro_fn, *args):
+    """
+    Run an adapter coroutine from sync code.
+
+    Uses the adapter's transport when it has one, otherwise opens a
+    short-lived one for the call.
+    """
+    async def _run():
+        if adapter.transport is not None:
+            return await coro_fn(*args)
+        async with Transport() as transport:
+            adapter.transport = transport
+            try:
+                return await coro_fn(*args)
+            finally:
+                adapter.transport = None
+
+    return asyncio.run(_run())
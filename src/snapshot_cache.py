@@ -0,0 +1,113 @@
+"""
+Versioned in-memory snapshots of expensive reads.
+
+Writers call invalidate() after they commit; the next read rebuilds the
+snapshot exactly once (single flight) while everyone else keeps being
+served the previous snapshot. Reads of a current snapshot take no lock.
+
+invalidate() only reaches the writer's own process. Writes from other
+processes (e.g. a separate scheduler) are picked up through an optional
+shared version, such as a counter row every writer bumps, polled at most
+once every check_interval seconds.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: int
+    data: Any
+    built_at: float
+
+
+class SnapshotCache:
+    """Holds the latest Snapshot produced by builder"""
+
+    def __init__(self,
+                 builder: Callable[[], Any],
+                 max_age: Optional[float] = None,
+                 shared_version: Optional[Callable[[], int]] = None,
+                 check_interval: float = 5.0):
+        """
+        Args:
+            builder: Produces the snapshot data (e.g. a DB query)
+            max_age: Optional safety expiry in seconds, for changes no
+                writer reports (time-based filters)
+            shared_version: Optional reader of a version every process's
+                writers bump; a change invalidates this process's snapshot
+            check_interval: Seconds between shared_version reads
+        """
+        self.builder = builder
+        self.max_age = max_age
+        self.shared_version = shared_version
+        self.check_interval = check_interval
+        self._shared_seen: Optional[int] = None
+        self._checked_at: Optional[float] = None
+        self._version = 0
+        self._snapshot: Optional[Snapshot] = None
+        self._rebuild_lock = threading.Lock()
+        self._version_lock = threading.Lock()
+
+    def _is_current(self, snapshot: Optional[Snapshot]) -> bool:
+        if snapshot is None or snapshot.version != self._version:
+            return False
+        if self.max_age is not None and time.time() - snapshot.built_at > self.max_age:
+            return False
+        return True
+
+    def invalidate(self) -> int:
+        """Mark the current snapshot stale; returns the new version"""
+        with self._version_lock:
+            self._version += 1
+            return self._version
+
+    def _check_shared_version(self) -> None:
+        """Invalidate when another process's write moved the shared version"""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            shared = self.shared_version()
+        except Exception:
+            # Keep serving; max_age still bounds how stale this gets
+            logger.exception("Reading the shared snapshot version failed")
+            return
+        if shared != self._shared_seen:
+            if self._shared_seen is not None:
+                self.invalidate()
+            self._shared_seen = shared
+
+    def get(self) -> Snapshot:
+        """Current snapshot, rebuilding it at most once across concurrent callers"""
+        if self.shared_version is not None:
+            self._check_shared_version()
+        snapshot = self._snapshot
+        if self._is_current(snapshot):
+            return snapshot
+
+        # Someone else is already rebuilding: serve what we have rather than pile on
+        if snapshot is not None and not self._rebuild_lock.acquire(blocking=False):
+            return snapshot
+        if snapshot is None:
+            self._rebuild_lock.acquire()
+
+        try:
+            snapshot = self._snapshot
+            if self._is_current(snapshot):
+                return snapshot
+
+            # Read the version before building so a write landing mid-build
+            # leaves this snapshot stale instead of hiding the write
+            version = self._version
+            snapshot = Snapshot(version=version, data=self.builder(), built_at=time.time())
+            self._snapshot = snapshot
+            return snapshot
+        finally:
+            self._rebuild_lock.release()
@@ -0,0 +1,64 @@
+"""
+    Pre-serialized, precompressed JSON bodies with ETag revalidation.
+
+    A payload is encoded once (JSON bytes plus gzip and br) and then served
+    to every client with a dict lookup; clients that send a matching
+    If-None-Match get a 304.
+
+    Each encoding is its own representation, so each gets its own strong
+    ETag: the content hash, suffixed with the content-coding for compressed
+    bodies. Any of them revalidates the payload, whichever encoding the
+    client is served now.
+"""
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+import brotli
+from flask import Response, request
+
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+
+
+@dataclass(frozen=True)
+class EncodedPayload:
+    etag: str  # content hash; the identity body's ETag
+    bodies: Dict[str, bytes] = field(default_factory=dict)  # content-coding -> body
+
+    @classmethod
+    def from_data(cls, data: Any) -> 'EncodedPayload':
+        body = json.dumps(data, separators=(",", ":"), sort_keys=True, default=str).encode()
+        bodies = {
+            "identity": body,
+            "gzip": gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0),
+            "br": brotli.compress(body, quality=BROTLI_QUALITY),
+        }
+
+        # Content hash rather than a process-local version, so every worker
+        # hands out the same ETag for the same data
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        return cls(etag=etag, bodies=bodies)
+
+    def etag_for(self, encoding: str) -> str:
+        return self.etag if encoding == "identity" else f"{self.etag}-{encoding}"
+
+    def response(self) -> Response:
+        """Serve this payload for the current request (304, or best encoding)"""
+        encoding = request.accept_encodings.best_match(("br", "gzip"), default="identity")
+        # If-None-Match uses the weak comparison, so W/"..." validators match too
+        if any(request.if_none_match.contains_weak(self.etag_for(e)) for e in self.bodies):
+            response = Response(status=304)
+        else:
+            response = Response(self.bodies[encoding], mimetype="application/json")
+            if encoding != "identity":
+                response.headers["Content-Encoding"] = encoding
+
+        response.set_etag(self.etag_for(encoding))
+        response.headers["Vary"] = "Accept-Encoding"
+        # Let pollers cache the body but always revalidate it
+        response.headers["Cache-Control"] = "no-cache"
+        return response
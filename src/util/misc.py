@@ -1,5 +1,70 @@
 from datetime import datetime, timedelta, date as dt_date
+import re
+import pytz
+
+
+# Every course we list keeps its tee sheet in Mountain time
+COURSE_TZ = pytz.timezone('America/Denver')
+
+# 24-hour H:MM / HH:MM[:SS], as the tee sheets send start times
+CLOCK_TIME = re.compile(r'^(\d{1,2}):(\d{2})(?::\d{2})?$')
 
 
 def current_date():
     return dt_date.today().strftime("%Y-%m-%d")
+
+
+def course_today() -> dt_date:
+    """Today's date at the courses"""
+    return datetime.now(COURSE_TZ).date()
+
+
+def parse_date(value: str) -> dt_date:
+    """
+    YYYY-MM-DD string to a date.
+
+    Raises:
+        ValueError: If value is not a YYYY-MM-DD date
+    """
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def minute_of_day(value: str) -> int:
+    """
+    Minutes since midnight for a tee sheet time ("7:39", "07:39", "07:39:00"
+    or an ISO timestamp, whose own wall-clock time is used).
+
+    Raises:
+        ValueError: If value is none of those (e.g. "4:30 PM")
+    """
+    if 'T' in value:
+        try:
+            moment = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Invalid time: {value}")
+        return moment.hour * 60 + moment.minute
+
+    match = CLOCK_TIME.match(value)
+    if match is None:
+        raise ValueError(f"Invalid time: {value}")
+    hour, minute = int(match.group(1)), int(match.group(2))
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Invalid time: {value}")
+    return hour * 60 + minute
+
+
+def tee_time_epoch(day: dt_date, minute: int) -> int:
+    """UTC epoch seconds of a course-local date and minute of day"""
+    local = COURSE_TZ.localize(datetime.combine(day, datetime.min.time()) + timedelta(minutes=minute))
+    return int(local.timestamp())
+
+
+def temporal_columns(date_str: str, start_time: str) -> dict:
+    """tee_date / start_minute / starts_at for a cached tee time's date and start_time"""
+    day = parse_date(date_str)
+    minute = minute_of_day(start_time)
+    return {
+        'tee_date': day,
+        'start_minute': minute,
+        'starts_at': tee_time_epoch(day, minute),
+    }
@@ -0,0 +1,101 @@
+"""
+    Opaque keyset (cursor) pagination helpers.
+
+    A cursor is the sort key of the last row on a page, base64 encoded; the
+    next page is "rows strictly after that key", which an index on the sort
+    columns answers without scanning skipped rows the way OFFSET does.
+
+    ?offset= is still accepted for clients of the old offset pages, and
+    their responses keep the exact total; both go away in the next release.
+"""
+import base64
+import json
+from typing import Any, Callable, List, Optional
+
+from sqlalchemy import text, tuple_
+
+from src.models import db
+
+
+def encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: List[Callable[[Any], Any]]) -> List[Any]:
+    """
+    Args:
+        cursor: Value previously returned as next_cursor
+        types: One parser per sort column (e.g. int, datetime.fromisoformat),
+            applied to the value the cursor carries for it
+
+    Raises:
+        ValueError: If the cursor is malformed or a value doesn't parse
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+    try:
+        return [parse(value) for parse, value in zip(types, values)]
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("Invalid cursor")
+
+
+def page_start(cursor: Optional[str], offset: int, types: List[Callable[[Any], Any]]):
+    """
+    Where a page starts: (cursor values, offset), at most one of them set.
+
+    Raises:
+        ValueError: If the cursor is malformed, the offset negative, or both are given
+    """
+    if offset < 0:
+        raise ValueError("offset must not be negative")
+    if cursor and offset:
+        raise ValueError("Pass either cursor or offset, not both")
+    return (decode_cursor(cursor, types) if cursor else None), offset
+
+
+def after(columns: list, values: List[Any], descending: bool = False):
+    """Row-value predicate selecting rows past the cursor in sort order"""
+    if descending:
+        return tuple_(*columns) < tuple_(*values)
+    return tuple_(*columns) > tuple_(*values)
+
+
+def paginate(query, columns: list, cursor_values: Optional[List[Any]], limit: int,
+             descending: bool = False, offset: int = 0):
+    """
+    Apply keyset ordering and one page of limit to a query.
+
+    Args:
+        offset: Rows to skip, for the deprecated offset pages
+
+    Returns:
+        (rows, has_more)
+    """
+    if cursor_values is not None:
+        query = query.filter(after(columns, cursor_values, descending))
+    order = [c.desc() if descending else c.asc() for c in columns]
+    rows = query.order_by(None).order_by(*order).offset(offset or None).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
+
+def estimated_count(query) -> Optional[int]:
+    """
+    Planner row estimate for a query instead of a COUNT(*).
+
+    Returns None where the database has no planner statistics to ask (SQLite).
+    """
+    if db.engine.dialect.name != "postgresql":
+        return None
+
+    sql = str(query.order_by(None).statement.compile(
+        db.engine, compile_kwargs={"literal_binds": True}))
+    plan = db.session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
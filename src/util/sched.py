@@ -1,10 +1,13 @@
 import inspect
 import logging
-from flask import Flask
+import os
+from flask import Flask, current_app
 from datetime import datetime, timedelta
 
-from src.scraper import scraper
-from src.cache_service import TeeTimeCacheService
+from src.scraper import engine
+from src.scraper.planner import AdaptivePlanner
+from src.demand import demand
+from src.cache_service import TeeTimeCacheService, IngestStats
 from src.util import misc
 from apscheduler.schedulers.background import BackgroundScheduler
 
@@ -12,65 +15,68 @@ from apscheduler.schedulers.background import BackgroundScheduler
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# How often the adaptive scrape job looks for due (course, date) pairs; no
+# longer than the release burst interval
+SCRAPE_TICK_MINUTES = float(os.environ.get("SCRAPE_TICK_MINUTES", 1))
+
 
 class ScheduledJobs:
 
     def __init__(self, app: Flask = None):
         self.app = app
+        self.planner = AdaptivePlanner(demand=demand)
 
 
     def test_job(self):
         print("TEST JOB RAN")
 
 
-    def run_get_all_tee_times(self, days_offset=0):
-        """Scheduled job to scrape and cache tee times from all providers"""
-        job_name = f"run_get_all_tee_times_+{days_offset}_days"
-        logger.info(f"Starting scheduled job: {job_name}")
+    def cleanup_tee_time_cache(self):
+        """Scheduled job to drop past tee dates and create upcoming date partitions"""
+        def _execute_job():
+            try:
+                TeeTimeCacheService.cleanup_old_entries()
+                return True
+            except Exception as e:
+                logger.error(f"Job cleanup_tee_time_cache failed with error: {str(e)}", exc_info=True)
+                return False
+
+        if self.app:
+            with self.app.app_context():
+                return _execute_job()
+        else:
+            return _execute_job()
+
 
-        # Use Flask app context if provided
+    def run_adaptive_scrape(self):
+        """
+        Scheduled tick: scrape the (course, date) pairs the planner says are
+        due, then feed what changed back into their refresh rates
+        """
         def _execute_job():
             try:
-                # Calculate target date based on offset
-                base_date = datetime.now().date()
-                target_date = base_date + timedelta(days=days_offset)
-                target_date_str = target_date.strftime('%Y-%m-%d')
-
-                logger.info(f"Scraping tee times for date: {target_date_str} (offset: +{days_offset} days)")
-
-                # Scrape ChronoGolf
-                c_tee_times = scraper.chronogolf_tee_times(target_date_str)
-                if c_tee_times:
-                    TeeTimeCacheService.cache_tee_times(c_tee_times, 'chronogolf')
-                    logger.info(f"Cached {len(c_tee_times)} ChronoGolf tee times")
-                else:
-                    logger.warning("No ChronoGolf tee times found")
-
-                # Scrape ForeUp
-                f_tee_times = scraper.foreup_tee_times(target_date_str)
-                if f_tee_times:
-                    TeeTimeCacheService.cache_tee_times(f_tee_times, 'foreup')
-                    logger.info(f"Cached {len(f_tee_times)} ForeUp tee times")
-                else:
-                    logger.warning("No ForeUp tee times found")
-
-                # Scrape Eaglewood
-                e_tee_times = scraper.eaglewood_tee_times(target_date_str)
-                if e_tee_times:
-                    TeeTimeCacheService.cache_tee_times(e_tee_times, 'eaglewood')
-                    logger.info(f"Cached {len(e_tee_times)} Eaglewood tee times")
-                else:
-                    logger.warning("No Eaglewood tee times found")
-
-                total_tee_times = len(c_tee_times or []) + len(f_tee_times or []) + len(e_tee_times or [])
-                logger.info(f"Job {job_name} completed successfully. Total tee times: {total_tee_times}")
+                tasks = self.planner.plan()
+                if not tasks:
+                    return True
+                logger.info(f"Adaptive scrape of {len(tasks)} (course, date) pairs ({self.planner.summary()})")
+
+                def on_date_done(date, results):
+                    stats = self._ingest_date(date, results)
+                    for result in results:
+                        changes = 0 if result.unchanged else \
+                            stats.by_scope.get((result.task.course_name, result.task.date), 0)
+                        self.planner.record(result, changes)
+
+                previous_hashes = TeeTimeCacheService.get_fingerprints([t.key for t in tasks])
+                results = engine.run_tasks(tasks, previous_hashes=previous_hashes,
+                                           on_date_done=self._in_own_app_context(on_date_done))
+                self._log_run("run_adaptive_scrape", results)
                 return True
 
             except Exception as e:
-                logger.error(f"Job {job_name} failed with error: {str(e)}", exc_info=True)
+                logger.error(f"Job run_adaptive_scrape failed with error: {str(e)}", exc_info=True)
                 return False
 
-        # Execute with or without Flask context
         if self.app:
             with self.app.app_context():
                 return _execute_job()
@@ -78,6 +84,66 @@ class ScheduledJobs:
             return _execute_job()
 
 
+    def _log_run(self, job_name, results):
+        """Log a scrape run's skip rate of unchanged responses, coverage and tee time count"""
+        fetched = [r for r in results if r.ok]
+        unchanged = sum(1 for r in fetched if r.unchanged)
+        total_tee_times = sum(len(r.tee_times) for r in fetched)
+        logger.info(
+            f"Skipped {unchanged}/{len(fetched)} unchanged provider responses "
+            f"({(unchanged / len(fetched)) if fetched else 0:.0%} skip rate)")
+        logger.info(f"Coverage for {job_name}: {engine.coverage(results)}")
+        logger.info(f"Job {job_name} completed successfully. Total tee times: {total_tee_times}")
+
+
+    def _in_own_app_context(self, on_date_done):
+        """
+        Wrap an engine on_date_done callback, which runs on a worker thread, so
+        it gets its own app context and so its own DB session
+        """
+        app = self.app or current_app._get_current_object()
+
+        def wrapped(date, results):
+            with app.app_context():
+                return on_date_done(date, results)
+        return wrapped
+
+
+    def _ingest_date(self, date, results):
+        """Cache one date's scrape results per provider, record their fingerprints and flag stale pairs"""
+        failed = [r.task.course_name for r in results if not r.ok and not r.skipped and not r.timed_out]
+        if failed:
+            logger.warning(f"Scrape failed on {date} for: {', '.join(failed)}")
+        timed_out = [r.task.course_name for r in results if r.timed_out]
+        if timed_out:
+            logger.warning(f"Run deadline passed before {date} finished for: {', '.join(timed_out)}")
+        skipped = [r.task.course_name for r in results if r.skipped]
+        if skipped:
+            logger.warning(f"Skipped {date} for courses with an open circuit: {', '.join(skipped)}")
+
+        total = IngestStats()
+        for provider in ('chronogolf', 'foreup', 'eaglewood'):
+            scopes = engine.collect_scopes(results, provider)
+            if not scopes:
+                continue
+            tee_times = engine.collect_tee_times(results, provider)
+            total += TeeTimeCacheService.cache_tee_times(tee_times, provider, scopes)
+
+        # Fingerprints are saved only once their tee times are committed
+        TeeTimeCacheService.save_fingerprints({
+            r.task.key: r.content_hash
+            for r in results if r.ok and r.content_hash and not r.unchanged
+        })
+
+        # Pairs without an answer keep their slots, flagged stale rather than closed;
+        # an unchanged answer confirms the cached slots again
+        TeeTimeCacheService.mark_stale(engine.collect_stale_scopes(results))
+        TeeTimeCacheService.mark_stale(
+            [(r.task.course_name, r.task.date) for r in results if r.ok and r.unchanged], stale=False)
+        logger.info(f"Ingested {date}: {total}")
+        return total
+
+
 def add_jobs(scheduler: BackgroundScheduler, app: Flask = None) -> BackgroundScheduler:
     """Add scheduled jobs to the scheduler with explicit registration"""
 
@@ -98,38 +164,28 @@ def add_jobs(scheduler: BackgroundScheduler, app: Flask = None) -> BackgroundSch
                 'start_date': datetime.now() + timedelta(seconds=10),  # Start immediately
                 # 'start_date': datetime.now(),  # Start immediately
             },
-            # CURRENT DAY RUN
-            {
-                'func': lambda: sj.run_get_all_tee_times(days_offset=0),
-                'trigger': 'interval',
-                'hours': 3,
-                'id': 'run_tee_times_TODAY',
-                'name': 'scrape_cache_tee_times_TODAY',
-                'replace_existing': True,
-                'max_instances': 1,  # Prevent overlapping executions
-                'start_date': datetime.now() + timedelta(seconds=10),
-            },
-             # CURRENT DAY + 1 DAY (E.G. TOMORROW)
+            # RETENTION / PARTITION MAINTENANCE
             {
-                'func': lambda: sj.run_get_all_tee_times(days_offset=1),
+                'func': sj.cleanup_tee_time_cache,
                 'trigger': 'interval',
-                'hours': 12,
-                'id': 'run_tee_times_TOMORROW',
-                'name': 'scrape_cache_tee_times_TOMORROW',
+                'hours': 24,
+                'id': 'cleanup_tee_time_cache',
+                'name': 'cleanup_tee_time_cache',
                 'replace_existing': True,
                 'max_instances': 1,  # Prevent overlapping executions
-                'start_date': datetime.now() + timedelta(seconds=30),
+                'start_date': datetime.now() + timedelta(seconds=5),
             },
-             # CURRENT DATE + 2 DAYS (E.G. DAY AFTER TOMORROW)
+            # TODAY THROUGH THE BOOKING HORIZON (engine.HORIZON_DAYS), each
+            # (course, date) at the rate its tee sheet changes
             {
-                'func': lambda: sj.run_get_all_tee_times(days_offset=2),
+                'func': sj.run_adaptive_scrape,
                 'trigger': 'interval',
-                'hours': 24,
-                'id': 'run_tee_times_DAY_AFTER_TOMORROW',
-                'name': 'scrape_cache_tee_times_DAY_AFTER_TOMORROW',
+                'minutes': SCRAPE_TICK_MINUTES,
+                'id': 'run_tee_times_ADAPTIVE',
+                'name': 'scrape_cache_tee_times_ADAPTIVE',
                 'replace_existing': True,
                 'max_instances': 1,  # Prevent overlapping executions
-                'start_date': datetime.now() + timedelta(seconds=100),
+                'start_date': datetime.now() + timedelta(seconds=10),
             }
         ]
 
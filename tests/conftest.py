@@ -0,0 +1,16 @@
+import pytest
+from flask import Flask
+
+from src.models import db, init_db
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Flask app on a fresh SQLite database, migrated; runs the test inside its app context"""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'tee_times.db'}")
+    app = Flask(__name__)
+    init_db(app)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,55 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    """Test client of the API on its own SQLite database"""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('DATABASE_URL', f"sqlite:///{tmp_path_factory.mktemp('api') / 'tee_times.db'}")
+        # The provider adapters need src.misc.request_builder
+        api = pytest.importorskip("src.app")
+    yield api.app.test_client()
+    api.RequestLogger.sink.stop()
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit():
+    from src.util import traffic
+    traffic.rate_limit_storage.clear()
+
+
+@pytest.mark.parametrize("limit, expected", [(0, 1), (-5, 1), (20, 20), (10_000, 500)])
+def test_search_limit_is_clamped(client, limit, expected):
+    response = client.get(f"/api/search?limit={limit}")
+
+    assert response.status_code == 200
+    assert response.json["filters"]["limit"] == expected
+
+
+@pytest.mark.parametrize("query", [
+    "sort=distance",
+    "holes=27",
+    "party_size=0",
+    "party_size=5",
+    "fields=list,secret",
+    "date_from=tomorrow",
+    "time_to=4:30%20PM",
+])
+def test_search_rejects_bad_filters_with_400(client, query):
+    response = client.get(f"/api/search?{query}")
+
+    assert response.status_code == 400
+    assert "error" in response.json
+
+
+def test_raw_payload_of_a_missing_tee_time_is_404(client):
+    response = client.get("/api/tee_times/999999/raw")
+
+    assert response.status_code == 404
+    assert response.json == {"error": "Tee time 999999 not found"}
+
+
+def test_unknown_fields_are_rejected_with_400(client):
+    response = client.get("/api/search?fields=raw")
+
+    assert response.status_code == 400
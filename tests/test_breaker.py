@@ -0,0 +1,120 @@
+import pytest
+
+from src.scraper import breaker
+from src.scraper.breaker import BreakerBoard, CLOSED, OPEN, HALF_OPEN
+
+KEY = ("chronogolf", "Bonneville Golf Course")
+
+
+@pytest.fixture
+def board():
+    return BreakerBoard(failure_threshold=3)
+
+
+def trip(board, now):
+    for _ in range(board.failure_threshold):
+        transition = board.record_failure(KEY, now=now)
+    return transition
+
+
+def test_opens_after_threshold_consecutive_failures(board):
+    assert board.record_failure(KEY, now=100) is None
+    assert board.record_failure(KEY, now=100) is None
+    assert board.state(KEY) == CLOSED
+
+    assert board.record_failure(KEY, now=100) == OPEN
+    assert board.state(KEY) == OPEN
+
+
+def test_success_resets_the_failure_count(board):
+    board.record_failure(KEY, now=100)
+    board.record_failure(KEY, now=100)
+    assert board.record_success(KEY) is None
+
+    assert board.record_failure(KEY, now=100) is None
+    assert board.state(KEY) == CLOSED
+
+
+def test_open_breaker_skips_until_cooldown_then_probes_once(board):
+    trip(board, now=100)
+    retry_at = 100 + breaker.BASE_COOLDOWN
+
+    assert board.allow(KEY, now=retry_at - 1) is None
+    assert board.blocked(KEY, now=retry_at - 1)
+    assert not board.blocked(KEY, now=retry_at)
+
+    assert board.allow(KEY, now=retry_at) == HALF_OPEN
+    # Only one probe in flight
+    assert board.allow(KEY, now=retry_at) is None
+    assert board.blocked(KEY, now=retry_at)
+
+
+def test_probe_success_closes(board):
+    trip(board, now=100)
+    board.allow(KEY, now=100 + breaker.BASE_COOLDOWN)
+
+    assert board.record_success(KEY) == CLOSED
+    assert board.state(KEY) == CLOSED
+    assert board.allow(KEY, now=1000) == CLOSED
+
+
+def test_probe_failure_reopens_with_doubled_cooldown(board):
+    trip(board, now=1000)
+    first_retry = 1000 + breaker.BASE_COOLDOWN
+    board.allow(KEY, now=first_retry)
+
+    assert board.record_failure(KEY, now=first_retry) == OPEN
+    assert board.allow(KEY, now=first_retry + 2 * breaker.BASE_COOLDOWN - 1) is None
+    assert board.allow(KEY, now=first_retry + 2 * breaker.BASE_COOLDOWN) == HALF_OPEN
+
+
+def test_cooldown_doubles_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(breaker, "BASE_COOLDOWN", 60)
+    monkeypatch.setattr(breaker, "MAX_COOLDOWN", 300)
+    circuit = breaker.CircuitBreaker()
+
+    cooldowns = []
+    for trips in range(1, 6):
+        circuit.trips = trips
+        cooldowns.append(circuit.cooldown())
+    assert cooldowns == [60, 120, 240, 300, 300]
+
+
+def test_late_success_does_not_close_an_open_breaker(board):
+    trip(board, now=100)
+
+    # A fetch admitted before the breaker opened
+    assert board.record_success(KEY) is None
+    assert board.state(KEY) == OPEN
+
+
+def test_released_probe_goes_out_again_without_a_failure(board):
+    trip(board, now=1000)
+    retry_at = 1000 + breaker.BASE_COOLDOWN
+    board.allow(KEY, now=retry_at)
+
+    board.release_probe(KEY)
+
+    assert board.state(KEY) == OPEN
+    assert board.allow(KEY, now=retry_at) == HALF_OPEN
+    # Still on the first trip's cooldown
+    board.record_failure(KEY, now=retry_at)
+    assert board.allow(KEY, now=retry_at + 2 * breaker.BASE_COOLDOWN) == HALF_OPEN
+
+
+def test_release_probe_leaves_closed_breakers_alone(board):
+    board.record_failure(KEY, now=1000)
+    board.release_probe(KEY)
+    board.release_probe(("chronogolf", "never seen"))
+
+    assert board.state(KEY) == CLOSED
+    assert board.record_failure(KEY, now=1000) is None
+    assert board.record_failure(KEY, now=1000) == OPEN
+
+
+def test_summary_lists_only_tripped_breakers(board):
+    other = ("foreup", "Bountiful Ridge Golf Course")
+    board.record_failure(other, now=1000)
+    trip(board, now=1000)
+
+    assert list(board.summary()) == ["chronogolf/Bonneville Golf Course"]
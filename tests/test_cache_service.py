@@ -0,0 +1,330 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.dialects import postgresql
+
+from src import partitions
+from src._typing.structs import TeeTime
+from src.cache_service import TeeTimeCacheService, _holes_contains, _snapshot_version
+from src.models import db, TeeTimeCache, TEE_TIME_FIELD_PROFILES, resolve_tee_time_fields
+from src.util import misc
+
+COURSE = "Bonneville"
+DATE = "2030-06-01"
+SCOPE = (COURSE, DATE)
+
+
+def tee_time(start: str, date: str = DATE, **fields) -> TeeTime:
+    values = dict(
+        date=date,
+        start_time_unf=start,
+        course_name=COURSE,
+        holes=[18],
+        booking_url="https://example.com/book",
+        provider="chronogolf",
+        is_available=True,
+        green_fee=40.0,
+        price=40.0,
+        subtotal=40.0,
+        max_num_players=4,
+    )
+    values.update(fields)
+    return TeeTime(**values)
+
+
+def rows(date: str = DATE) -> dict:
+    """start_time -> row of COURSE on date"""
+    return {r.start_time: r for r in TeeTimeCache.query.filter_by(course_name=COURSE, date=date)}
+
+
+@pytest.fixture
+def ingest(app):
+    def ingest(tee_times, **kwargs):
+        stats = TeeTimeCacheService.cache_tee_times(tee_times, **kwargs)
+        db.session.expire_all()
+        return stats
+    return ingest
+
+
+def test_first_ingest_inserts_every_slot(ingest):
+    stats = ingest([tee_time("07:00"), tee_time("07:10")])
+
+    assert (stats.inserted, stats.updated, stats.closed, stats.unchanged) == (2, 0, 0, 0)
+    assert stats.by_scope == {SCOPE: 2}
+    stored = rows()
+    assert set(stored) == {"07:00", "07:10"}
+    assert all(r.is_available and not r.is_stale for r in stored.values())
+    assert stored["07:00"].start_minute == 7 * 60
+
+
+def test_duplicate_slots_in_one_batch_are_written_once(ingest):
+    stats = ingest([tee_time("07:00", max_num_players=2), tee_time("07:00", max_num_players=3)])
+
+    assert stats.inserted == 1
+    assert rows()["07:00"].players_available == 3
+
+
+def test_identical_scrape_writes_nothing(ingest):
+    ingest([tee_time("07:00"), tee_time("07:10")])
+    first_seen = rows()["07:00"].updated_at
+
+    stats = ingest([tee_time("07:00"), tee_time("07:10")])
+
+    assert (stats.changed, stats.unchanged) == (0, 2)
+    assert stats.by_scope == {}
+    assert rows()["07:00"].updated_at == first_seen
+
+
+def test_changed_slot_is_updated_in_place(ingest):
+    ingest([tee_time("07:00"), tee_time("07:10")])
+    original = rows()["07:00"]
+    original_id, created_at = original.id, original.created_at
+
+    stats = ingest([tee_time("07:00", max_num_players=2, price=35.0), tee_time("07:10")])
+
+    assert (stats.inserted, stats.updated, stats.unchanged) == (0, 1, 1)
+    assert stats.by_scope == {SCOPE: 1}
+    updated = rows()["07:00"]
+    assert (updated.id, updated.created_at) == (original_id, created_at)
+    assert (updated.players_available, updated.price) == (2, 35.0)
+    assert updated.updated_at > created_at
+
+
+def test_slot_missing_from_scrape_is_closed_once(ingest):
+    ingest([tee_time("07:00"), tee_time("07:10")])
+
+    stats = ingest([tee_time("07:00")])
+    assert (stats.closed, stats.unchanged) == (1, 1)
+    assert stats.by_scope == {SCOPE: 1}
+    assert not rows()["07:10"].is_available
+
+    # Already closed: nothing left to write
+    stats = ingest([tee_time("07:00")])
+    assert stats.changed == 0
+
+
+def test_closed_slot_reopens_when_seen_again(ingest):
+    ingest([tee_time("07:00"), tee_time("07:10")])
+    ingest([tee_time("07:00")])
+
+    stats = ingest([tee_time("07:00"), tee_time("07:10")])
+
+    assert (stats.inserted, stats.updated) == (0, 1)
+    assert rows()["07:10"].is_available
+
+
+def test_empty_scrape_closes_its_scope_only(ingest):
+    other_date = "2030-06-02"
+    ingest([tee_time("07:00"), tee_time("07:00", date=other_date)])
+
+    stats = ingest([], scopes=[SCOPE])
+
+    assert stats.closed == 1
+    assert stats.by_scope == {SCOPE: 1}
+    assert not rows()["07:00"].is_available
+    assert rows(other_date)["07:00"].is_available
+
+
+def test_scrape_clears_stale_flag_without_counting_a_change(ingest):
+    ingest([tee_time("07:00"), tee_time("07:10")])
+    assert TeeTimeCacheService.mark_stale([SCOPE]) == 2
+
+    stats = ingest([tee_time("07:00"), tee_time("07:10")])
+
+    assert stats.changed == 0
+    assert not any(r.is_stale for r in rows().values())
+
+
+def test_insert_racing_a_concurrent_writer_upserts(ingest, monkeypatch):
+    # Another writer stores the slot after this ingest loaded its scope
+    # but before it inserts; ON CONFLICT must take the row over, not fail
+    ensure_partitions = partitions.ensure_partitions
+
+    def concurrent_insert(dates=None):
+        row = TeeTimeCacheService._slot_row(tee_time("07:00", max_num_players=1), None, datetime.utcnow())
+        db.session.add(TeeTimeCache(**row))
+        db.session.flush()
+        ensure_partitions(dates)
+
+    monkeypatch.setattr(partitions, "ensure_partitions", concurrent_insert)
+
+    stats = ingest([tee_time("07:00", max_num_players=4)])
+
+    assert stats.inserted == 1
+    assert TeeTimeCache.query.count() == 1
+    assert rows()["07:00"].players_available == 4
+
+
+@pytest.mark.parametrize("start", ["not a time", "4:30 PM", "12:15 AM", "7:3"])
+def test_malformed_tee_time_is_skipped(ingest, start):
+    stats = ingest([tee_time("07:00"), tee_time(start)])
+
+    assert (stats.inserted, stats.skipped) == (1, 1)
+    assert set(rows()) == {"07:00"}
+
+
+def test_stats_accumulate_across_ingests(ingest):
+    first = ingest([tee_time("07:00"), tee_time("07:10")])
+    second = ingest([tee_time("07:00", price=30.0)])
+
+    total = first + second
+    assert (total.inserted, total.updated, total.closed) == (2, 1, 1)
+    assert total.by_scope == {SCOPE: 4}
+
+
+def test_cleanup_cuts_off_at_the_courses_today(ingest, monkeypatch):
+    monkeypatch.setattr(misc, "course_today", lambda: date(2030, 6, 2))
+    ingest([tee_time("07:00", date="2030-06-01"), tee_time("20:00", date="2030-06-02")])
+
+    TeeTimeCacheService.cleanup_old_entries()
+
+    assert [r.date for r in TeeTimeCache.query] == ["2030-06-02"]
+
+
+def test_partitions_before_today_are_always_rechecked(monkeypatch):
+    monkeypatch.setattr(misc, "course_today", lambda: date(2030, 6, 2))
+    monkeypatch.setattr(partitions, "_known_partitions", {
+        partitions.partition_name(date(2030, 6, 1)), partitions.partition_name(date(2030, 6, 2))})
+
+    assert partitions._known(date(2030, 6, 2))
+    assert not partitions._known(date(2030, 6, 1))  # retention elsewhere may have dropped it
+    assert not partitions._known(date(2030, 6, 3))
+
+
+def test_sided_slot_takes_over_its_legacy_row(ingest):
+    ingest([tee_time("07:00"), tee_time("07:10")])  # course_side '' as before migration 0003
+    legacy_id = rows()["07:00"].id
+
+    stats = ingest([tee_time("07:00", course_side="123"), tee_time("07:10", course_side="123")])
+
+    assert (stats.inserted, stats.updated, stats.closed) == (0, 2, 0)
+    stored = rows()
+    assert TeeTimeCache.query.count() == 2
+    assert (stored["07:00"].id, stored["07:00"].course_side) == (legacy_id, "123")
+    assert stored["07:00"].is_available
+
+
+def test_legacy_row_is_taken_over_once(ingest):
+    ingest([tee_time("07:00")])
+
+    stats = ingest([tee_time("07:00", course_side="front"), tee_time("07:00", course_side="back")])
+
+    assert (stats.inserted, stats.updated, stats.closed) == (1, 1, 0)
+    assert sorted(r.course_side for r in TeeTimeCache.query) == ["back", "front"]
+
+
+def test_cache_writes_bump_the_shared_snapshot_version(ingest):
+    ingest([tee_time("07:00")])
+    assert _snapshot_version() == 1
+
+    ingest([tee_time("07:00")])  # nothing changed, nothing to invalidate
+    assert _snapshot_version() == 1
+
+    TeeTimeCacheService.mark_stale([SCOPE])
+    assert _snapshot_version() == 2
+
+
+@pytest.fixture
+def search(ingest):
+    ingest([
+        tee_time("07:00", price=40.0, holes=[18], max_num_players=4),
+        tee_time("09:30", price=25.0, holes=[9, 18], max_num_players=2, min_num_players=2,
+                 special_offer=True),
+        tee_time("14:00", price=60.0, holes=[9], max_num_players=1),
+        tee_time("16:00", price=20.0, holes=[18], max_num_players=0, is_available=False),
+        tee_time("08:00", date="2030-06-02", course_name="Glendale", provider="foreup", price=30.0),
+    ])
+
+    def search(**filters):
+        return [(t['date'][-2:], t['start_time']) for t in TeeTimeCacheService.search_tee_times(**filters)]
+    return search
+
+
+def test_search_defaults_to_available_slots_in_time_order(search):
+    assert search() == [("01", "07:00"), ("01", "09:30"), ("01", "14:00"), ("02", "08:00")]
+    assert ("01", "16:00") in search(available_only=False)
+
+
+@pytest.mark.parametrize("filters, expected", [
+    ({"date_from": "2030-06-02"}, [("02", "08:00")]),
+    ({"date_to": "2030-06-01"}, [("01", "07:00"), ("01", "09:30"), ("01", "14:00")]),
+    ({"time_from": "08:00", "time_to": "14:00"}, [("01", "09:30"), ("01", "14:00"), ("02", "08:00")]),
+    ({"time_from": "7:59"}, [("01", "09:30"), ("01", "14:00"), ("02", "08:00")]),
+    ({"max_price": 30}, [("01", "09:30"), ("02", "08:00")]),
+    ({"holes": 9}, [("01", "09:30"), ("01", "14:00")]),
+    ({"holes": 18}, [("01", "07:00"), ("01", "09:30"), ("02", "08:00")]),
+    ({"min_spots": 2}, [("01", "07:00"), ("01", "09:30"), ("02", "08:00")]),
+    ({"courses": ["Glendale"]}, [("02", "08:00")]),
+    ({"providers": ["chronogolf"]}, [("01", "07:00"), ("01", "09:30"), ("01", "14:00")]),
+    ({"special_offer": True}, [("01", "09:30")]),
+    ({"special_offer": False}, [("01", "07:00"), ("01", "14:00"), ("02", "08:00")]),
+])
+def test_search_filters(search, filters, expected):
+    assert search(**filters) == expected
+
+
+def test_search_party_size_respects_open_spots_and_minimum_party(search):
+    # 09:30 needs a party of at least 2, 14:00 has one spot left
+    assert search(party_size=1) == [("01", "07:00"), ("01", "14:00"), ("02", "08:00")]
+    assert search(party_size=2) == [("01", "07:00"), ("01", "09:30"), ("02", "08:00")]
+    assert search(party_size=3) == [("01", "07:00"), ("02", "08:00")]
+
+
+def test_search_sort_direction_and_limit(search):
+    assert search(sort="price") == [("01", "09:30"), ("02", "08:00"), ("01", "07:00"), ("01", "14:00")]
+    assert search(sort="-price", limit=2) == [("01", "14:00"), ("01", "07:00")]
+    assert search(sort="-time", limit=1) == [("02", "08:00")]
+    assert [t["course_name"] for t in TeeTimeCacheService.search_tee_times(sort="course")] == \
+        ["Bonneville"] * 3 + ["Glendale"]
+
+
+@pytest.mark.parametrize("filters", [
+    {"date_from": "06/01/2030"},
+    {"date_to": "2030-13-01"},
+    {"time_from": "4:30 PM"},
+    {"time_to": "25:00"},
+])
+def test_search_rejects_malformed_dates_and_times(search, filters):
+    with pytest.raises(ValueError):
+        search(**filters)
+
+
+def test_holes_predicate_uses_jsonb_containment_on_postgres(app, monkeypatch):
+    monkeypatch.setattr(db.engine.dialect, "name", "postgresql")
+    sql = str(_holes_contains(9).compile(dialect=postgresql.dialect()))
+
+    assert "CAST(tee_time_cache.holes AS JSONB) @>" in sql
+
+
+def test_list_reads_never_load_the_raw_response(ingest):
+    ingest([tee_time("07:00", raw_json_response={"id": 1})])
+    statements = []
+    listen = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listen)
+    try:
+        db.session.expire_all()
+        fields = TEE_TIME_FIELD_PROFILES['list']
+        row = TeeTimeCache.query.options(TeeTimeCache.load_only_options(fields)).one()
+        listed = row.to_dict(fields)
+        page = TeeTimeCacheService.get_cached_tee_times_page(limit=10)
+        searched = TeeTimeCacheService.search_tee_times()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listen)
+
+    assert 'raw_json_response' in sa_inspect(row).unloaded
+    assert all('raw_json_response' not in statement for statement in statements)
+    assert 'raw_json_response' not in listed
+    assert 'raw_json_response' not in page['tee_times'][0]
+    assert 'raw_json_response' not in searched[0]
+    assert TeeTimeCacheService.get_raw_response(row.id) == (True, {"id": 1})
+    assert TeeTimeCacheService.get_raw_response(row.id + 1) == (False, None)
+
+
+def test_resolve_tee_time_fields():
+    assert resolve_tee_time_fields(None) == TEE_TIME_FIELD_PROFILES['list']
+    assert resolve_tee_time_fields("detail") == TEE_TIME_FIELD_PROFILES['detail']
+    assert resolve_tee_time_fields("id, price,") == ["id", "price"]
+    for spec in ("summary", "id,secret", ","):
+        with pytest.raises(ValueError):
+            resolve_tee_time_fields(spec)
@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from src.demand import DemandTracker
+
+HOUR = 3600
+
+
+def test_scores_halve_every_half_life():
+    tracker = DemandTracker(half_life=HOUR)
+    tracker.record("Bonneville", "2030-06-01", weight=8)
+    now = time.time()
+
+    assert tracker.score("Bonneville", "2030-06-01", now=now) == pytest.approx(8, rel=1e-3)
+    assert tracker.score("Bonneville", "2030-06-01", now=now + HOUR) == pytest.approx(4, rel=1e-3)
+    assert tracker.score("Bonneville", "2030-06-01", now=now + 3 * HOUR) == pytest.approx(1, rel=1e-3)
+
+
+def test_hits_add_to_the_decayed_score():
+    tracker = DemandTracker(half_life=HOUR)
+    tracker._scores[("Bonneville", None)] = (4.0, time.time() - HOUR)
+
+    tracker.record("Bonneville")
+
+    assert tracker.score("Bonneville") == pytest.approx(3, rel=1e-3)
+
+
+def test_any_course_any_date_is_not_tracked():
+    tracker = DemandTracker()
+    tracker.record()
+    assert tracker.top() == []
+
+
+def test_eviction_keeps_the_hottest_keys():
+    tracker = DemandTracker(max_keys=10)
+    for n in range(10):
+        tracker.record("Course", f"2030-06-{n + 1:02d}", weight=n + 1)
+
+    tracker.record("Course", "2030-07-01", weight=0.5)  # 11th key, the coldest
+
+    assert len(tracker._scores) == 9
+    assert tracker.score("Course", "2030-07-01") == 0
+    assert tracker.score("Course", "2030-06-01") == 0
+    assert tracker.score("Course", "2030-06-10") > 0
+
+
+def test_search_spreads_its_weight_over_courses_and_dates():
+    tracker = DemandTracker()
+    tracker.record_search(["A", "B"], "2030-06-01", "2030-06-02")
+
+    scores = {(t['course_name'], t['date']): t['score'] for t in tracker.top()}
+    assert scores == {(c, d): 0.25 for c in "AB" for d in ("2030-06-01", "2030-06-02")}
+
+
+def test_long_searches_are_capped():
+    tracker = DemandTracker()
+    tracker.record_search(None, "2030-06-01", "2030-12-31")
+
+    assert len(tracker._scores) == 14
+    assert tracker.score(None, "2030-06-01") == pytest.approx(1 / 14)
+
+
+def test_weights_are_relative_and_count_wildcard_hits():
+    tracker = DemandTracker()
+    tracker.record("A", "2030-06-01", weight=2)
+    tracker.record("A", None, weight=1)  # course page, any date
+    tracker.record(None, "2030-06-02", weight=1)  # search, any course
+
+    weights = tracker.weights([("A", "2030-06-01"), ("A", "2030-06-02"), ("B", "2030-06-01")])
+
+    assert weights[("A", "2030-06-01")] == pytest.approx(1.0)
+    assert weights[("A", "2030-06-02")] == pytest.approx(2 / 3)
+    assert weights[("B", "2030-06-01")] == 0.0
+
+
+def test_weights_without_demand_are_zero():
+    assert DemandTracker().weights([("A", "2030-06-01")]) == {("A", "2030-06-01"): 0.0}
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+# The provider adapters need src.misc.request_builder
+engine = pytest.importorskip("src.scraper.engine")
+
+from src._typing.structs import FetchResult
+from src.scraper import breaker, scraper
+from src.scraper.breaker import BreakerBoard, CLOSED
+
+FAST = "Bonneville Golf Course"
+SLOW = "Glendale Golf Course"
+
+
+@pytest.fixture(autouse=True)
+def fetchers(monkeypatch):
+    """Chronogolf courses answer instantly, except SLOW, which hangs"""
+    async def fetch(course_name, date, transport=None, previous_hash=None):
+        if course_name == SLOW:
+            await asyncio.sleep(30)
+        return FetchResult(tee_times=[], content_hash=f"{course_name}/{date}")
+
+    monkeypatch.setitem(scraper.COURSE_FETCHERS, "chronogolf", ("chronogolf", fetch))
+    # One failure would open a circuit, so a timeout counted as one shows up
+    monkeypatch.setattr(breaker, "breakers", BreakerBoard(failure_threshold=1))
+
+
+def tasks(courses, dates=("2030-06-01",)):
+    return engine.plan_tasks(dates, course_names=courses, providers=["chronogolf"])
+
+
+def test_results_come_back_in_task_order():
+    planned = tasks([FAST], dates=["2030-06-01", "2030-06-02"])
+    results = engine.run_tasks(planned, deadline_seconds=5)
+
+    assert [r.task for r in results] == planned
+    assert all(r.ok for r in results)
+    assert [r.content_hash for r in results] == [f"{FAST}/2030-06-01", f"{FAST}/2030-06-02"]
+
+
+def test_deadline_cuts_off_what_is_still_running():
+    planned = tasks([FAST, SLOW])
+
+    started = time.monotonic()
+    results = engine.run_tasks(planned, deadline_seconds=0.2)
+
+    assert time.monotonic() - started < 5
+    by_course = {r.task.course_name: r for r in results}
+    assert by_course[FAST].ok
+    assert by_course[SLOW].timed_out and not by_course[SLOW].ok
+    assert engine.collect_stale_scopes(results) == [(SLOW, "2030-06-01")]
+    assert engine.coverage(results)["timed_out"] == 1
+    # Running out of time says nothing about the course
+    assert breaker.breakers.state(("chronogolf", SLOW)) == CLOSED
+
+
+def test_each_date_is_handed_over_once_complete():
+    planned = tasks([FAST, SLOW], dates=["2030-06-01", "2030-06-02"])
+    handed, threads = [], set()
+
+    def on_date_done(date, results):
+        threads.add(threading.get_ident())
+        handed.append((date, [(r.task.course_name, r.timed_out) for r in results]))
+
+    engine.run_tasks(planned, on_date_done=on_date_done, deadline_seconds=0.2)
+
+    # Timed-out tasks are handed over too, in task order
+    assert sorted(handed) == [
+        ("2030-06-01", [(FAST, False), (SLOW, True)]),
+        ("2030-06-02", [(FAST, False), (SLOW, True)]),
+    ]
+    assert threading.get_ident() not in threads  # ingest runs off the loop
+
+
+def test_failing_hand_off_does_not_stop_the_run():
+    planned = tasks([FAST], dates=["2030-06-01", "2030-06-02"])
+    handed = []
+
+    def on_date_done(date, results):
+        handed.append(date)
+        raise RuntimeError("ingest failed")
+
+    results = engine.run_tasks(planned, on_date_done=on_date_done, deadline_seconds=5)
+
+    assert sorted(handed) == ["2030-06-01", "2030-06-02"]
+    assert all(r.ok for r in results)
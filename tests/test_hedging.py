@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from src.scraper import hedging
+from src.scraper.hedging import Hedger
+
+HOST = "https://example.com"
+
+
+def warmed(samples=(0.2,) * 10, **kwargs) -> Hedger:
+    options = dict(enabled=True, percentile=95, max_rate=0.5, min_samples=10)
+    options.update(kwargs)
+    hedger = Hedger(**options)
+    for seconds in samples:
+        hedger._record(HOST, seconds)
+    return hedger
+
+
+def test_disabled_or_unsafe_requests_are_never_hedged():
+    assert warmed(enabled=False).delay(HOST, "GET") is None
+    assert warmed().delay(HOST, "POST") is None
+    assert warmed().delay(HOST, "get") == pytest.approx(0.2)
+
+
+def test_no_hedging_before_min_samples():
+    assert warmed(samples=[0.2] * 9).delay(HOST, "GET") is None
+
+
+def test_delay_is_the_host_percentile_with_a_floor():
+    samples = [0.1 * n for n in range(1, 21)]  # 0.1 .. 2.0
+    assert warmed(samples=samples, percentile=50).delay(HOST, "GET") == pytest.approx(1.0)
+    assert warmed(samples=[0.01] * 10).delay(HOST, "GET") == hedging.MIN_DELAY_SECONDS
+
+
+def test_max_rate_caps_the_hedged_share():
+    hedger = warmed(max_rate=0.05)  # 10 requests seen
+    hedger._record(HOST, 0.2, hedged=True)
+    assert hedger.delay(HOST, "GET") is None  # 1 of 11 hedged
+
+    for _ in range(9):
+        hedger._record(HOST, 0.2)
+    assert hedger.delay(HOST, "GET") is None  # 1 of 20, at the cap
+
+    hedger._record(HOST, 0.2)
+    assert hedger.delay(HOST, "GET") is not None  # 1 of 21
+
+
+def slow_then_fast(slow=5.0):
+    """attempt() whose first call hangs and later calls answer at once"""
+    async def attempt():
+        attempt.calls += 1
+        if attempt.calls == 1:
+            await asyncio.sleep(slow)
+            return "primary"
+        return "backup"
+
+    attempt.calls = 0
+    return attempt
+
+
+def test_slow_request_is_hedged_and_the_backup_wins():
+    hedger = warmed(samples=[0.05] * 10)
+    attempt = slow_then_fast()
+
+    assert asyncio.run(hedger.send(HOST, "GET", attempt, lambda: True)) == "backup"
+    assert attempt.calls == 2
+    stats = hedger.stats()[HOST]
+    assert (stats['hedged'], stats['hedge_wins']) == (1, 1)
+
+
+def test_no_hedge_without_a_spare_rate_limit_token():
+    hedger = warmed(samples=[0.05] * 10)
+    attempt = slow_then_fast(slow=0.2)
+
+    assert asyncio.run(hedger.send(HOST, "GET", attempt, lambda: False)) == "primary"
+    assert attempt.calls == 1
+    assert hedger.stats()[HOST]['hedged'] == 0
+
+
+def test_both_failing_reports_the_primary_error():
+    hedger = warmed(samples=[0.05] * 10)
+
+    async def attempt():
+        attempt.calls += 1
+        if attempt.calls == 1:
+            await asyncio.sleep(0.2)
+            raise ValueError("primary")
+        raise ValueError("backup")
+
+    attempt.calls = 0
+    with pytest.raises(ValueError, match="primary"):
+        asyncio.run(hedger.send(HOST, "GET", attempt, lambda: True))
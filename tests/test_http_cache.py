@@ -0,0 +1,68 @@
+import gzip
+
+import brotli
+import pytest
+from flask import Flask
+
+from src.util.http_cache import EncodedPayload
+
+DATA = [{"course_name": "Bonneville", "start_time": "07:00"}]
+
+
+@pytest.fixture
+def payload():
+    return EncodedPayload.from_data(DATA)
+
+
+@pytest.fixture
+def serve(payload):
+    app = Flask(__name__)
+
+    def serve(**headers):
+        with app.test_request_context(headers=headers):
+            return payload.response()
+    return serve
+
+
+def test_etag_is_a_content_hash():
+    assert EncodedPayload.from_data(DATA).etag == EncodedPayload.from_data(list(DATA)).etag
+    assert EncodedPayload.from_data(DATA).etag != EncodedPayload.from_data([]).etag
+
+
+@pytest.mark.parametrize("accept, encoding, decode", [
+    ("br, gzip", "br", brotli.decompress),
+    ("gzip", "gzip", gzip.decompress),
+    ("", None, lambda body: body),
+])
+def test_best_encoding_is_served(serve, payload, accept, encoding, decode):
+    response = serve(**{"Accept-Encoding": accept})
+
+    assert response.status_code == 200
+    assert response.headers.get("Content-Encoding") == encoding
+    assert decode(response.get_data()) == payload.bodies["identity"]
+    assert response.get_etag() == (payload.etag_for(encoding or "identity"), False)
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["Cache-Control"] == "no-cache"
+
+
+def test_any_encodings_etag_revalidates(serve, payload):
+    for encoding in ("identity", "gzip", "br"):
+        response = serve(**{"Accept-Encoding": "gzip",
+                            "If-None-Match": f'"{payload.etag_for(encoding)}"'})
+
+        assert response.status_code == 304
+        assert response.get_data() == b""
+        assert response.get_etag() == (payload.etag_for("gzip"), False)
+
+
+def test_weak_validator_revalidates(serve, payload):
+    response = serve(**{"If-None-Match": f'W/"{payload.etag}"'})
+
+    assert response.status_code == 304
+
+
+def test_stale_etag_gets_the_body(serve):
+    response = serve(**{"If-None-Match": '"something-else"'})
+
+    assert response.status_code == 200
+    assert response.get_data()
@@ -0,0 +1,112 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from src._typing.structs import TeeTime
+from src.cache_service import TeeTimeCacheService
+from src.models import db, RequestLog
+from src.util import pagination
+
+
+def raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("values", [
+    [1_900_000_000, 42],
+    ["2030-06-01T07:00:00", 7],
+    [1, 2, 3],
+])
+def test_cursor_round_trip(values):
+    cursor = pagination.encode_cursor(values)
+
+    assert "=" not in cursor
+    assert pagination.decode_cursor(cursor, [lambda v: v] * len(values)) == values
+
+
+def test_cursor_values_are_parsed_per_column():
+    when = datetime(2030, 6, 1, 7, 30)
+    cursor = pagination.encode_cursor([when.isoformat(), 5])
+
+    assert pagination.decode_cursor(cursor, [datetime.fromisoformat, int]) == [when, 5]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    raw_cursor({"id": 1}),
+    raw_cursor([1]),
+    raw_cursor(["yesterday", 1]),
+    raw_cursor(["2030-06-01T07:00:00", "x"]),
+    raw_cursor(["2030-06-01T07:00:00", None]),
+])
+def test_malformed_cursors_raise_value_error(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        pagination.decode_cursor(cursor, [datetime.fromisoformat, int])
+
+
+def test_page_start():
+    cursor = pagination.encode_cursor([1, 2])
+
+    assert pagination.page_start(cursor, 0, [int, int]) == ([1, 2], 0)
+    assert pagination.page_start(None, 20, [int, int]) == (None, 20)
+    with pytest.raises(ValueError):
+        pagination.page_start(cursor, 20, [int, int])
+    with pytest.raises(ValueError):
+        pagination.page_start(None, -1, [int, int])
+
+
+def test_keyset_pages_walk_every_row_once(app):
+    start = datetime(2030, 6, 1)
+    # Two rows share each timestamp, so id has to break the tie
+    for n in range(7):
+        db.session.add(RequestLog(datetime=start + timedelta(minutes=n // 2),
+                                  provider="chronogolf", endpoint="tee_times"))
+    db.session.commit()
+
+    columns = [RequestLog.datetime, RequestLog.id]
+    seen, cursor = [], None
+    while True:
+        values = pagination.decode_cursor(cursor, [datetime.fromisoformat, int]) if cursor else None
+        rows, has_more = pagination.paginate(RequestLog.query, columns, values, 3, descending=True)
+        seen += [(row.datetime, row.id) for row in rows]
+        if not has_more:
+            break
+        cursor = pagination.encode_cursor([rows[-1].datetime.isoformat(), rows[-1].id])
+
+    assert len(seen) == 7
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_offset_pages(app):
+    for n in range(5):
+        db.session.add(RequestLog(datetime=datetime(2030, 6, 1, 0, n),
+                                  provider="chronogolf", endpoint="tee_times"))
+    db.session.commit()
+
+    rows, has_more = pagination.paginate(RequestLog.query, [RequestLog.datetime, RequestLog.id],
+                                         None, 2, offset=3)
+    assert [row.datetime.minute for row in rows] == [3, 4]
+    assert not has_more
+    assert pagination.estimated_count(RequestLog.query) is None  # SQLite has no planner stats
+
+
+def test_only_offset_pages_count_the_total(app):
+    TeeTimeCacheService.cache_tee_times([
+        TeeTime(date="2030-06-01", start_time_unf=f"07:{n}0", course_name="Bonneville", holes=[18],
+                booking_url="https://example.com/book", provider="chronogolf", is_available=True,
+                green_fee=40.0, price=40.0, subtotal=40.0, max_num_players=4)
+        for n in range(3)
+    ])
+
+    first = TeeTimeCacheService.get_cached_tee_times_page(limit=2)["pagination"]
+    assert first["total"] is None
+    assert first["has_more"]
+
+    following = TeeTimeCacheService.get_cached_tee_times_page(
+        limit=2, cursor=first["next_cursor"])
+    assert [t["start_time"] for t in following["tee_times"]] == ["07:20"]
+    assert following["pagination"]["total"] is None
+
+    assert TeeTimeCacheService.get_cached_tee_times_page(limit=2, offset=0)["pagination"]["total"] == 3
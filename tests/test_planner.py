@@ -0,0 +1,162 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+# The provider adapters need src.misc.request_builder
+planner = pytest.importorskip("src.scraper.planner")
+
+from src.scraper.engine import ScrapeResult, ScrapeTask
+from src.util import misc
+
+HOUR = 3600
+COURSE = "Bonneville Golf Course"
+
+
+def day(offset: int) -> str:
+    return (date.today() + timedelta(days=offset)).strftime('%Y-%m-%d')
+
+
+def task(date_str: str, course_name: str = COURSE) -> ScrapeTask:
+    return ScrapeTask(course_name=course_name, date=date_str, provider="chronogolf")
+
+
+def scraped(task: ScrapeTask, count: int = 1, error: str = None) -> ScrapeResult:
+    return ScrapeResult(task=task, tee_times=[None] * count, error=error)
+
+
+def local(day_offset: int, hour: int, minute: int = 0) -> float:
+    """Epoch seconds of a course-local time, day_offset days from 2030-01-01"""
+    moment = datetime(2030, 1, 1, hour, minute) + timedelta(days=day_offset)
+    return misc.COURSE_TZ.localize(moment).timestamp()
+
+
+@pytest.fixture
+def adaptive():
+    return planner.AdaptivePlanner(min_interval=15 * 60, max_interval=24 * HOUR,
+                                   budget_per_hour=3600, target_changes=1)
+
+
+def test_unobserved_pairs_use_the_prior_intervals(adaptive):
+    assert adaptive.interval(task(day(0)).key) == 3 * HOUR
+    assert adaptive.interval(task(day(1)).key) == 12 * HOUR
+    assert adaptive.interval(task(day(5)).key) == 24 * HOUR
+
+
+def test_interval_follows_the_change_rate(adaptive):
+    pair = task(day(3))
+    adaptive.record(scraped(pair), now=1000)
+    adaptive.record(scraped(pair), changes=4, now=1000 + 2 * HOUR)  # 2 changes/hour
+
+    assert adaptive.interval(pair.key) == pytest.approx(HOUR / 2)
+    assert adaptive.states[pair.key].next_due_at == pytest.approx(1000 + 2.5 * HOUR)
+
+    # EWMA: half the new observation, half the old rate
+    adaptive.record(scraped(pair), changes=0, now=1000 + 3 * HOUR)
+    assert adaptive.states[pair.key].change_rate == pytest.approx(1.0)
+    assert adaptive.interval(pair.key) == pytest.approx(HOUR)
+
+
+def test_interval_is_clamped(adaptive):
+    busy, quiet = task(day(3)), task(day(4))
+    for pair, changes in ((busy, 100), (quiet, 0)):
+        adaptive.record(scraped(pair), now=1000)
+        adaptive.record(scraped(pair), changes=changes, now=1000 + HOUR)
+
+    assert adaptive.interval(busy.key) == adaptive.min_interval
+    assert adaptive.interval(quiet.key) == adaptive.max_interval
+
+
+def test_failed_scrape_is_retried_after_the_min_interval(adaptive):
+    pair = task(day(3))
+    adaptive.record(scraped(pair, error="boom"), now=1000)
+
+    state = adaptive.states[pair.key]
+    assert state.next_due_at == 1000 + adaptive.min_interval
+    assert state.scrapes == 0
+
+
+def test_plan_spends_at_most_the_budget(adaptive):
+    adaptive.tokens = 3
+    planned = adaptive.plan([day(2)], now=1000)
+
+    assert len(planned) == 3
+    assert adaptive.tokens == 0
+
+
+def test_burst_window_around_a_release(adaptive):
+    rule = planner.ReleaseRule(days_ahead=7, minute=7 * 60)
+    adaptive.release_rules[COURSE] = rule
+    released = task("2030-01-08")
+    release_at = rule.release_at(released.date)
+
+    assert release_at == local(0, 7)
+    assert adaptive.in_burst(released, release_at - planner.RELEASE_BURST_BEFORE)
+    assert adaptive.in_burst(released, release_at + planner.RELEASE_BURST_AFTER)
+    assert not adaptive.in_burst(released, release_at + HOUR)
+    assert not adaptive.in_burst(task("2030-01-09"), release_at)
+
+
+def test_release_burst_goes_first_within_the_budget(adaptive):
+    horizon = [day(0), day(1)]
+    rule = planner.ReleaseRule(days_ahead=7, minute=7 * 60)
+    adaptive.release_rules = {COURSE: rule}
+    released = (date.today() + timedelta(days=7)).strftime('%Y-%m-%d')
+    now = rule.release_at(released) + 60
+
+    # Every pair in the horizon was just scraped, so nothing else is due
+    for planned in planner.engine.plan_tasks(horizon):
+        adaptive.record(scraped(planned), now=now - 60)
+    adaptive.tokens = 1
+
+    assert adaptive.plan(horizon, now=now) == [task(released)]
+
+    # Refreshed every RELEASE_BURST_INTERVAL while the window lasts
+    adaptive.record(scraped(task(released)), now=now)
+    adaptive.tokens = adaptive.capacity
+    assert adaptive.plan(horizon, now=now + 30) == []
+    assert adaptive.plan(horizon, now=now + planner.RELEASE_BURST_INTERVAL) == [task(released)]
+
+
+def test_release_time_is_inferred_from_an_empty_date_opening(adaptive):
+    adaptive.release_rules = {}
+    opened = task("2030-01-08")
+    adaptive.record(scraped(opened, count=0), now=local(0, 6))
+    adaptive.record(scraped(opened, count=5), now=local(0, 7, 10))
+
+    rule = adaptive.release_rules[COURSE]
+    assert (rule.days_ahead, rule.minute, rule.inferred) == (7, 7 * 60 + 10, True)
+
+
+def test_inferred_release_keeps_the_earliest_sighting(adaptive):
+    adaptive.release_rules = {}
+    for offset, empty_at, seen_at in ((0, (6, 0), (9, 30)),  # scraped late
+                                      (1, (6, 0), (7, 5)),  # closer to the real release
+                                      (2, (6, 30), (11, 0))):  # late again: no drift
+        opened = task(f"2030-01-{8 + offset:02d}")
+        adaptive.record(scraped(opened, count=0), now=local(offset, *empty_at))
+        adaptive.record(scraped(opened, count=5), now=local(offset, *seen_at))
+
+    assert adaptive.release_rules[COURSE].minute == 7 * 60 + 5
+
+
+def test_inferred_release_moves_later_when_still_closed_past_it(adaptive):
+    adaptive.release_rules = {}
+    first, second = task("2030-01-08"), task("2030-01-09")
+    adaptive.record(scraped(first, count=0), now=local(0, 6))
+    adaptive.record(scraped(first, count=5), now=local(0, 7))
+
+    # Still empty at 08:00 the next day: the release moved
+    adaptive.record(scraped(second, count=0), now=local(1, 8))
+    adaptive.record(scraped(second, count=5), now=local(1, 8, 15))
+
+    assert adaptive.release_rules[COURSE].minute == 8 * 60 + 15
+
+
+def test_configured_release_is_never_overridden(adaptive):
+    configured = planner.ReleaseRule(days_ahead=14, minute=6 * 60)
+    adaptive.release_rules = {COURSE: configured}
+    opened = task("2030-01-08")
+    adaptive.record(scraped(opened, count=0), now=local(0, 6))
+    adaptive.record(scraped(opened, count=5), now=local(0, 7))
+
+    assert adaptive.release_rules[COURSE] is configured
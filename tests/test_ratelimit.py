@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from src.scraper import ratelimit
+from src.scraper.ratelimit import RateLimiter, TokenBucket
+
+
+def test_burst_is_free_then_waits_follow_the_rate():
+    bucket = TokenBucket(rate=2, burst=2)
+
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    # Each reservation past the burst waits one more 1/rate
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.01)
+    assert bucket.reserve() == pytest.approx(1.0, abs=0.01)
+    assert (bucket.requests, bucket.throttled) == (4, 2)
+    assert bucket.waited_max == pytest.approx(1.0, abs=0.01)
+
+
+def test_try_reserve_never_goes_into_debt():
+    bucket = TokenBucket(rate=1, burst=1)
+
+    assert bucket.try_reserve()
+    assert not bucket.try_reserve()
+    assert bucket.tokens == pytest.approx(0.0, abs=0.01)
+
+
+def test_acquire_sleeps_the_reserved_wait(monkeypatch):
+    waited = []
+
+    async def sleep(seconds):
+        waited.append(seconds)
+
+    monkeypatch.setattr(ratelimit.asyncio, "sleep", sleep)
+    bucket = TokenBucket(rate=4, burst=1)
+
+    asyncio.run(bucket.acquire())
+    asyncio.run(bucket.acquire())
+
+    assert len(waited) == 1
+    assert waited[0] == pytest.approx(0.25, abs=0.01)
+
+
+def test_first_configure_replaces_defaults_then_only_tightens():
+    bucket = TokenBucket(rate=4, burst=8)
+
+    bucket.configure(10, 20)
+    assert (bucket.rate, bucket.burst) == (10, 20)
+
+    bucket.configure(2, 30)
+    assert (bucket.rate, bucket.burst) == (2, 20)
+
+    bucket.configure(5, 3)
+    assert (bucket.rate, bucket.burst) == (2, 3)
+    assert bucket.tokens <= 3
+
+
+def test_courses_on_one_host_share_the_strictest_limit(monkeypatch):
+    monkeypatch.setattr(ratelimit, "courses", {
+        "Fast": {"rate_limit": {"rate": 5, "burst": 10}},
+        "Slow": {"rate_limit": {"rate": 1}},
+        "Unlimited": {},
+    })
+    limiter = RateLimiter(rate=4, burst=8)
+
+    assert limiter.bucket("https://a", "Fast").rate == 5
+    bucket = limiter.bucket("https://a", "Slow")
+    assert (bucket.rate, bucket.burst) == (1, 1)  # burst defaults to max(1, rate)
+    assert limiter.bucket("https://a", "Unlimited") is bucket
+    assert (limiter.bucket("https://b", "Unlimited").rate,
+            limiter.bucket("https://b").burst) == (4, 8)
+
+
+def test_every_configured_course_has_a_rate_limit():
+    for course_name in ratelimit.courses:
+        assert ratelimit.course_rate_limit(course_name) is not None, course_name
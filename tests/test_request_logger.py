@@ -0,0 +1,88 @@
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from src.models import RequestLog
+from src.request_logger import RequestLogSink
+
+
+def entry(n: int) -> dict:
+    return {'datetime': datetime(2030, 6, 1, 7, n), 'provider': 'chronogolf', 'endpoint': f'/tee_times/{n}', 'is_error': False}
+
+
+@pytest.fixture
+def sink(app):
+    sinks = []
+
+    def sink(**kwargs):
+        kwargs.setdefault('flush_interval', 0.05)
+        sinks.append(RequestLogSink(app, **kwargs))
+        return sinks[-1]
+    yield sink
+    for started in sinks:
+        started.stop()
+
+
+def test_full_batches_are_written(sink):
+    writer = sink(batch_size=3, flush_interval=60).start()
+    for n in range(3):
+        assert writer.put(entry(n))
+
+    deadline = time.monotonic() + 5
+    while writer.written < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.written == 3
+    assert RequestLog.query.count() == 3
+
+
+def test_partial_batch_is_flushed_after_the_interval(sink):
+    writer = sink(batch_size=100).start()
+    writer.put(entry(0))
+
+    deadline = time.monotonic() + 5
+    while writer.written < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.written == 1
+
+
+def test_stop_flushes_everything_queued(sink):
+    writer = sink(batch_size=2, flush_interval=60).start()
+    for n in range(5):
+        writer.put(entry(n))
+    writer.stop()
+
+    assert not writer.running
+    assert (writer.written, writer.dropped) == (5, 0)
+    assert RequestLog.query.count() == 5
+
+
+def test_full_queue_drops_new_entries(sink):
+    writer = sink(max_queue=2)  # not started, so nothing drains the queue
+    assert writer.put(entry(0)) and writer.put(entry(1))
+
+    assert not writer.put(entry(2))
+    assert writer.dropped == 1
+
+
+def test_block_waits_for_room_off_the_event_loop(sink):
+    writer = sink(max_queue=1, overflow='block', block_timeout=0.2)
+    writer.put(entry(0))
+
+    started = time.monotonic()
+    assert not writer.put(entry(1))
+    assert time.monotonic() - started >= 0.2
+
+
+def test_block_never_stalls_the_event_loop(sink):
+    writer = sink(max_queue=1, overflow='block', block_timeout=5)
+    writer.put(entry(0))
+
+    async def log_from_a_fetch():
+        return writer.put(entry(1))
+
+    started = time.monotonic()
+    assert not asyncio.run(log_from_a_fetch())
+    assert time.monotonic() - started < 1
+    assert writer.dropped == 1
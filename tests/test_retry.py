@@ -0,0 +1,165 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+import aiohttp
+import pytest
+
+from src._typing.errors import NonRetryableAPIError, RateLimitError, RetryableAPIError
+from src.scraper import retry
+from src.scraper.retry import RetryPolicy
+
+
+@dataclass
+class Response:
+    status: int
+    headers: dict = field(default_factory=dict)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Seconds of every backoff sleep, without sleeping"""
+    waited = []
+
+    async def sleep(seconds):
+        waited.append(seconds)
+
+    monkeypatch.setattr(retry.asyncio, "sleep", sleep)
+    # Lowest jitter draw, so delays are predictable
+    monkeypatch.setattr(retry.random, "uniform", lambda low, high: low)
+    return waited
+
+
+def attempts(*outcomes):
+    """attempt() returning (or raising) each outcome in turn; .calls counts them"""
+    outcomes = list(outcomes)
+
+    async def attempt():
+        attempt.calls += 1
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    attempt.calls = 0
+    return attempt
+
+
+def send(policy, attempt):
+    return asyncio.run(policy.send(attempt, label="test"))
+
+
+def test_retries_retryable_statuses_until_success(sleeps):
+    policy = RetryPolicy(max_attempts=3, base_delay=0.5)
+    attempt = attempts(Response(503), Response(502), Response(200))
+
+    assert send(policy, attempt).status == 200
+    assert attempt.calls == 3
+    assert sleeps == [0.5, 0.5]
+    assert policy.stats() == {'retries': 2, 'recovered': 1, 'exhausted': 0, 'deadline_stops': 0}
+
+
+def test_non_retryable_status_is_returned_at_once(sleeps):
+    policy = RetryPolicy(max_attempts=3)
+    attempt = attempts(Response(404))
+
+    assert send(policy, attempt).status == 404
+    assert attempt.calls == 1
+    assert sleeps == []
+
+
+def test_last_response_returned_when_retries_run_out(sleeps):
+    policy = RetryPolicy(max_attempts=2)
+    attempt = attempts(Response(503), Response(504))
+
+    assert send(policy, attempt).status == 504
+    assert policy.exhausted == 1
+
+
+def test_connection_errors_are_retried_and_the_last_one_raised(sleeps):
+    policy = RetryPolicy(max_attempts=2)
+    attempt = attempts(aiohttp.ClientConnectionError("reset"), asyncio.TimeoutError())
+
+    with pytest.raises(asyncio.TimeoutError):
+        send(policy, attempt)
+    assert attempt.calls == 2
+
+
+def test_other_errors_are_not_retried(sleeps):
+    policy = RetryPolicy(max_attempts=3)
+    attempt = attempts(NonRetryableAPIError("bad request"))
+
+    with pytest.raises(NonRetryableAPIError):
+        send(policy, attempt)
+    assert attempt.calls == 1
+
+
+def test_retry_after_sets_the_floor_of_the_delay(sleeps):
+    policy = RetryPolicy(max_attempts=2, base_delay=0.5, max_retry_after=30)
+    attempt = attempts(Response(429, {"retry-after": "7"}), Response(200))
+
+    assert send(policy, attempt).status == 200
+    assert sleeps == [7.0]
+
+
+def test_retry_after_past_the_cap_stops_retrying(sleeps):
+    policy = RetryPolicy(max_attempts=3, max_retry_after=30)
+    attempt = attempts(Response(429, {"Retry-After": "120"}))
+
+    assert send(policy, attempt).status == 429
+    assert attempt.calls == 1
+    assert sleeps == []
+    assert policy.exhausted == 1
+
+
+def test_backoff_is_capped_at_max_delay(monkeypatch):
+    monkeypatch.setattr(retry.random, "uniform", lambda low, high: high)
+    policy = RetryPolicy(base_delay=1, max_delay=4)
+
+    assert policy.next_delay(1) == 3
+    assert policy.next_delay(3) == 4
+
+
+def test_no_retry_that_cannot_start_before_the_deadline(sleeps):
+    policy = RetryPolicy(max_attempts=3, base_delay=0.5)
+    attempt = attempts(Response(503))
+
+    async def run():
+        retry.current_deadline.set(time.monotonic() + retry.MIN_ATTEMPT_SECONDS)
+        return await policy.send(attempt)
+
+    assert asyncio.run(run()).status == 503
+    assert attempt.calls == 1
+    assert sleeps == []
+    assert policy.deadline_stops == 1
+
+
+def test_retry_that_fits_before_the_deadline_goes_out(sleeps):
+    policy = RetryPolicy(max_attempts=2, base_delay=0.5)
+    attempt = attempts(Response(503), Response(200))
+
+    async def run():
+        retry.current_deadline.set(time.monotonic() + 60)
+        return await policy.send(attempt)
+
+    assert asyncio.run(run()).status == 200
+    assert policy.deadline_stops == 0
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("5", 5.0),
+    ("-3", 0.0),
+    ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0),  # in the past
+    ("soon", None),
+    (None, None),
+])
+def test_parse_retry_after(value, expected):
+    assert retry.parse_retry_after(value) == expected
+
+
+def test_error_for_status_classification():
+    assert isinstance(retry.error_for_status(503, "down"), RetryableAPIError)
+    assert isinstance(retry.error_for_status(403, "no"), NonRetryableAPIError)
+    error = retry.error_for_status(429, "slow down", headers={"Retry-After": "12"})
+    assert isinstance(error, RateLimitError)
+    assert error.retry_after == 12.0
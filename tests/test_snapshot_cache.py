@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+
+from src.cache_service import TeeTimeSnapshot
+from src.snapshot_cache import SnapshotCache
+
+COURSE = "Bonneville Golf Course"
+
+
+def counting_builder(delay=0.0, gate: threading.Event = None):
+    """Builder returning its call number; optionally slow or held until gate is set"""
+    def build():
+        build.calls += 1
+        number = build.calls
+        if gate is not None:
+            gate.wait(5)
+        time.sleep(delay)
+        return number
+
+    build.calls = 0
+    return build
+
+
+def run_threads(target, count):
+    results = [None] * count
+
+    def run(i):
+        results[i] = target()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_snapshot_is_reused_until_invalidated():
+    cache = SnapshotCache(counting_builder())
+
+    assert cache.get().data == 1
+    assert cache.get().data == 1
+
+    cache.invalidate()
+    assert cache.get().data == 2
+
+
+def test_first_build_happens_once_for_concurrent_readers():
+    build = counting_builder(delay=0.1)
+    cache = SnapshotCache(build)
+
+    results = run_threads(cache.get, 8)
+
+    assert build.calls == 1
+    assert {snapshot.data for snapshot in results} == {1}
+
+
+def test_readers_get_the_old_snapshot_while_one_rebuilds():
+    gate = threading.Event()
+    build = counting_builder(gate=gate)
+    gate.set()
+    cache = SnapshotCache(build)
+    old = cache.get()
+
+    gate.clear()
+    cache.invalidate()
+    rebuilding = threading.Thread(target=cache.get)
+    rebuilding.start()
+    while build.calls < 2:
+        time.sleep(0.001)
+
+    assert cache.get() is old
+
+    gate.set()
+    rebuilding.join(5)
+    assert build.calls == 2
+    assert cache.get().data == 2
+
+
+def test_write_during_a_build_leaves_the_snapshot_stale():
+    cache = SnapshotCache(None)
+
+    def build():
+        cache.invalidate()  # a write commits while the builder reads
+        return "built"
+
+    cache.builder = build
+    first = cache.get()
+    second = cache.get()
+
+    assert second is not first
+    assert second.version > first.version
+
+
+def test_max_age_expires_snapshots():
+    cache = SnapshotCache(counting_builder(), max_age=0.05)
+    assert cache.get().data == 1
+
+    time.sleep(0.06)
+    assert cache.get().data == 2
+
+
+def test_shared_version_change_invalidates_at_most_every_interval():
+    shared = {"version": 7, "reads": 0}
+
+    def read_version():
+        shared["reads"] += 1
+        return shared["version"]
+
+    cache = SnapshotCache(counting_builder(), shared_version=read_version, check_interval=0.05)
+    assert cache.get().data == 1
+
+    shared["version"] += 1  # another process wrote
+    assert cache.get().data == 1  # not checked again yet
+    assert shared["reads"] == 1
+
+    time.sleep(0.06)
+    assert cache.get().data == 2
+    assert cache.get().data == 2
+
+
+def test_unreadable_shared_version_keeps_the_snapshot():
+    def read_version():
+        raise RuntimeError("database down")
+
+    cache = SnapshotCache(counting_builder(), shared_version=read_version, check_interval=0)
+
+    assert cache.get().data == 1
+    assert cache.get().data == 1
+
+
+def test_course_payloads_are_kept_for_configured_courses_only():
+    snapshot = TeeTimeSnapshot([{"course_name": COURSE, "start_time": "07:00"},
+                                {"course_name": "Made Up", "start_time": "07:10"}])
+
+    configured = snapshot.course_payload(COURSE)
+    assert snapshot.course_payload(COURSE) is configured
+    assert json.loads(configured.bodies["identity"])["count"] == 1
+
+    unknown = snapshot.course_payload("Made Up")
+    assert json.loads(unknown.bodies["identity"]) == {"course_name": "Made Up", "count": 0, "tee_times": []}
+    assert list(snapshot._course_payloads) == [COURSE]
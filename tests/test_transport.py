@@ -0,0 +1,101 @@
+import asyncio
+import gzip
+import zlib
+
+import brotli
+import pytest
+import zstandard
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src._typing.errors import RequestError
+from src.scraper import transport
+from src.scraper.transport import HttpRequest
+
+BODY = b'{"tee_times": []}'
+
+
+def test_parse_curl_get():
+    cmd = """curl 'https://example.com/marketplace/teetimes?date=2030-06-01' \\
+  -H 'accept: application/json' \\
+  -H 'x-token: abc:def' \\
+  -b 'session=1' --compressed -s"""
+
+    assert transport.parse_curl(cmd) == HttpRequest(
+        url="https://example.com/marketplace/teetimes?date=2030-06-01",
+        method="GET",
+        headers={"accept": "application/json", "x-token": "abc:def", "Cookie": "session=1",
+                 "User-Agent": transport.CURL_USER_AGENT},
+    )
+
+
+def test_parse_curl_post():
+    request = transport.parse_curl(
+        "curl --url https://example.com/api -d a=1 --data-raw b=2 -A agent -m 10")
+
+    assert (request.url, request.method, request.data) == ("https://example.com/api", "POST", "a=1&b=2")
+    assert request.headers == {"User-Agent": "agent", "Accept": "*/*",
+                               "Content-Type": "application/x-www-form-urlencoded"}
+    assert transport.parse_curl("curl -X put https://example.com/api -d x").method == "PUT"
+
+
+def test_parse_curl_keeps_the_commands_own_content_type():
+    request = transport.parse_curl(
+        "curl https://example.com/api -H 'content-type: application/json' --data-raw '{}'")
+
+    assert request.headers["content-type"] == "application/json"
+    assert "Content-Type" not in request.headers
+
+
+def test_curl_default_headers_are_sent():
+    async def send():
+        seen = {}
+
+        async def handler(http_request):
+            seen.update(http_request.headers)
+            return web.json_response({})
+
+        app = web.Application()
+        app.router.add_post("/api", handler)
+        async with TestServer(app) as server, transport.Transport() as client:
+            await client._fetch(transport.parse_curl(f"curl {server.make_url('/api')} -d a=1"), 5)
+        return seen
+
+    seen = asyncio.run(send())
+
+    assert seen["Content-Type"] == "application/x-www-form-urlencoded"
+    assert seen["User-Agent"] == transport.CURL_USER_AGENT
+
+
+@pytest.mark.parametrize("cmd", [
+    "curl --frobnicate https://example.com",  # unknown flag
+    "curl -H 'accept: */*'",  # no URL
+    "curl https://example.com -H",  # flag missing its value
+])
+def test_parse_curl_rejects_what_it_cannot_reproduce(cmd):
+    with pytest.raises(RequestError):
+        transport.parse_curl(cmd)
+
+
+def test_accept_encoding_keeps_decodable_codecs():
+    assert transport.accept_encoding(None) == "gzip, deflate, br, zstd"
+    assert transport.accept_encoding("gzip;q=1.0, sdch, br") == "gzip;q=1.0, br"
+    assert transport.accept_encoding("sdch") == "identity"
+
+
+@pytest.mark.parametrize("encoding, encode", [
+    (None, lambda body: body),
+    ("gzip", gzip.compress),
+    ("deflate", zlib.compress),
+    ("deflate", lambda body: zlib.compress(body)[2:-4]),  # raw deflate, no zlib header
+    ("br", brotli.compress),
+    ("zstd", zstandard.ZstdCompressor().compress),
+    ("gzip, br", lambda body: brotli.compress(gzip.compress(body))),
+])
+def test_decode_body(encoding, encode):
+    assert transport.decode_body(encode(BODY), encoding) == BODY
+
+
+def test_decode_body_rejects_unknown_encodings():
+    with pytest.raises(RequestError):
+        transport.decode_body(BODY, "compress")